@@ -0,0 +1,118 @@
+"""
+Contrôle d'admission des tours de conversation (/chat).
+
+Le nombre de tours d'agent exécutés en même temps est borné ; les requêtes en
+excès attendent dans une file à priorité pendant au plus `max_wait`
+secondes. Les conversations déjà commencées passent avant les nouvelles
+sessions. Si la file est pleine (ou l'attente trop longue), la requête est
+refusée avec une estimation du délai avant de réessayer (Retry-After).
+
+En mode multi-processus, chaque worker a son propre contrôleur.
+"""
+import heapq
+import itertools
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+import metrics
+
+PRIORITE_EN_COURS = 0
+PRIORITE_NOUVELLE = 1
+
+
+class Surcharge(Exception):
+    """Requête refusée : file d'attente pleine ou attente maximale dépassée"""
+
+    def __init__(self, message, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Args:
+        max_concurrent: Nombre maximal de tours exécutés en parallèle
+        max_queue: Nombre maximal de requêtes en attente
+        max_wait: Attente maximale d'une requête dans la file (secondes)
+    """
+
+    def __init__(self, max_concurrent: int = 8, max_queue: int = 32, max_wait: float = 20.0):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.actifs = 0
+        self._file = []  # tas de (priorité, ordre d'arrivée)
+        self._ordre = itertools.count()
+        self._cond = threading.Condition()
+        # Durée moyenne d'un tour (moyenne glissante), pour estimer Retry-After
+        self._duree_moyenne = 5.0
+
+    def _publier(self):
+        metrics.gauge("admission.in_flight", self.actifs)
+        metrics.gauge("admission.queue_depth", len(self._file))
+
+    def retry_after(self) -> int:
+        """Délai estimé (secondes) avant qu'une place se libère"""
+        tours_devant = len(self._file) + 1
+        return max(1, math.ceil(self._duree_moyenne * tours_devant / max(1, self.max_concurrent)))
+
+    def _entrer(self, priorite):
+        debut = time.monotonic()
+        with self._cond:
+            if self.actifs < self.max_concurrent and not self._file:
+                self.actifs += 1
+                self._publier()
+                return 0.0
+
+            if len(self._file) >= self.max_queue:
+                metrics.incr("admission.rejected.queue_full")
+                raise Surcharge("file d'attente pleine", self.retry_after())
+
+            ticket = (priorite, next(self._ordre))
+            heapq.heappush(self._file, ticket)
+            self._publier()
+            deadline = debut + self.max_wait
+            try:
+                while not (self._file[0] == ticket and self.actifs < self.max_concurrent):
+                    reste = deadline - time.monotonic()
+                    if reste <= 0:
+                        metrics.incr("admission.rejected.timeout")
+                        raise Surcharge("attente maximale dépassée", self.retry_after())
+                    self._cond.wait(reste)
+                heapq.heappop(self._file)
+                self.actifs += 1
+            except Surcharge:
+                self._file.remove(ticket)
+                heapq.heapify(self._file)
+                raise
+            finally:
+                self._publier()
+                # Le suivant dans la file est peut-être admissible
+                self._cond.notify_all()
+        return time.monotonic() - debut
+
+    def _sortir(self, duree):
+        with self._cond:
+            self.actifs -= 1
+            self._duree_moyenne = 0.9 * self._duree_moyenne + 0.1 * duree
+            self._publier()
+            self._cond.notify_all()
+
+    @contextmanager
+    def admit(self, priorite: int = PRIORITE_NOUVELLE):
+        """
+        Réserve une place pour un tour d'agent.
+
+        Raises:
+            Surcharge: si la requête ne peut pas être admise
+        """
+        attente = self._entrer(priorite)
+        metrics.observe("admission.wait_seconds", attente)
+        metrics.incr("admission.admitted")
+        debut = time.monotonic()
+        try:
+            yield
+        finally:
+            self._sortir(time.monotonic() - debut)
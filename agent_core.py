@@ -0,0 +1,453 @@
+"""
+Cœur de l'agent Kimrau, partagé par tous les points d'entrée.
+
+Le mode texte (base.py), le mode vocal (base_audio.py) et l'API HTTP (api.py)
+ne sont que des adaptateurs au-dessus de ce module : modèle, outils, graphe,
+tentatives et streaming sont définis une seule fois ici.
+"""
+import os
+import time
+
+import httpx
+from dotenv import load_dotenv
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+# MISTRAL EXAMPLE
+from langchain_mistralai import ChatMistralAI
+
+import catalogue
+import idempotence
+import conversations
+import metrics
+import prefetch
+import turn_log
+from hotel_tools import tools
+from model_router import ModelRouter, Tier
+from resilience import CircuitBreaker, ServiceIndisponible, TokenBucket
+
+# Charger les variables depuis .env
+load_dotenv(override=True)
+
+# Récupérer les clés API
+mistral_api_key = os.getenv("MISTRAL_API_KEY")
+
+# Débit d'appels LLM partagé par toutes les sessions
+mistral_limiter = TokenBucket("mistral", rate=float(os.getenv("MISTRAL_RATE", "2")),
+                              capacity=float(os.getenv("MISTRAL_BURST", "4")))
+# Un coupe-circuit par modèle : les délais dépassés du modèle rapide n'empêchent pas l'escalade
+mistral_breakers = {}
+# Attente maximale d'un jeton avant d'abandonner l'appel LLM
+MISTRAL_MAX_WAIT = 10.0
+
+
+def panne_mistral(exc) -> bool:
+    """Vrai pour une panne du service (délai, réseau, 5xx) ; une 4xx ou une erreur de données n'en est pas une"""
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code >= 500
+    return isinstance(exc, httpx.TransportError)
+
+
+class ResilientChatMistralAI(ChatMistralAI):
+    """ChatMistralAI dont chaque appel passe par le limiteur et le coupe-circuit de son modèle"""
+
+    def _generate(self, *args, **kwargs):
+        mistral_limiter.acquire(timeout=MISTRAL_MAX_WAIT)
+        breaker = mistral_breakers[self.model]
+        breaker.before_call()
+        try:
+            resultat = super()._generate(*args, **kwargs)
+        except Exception as e:
+            if panne_mistral(e):
+                breaker.record_failure()
+            else:
+                # Le service a répondu : seule la requête est en cause
+                breaker.record_success()
+            raise
+        breaker.record_success()
+        return resultat
+
+
+# Cascade de modèles (voir model_router.py) : KIMRAU_MODEL_FAST vide pour n'utiliser qu'un modèle
+MODEL_FAST = os.getenv("KIMRAU_MODEL_FAST", "ministral-8b-latest")
+MODEL_STRONG = os.getenv("KIMRAU_MODEL_STRONG", "mistral-small-latest")
+# Budgets de latence : délai d'un appel au modèle de chaque niveau, et d'un tour complet
+FAST_BUDGET = float(os.getenv("KIMRAU_FAST_BUDGET", "8"))
+STRONG_BUDGET = float(os.getenv("MISTRAL_TIMEOUT", "30"))
+TURN_BUDGET = float(os.getenv("KIMRAU_TURN_BUDGET", "45"))
+# Limites d'un tour : au-delà, réponse partielle avec les résultats déjà obtenus
+MAX_STEPS = int(os.getenv("KIMRAU_MAX_STEPS", "12"))
+TURN_DEADLINE = float(os.getenv("KIMRAU_TURN_DEADLINE", "60"))
+# Tentatives d'un tour après une erreur : les écritures étant idempotentes, un tour peut être relancé vite
+TENTATIVES = int(os.getenv("KIMRAU_TURN_ATTEMPTS", "3"))
+DELAI_TENTATIVE = float(os.getenv("KIMRAU_RETRY_DELAY", "0.25"))
+# Moteur de la boucle d'agent : "langgraph" (défaut) ou "lean" (voir lean_agent.py)
+ENGINE = os.getenv("KIMRAU_ENGINE", "langgraph")
+
+
+def mistral(nom, timeout):
+    if nom not in mistral_breakers:
+        mistral_breakers[nom] = CircuitBreaker(f"mistral:{nom}", failure_threshold=3, reset_timeout=30)
+    # Les tentatives sont gérées par api_ask_agent : peu de tentatives internes au client
+    return ResilientChatMistralAI(model=nom, temperature=0.7, max_retries=1, timeout=int(timeout))
+
+
+# LLM Configuration
+if os.getenv("KIMRAU_MODEL") == "fake":
+    # Modèle scripté pour les benchmarks sur le backend simulé (voir mock_backend.py)
+    from mock_backend import FakeHotelModel
+    model = FakeHotelModel(latency=float(os.getenv("FAKE_MODEL_LATENCY", "0")))
+    fast_model = model if MODEL_FAST else None
+else:
+    model = mistral(MODEL_STRONG, STRONG_BUDGET)
+    fast_model = mistral(MODEL_FAST, FAST_BUDGET) if MODEL_FAST else None
+
+# Définir le comportement de l'agent via une instruction système
+SYSTEM_INSTRUCTION = """
+Tu es Kimrau, le responsable temporaire de l'Hôtel California, un établissement luxueux et prestigieux.
+Tu dois accueillir les clients avec courtoisie et professionnalisme, répondre à leurs questions et les aider.
+Pour le premier message, présente-toi et souhaite la bienvenue au client à l'Hôtel California.
+Après chaque réponse à une question, demande poliment s'il y a autre chose que tu peux faire pour aider le client.
+Si le client indique qu'il n'a plus besoin d'aide (en disant par exemple "rien d'autre merci"), remercie-le et dis au revoir poliment.
+Utilise un langage formel mais chaleureux, adapté à un établissement hôtelier de luxe. Sois concis, bref et efficace, ne sors jamais à l'utilisateur du texte
+ressembla à du JSON. Lorsque tu fais une recherche via search_duckduckgo, fais un résumé d'une ligne de ce que tu as trouvé.
+Pour retrouver les réservations d'un client à partir de son nom, utilise find_guest_reservations ;
+pour changer la date, le restaurant, le repas ou le nombre de convives d'une réservation, utilise rebook_reservation.
+
+Je te donne une liste de mots clés à associer avec les méthodes de requêtes API
+'GET': ['obtenir', 'voir', 'afficher', 'consulter', 'rechercher', 'lister'],
+'POST': ['créer', 'ajouter', 'réserver', 'envoyer', 'demander', 'faire'],
+'PUT': ['modifier', 'mettre à jour', 'changer', 'éditer', 'actualiser'],
+'DELETE': ['supprimer', 'annuler', 'effacer', 'désactiver', 'retirer']
+"""
+
+# Message (caché pour l'utilisateur) qui déclenche la présentation de l'agent
+MESSAGE_ACCUEIL = "Présente-toi en tant que responsable de l'hôtel et souhaite la bienvenue au client."
+
+# Mots clés indiquant que le client souhaite terminer la conversation
+MOTS_FIN = ["rien d'autre merci", "rien d'autre", "au revoir", "merci", "rien merci", "quit", "exit"]
+
+MESSAGE_ERREUR = "Désolé, je n'ai pas pu traiter votre demande. Veuillez réessayer."
+
+# Réponse dégradée quand un service est coupé : on échoue vite plutôt que d'attendre
+MESSAGE_INDISPONIBLE = ("Je suis désolé, notre système est momentanément indisponible. "
+                        "Pourriez-vous réessayer dans quelques instants ?")
+
+# Définir le graphe (niveau le plus capable) et la cascade
+tiers = [Tier("strong", model, tools, STRONG_BUDGET, ENGINE)]
+if fast_model is not None:
+    tiers.insert(0, Tier("fast", fast_model, tools, FAST_BUDGET, ENGINE))
+graph = tiers[-1].graph
+router = ModelRouter(tiers, TURN_BUDGET, MAX_STEPS, TURN_DEADLINE)
+
+# Résumé du catalogue construit dès le démarrage (voir catalogue.resume)
+catalogue.prechauffer()
+
+
+def console_sink(message):
+    """Sink de débogage : affiche chaque message intermédiaire dans la console"""
+    message.pretty_print()
+
+
+# Affichage console des étapes intermédiaires : désactivé par défaut (KIMRAU_DEBUG=1 pour l'activer)
+DEBUG_SINK = console_sink if os.getenv("KIMRAU_DEBUG") else None
+
+
+def texte_message(message) -> str:
+    """
+    Extrait le texte destiné au client d'un message de l'assistant.
+
+    Le contenu peut être une chaîne ou une liste de blocs ; seuls les blocs de
+    texte sont conservés, les fragments d'appels d'outils sont ignorés.
+    """
+    content = message.content
+    if isinstance(content, str):
+        return content
+    morceaux = []
+    for block in content:
+        if isinstance(block, str):
+            morceaux.append(block)
+        elif block.get("type") == "text":
+            morceaux.append(block.get("text", ""))
+    return "".join(morceaux)
+
+
+class StreamProcessor:
+    """
+    Traite un flux `graph.stream(..., stream_mode="updates")`.
+
+    Chaque mise à jour ne contient que les nouveaux messages produits par un
+    nœud du graphe : le coût par étape ne dépend pas de la longueur de
+    l'historique. Seuls les messages finaux de l'assistant (sans appel
+    d'outil) sont retenus comme réponse.
+
+    Le processeur relève aussi, pour le journal des tours, les appels
+    d'outils, la durée de chaque étape et les tokens consommés.
+    """
+
+    def __init__(self, debug_sink=None):
+        self.debug_sink = debug_sink
+        self.reponse = ""
+        self.nb_etapes = 0
+        self.etapes = []
+        self.tool_calls = []
+        self.tokens = {"input": 0, "output": 0}
+        self.tier = None
+        self.escalades = []
+        self.arret = None
+        self.messages = []
+        # Erreur du tour (repr), None si le tour a réussi
+        self.erreur = None
+        self._debut_etape = time.monotonic()
+
+    def feed(self, update):
+        """Traite une mise à jour du flux ; renvoie les nouveaux messages"""
+        nouveaux = []
+        for node, data in update.items():
+            if not data:
+                continue
+            self.nb_etapes += 1
+            maintenant = time.monotonic()
+            self.etapes.append({"node": node, "latency_s": round(maintenant - self._debut_etape, 4)})
+            self._debut_etape = maintenant
+            for message in data.get("messages", []):
+                nouveaux.append(message)
+                if self.debug_sink is not None:
+                    self.debug_sink(message)
+                if isinstance(message, ToolMessage):
+                    self._resultat_outil(message)
+                if not isinstance(message, AIMessage):
+                    continue
+                usage = message.usage_metadata or {}
+                self.tokens["input"] += usage.get("input_tokens", 0)
+                self.tokens["output"] += usage.get("output_tokens", 0)
+                for call in message.tool_calls:
+                    self.tool_calls.append({"id": call["id"], "name": call["name"], "args": call["args"]})
+                if not message.tool_calls and not message.invalid_tool_calls:
+                    texte = texte_message(message).strip()
+                    if texte:
+                        self.reponse = texte
+        return nouveaux
+
+    def annuler(self, message):
+        """Marque les appels d'outils d'un message abandonné lors d'une escalade"""
+        for call in self.tool_calls:
+            if any(call["id"] == c["id"] for c in getattr(message, "tool_calls", [])):
+                call["status"] = "escalated"
+
+    def _resultat_outil(self, message):
+        for call in self.tool_calls:
+            if call["id"] == message.tool_call_id:
+                call["status"] = message.status
+                call["latency_s"] = self.etapes[-1]["latency_s"]
+
+    def process(self, stream) -> str:
+        for update in stream:
+            self.feed(update)
+        return self.reponse
+
+
+def print_stream(stream, debug_sink=None):
+    """Renvoie la réponse finale d'un flux en mode "updates" """
+    return StreamProcessor(debug_sink or DEBUG_SINK).process(stream)
+
+
+def avec_catalogue(messages):
+    """
+    Ajoute le résumé du catalogue à l'instruction système du tour.
+
+    Le résumé n'est jamais stocké dans l'historique des sessions : chaque tour
+    reçoit la version à jour. Les messages sont des tuples (role, contenu) ou
+    des BaseMessage (conversations persistées).
+    """
+    resume = catalogue.resume()
+    if not resume:
+        return messages
+    for i, message in enumerate(messages):
+        if isinstance(message, SystemMessage):
+            messages[i] = SystemMessage(f"{message.content}\n\n{resume}")
+            return messages
+        if isinstance(message, tuple) and message[0] == "system":
+            messages[i] = ("system", f"{message[1]}\n\n{resume}")
+            return messages
+    messages.insert(0, ("system", resume))
+    return messages
+
+
+def api_ask_agent(user_message: str, conversation_history=None, system_instruction=None, session_id=None):
+    """
+    Interroge l'agent avec l'historique de conversation pour maintenir le contexte
+
+    Args:
+        user_message: Le message de l'utilisateur
+        conversation_history: Liste de tuples (role, contenu) représentant l'historique
+        system_instruction: Instruction système optionnelle pour guider le comportement de l'agent
+        session_id: Identifiant de la session, reporté dans le journal des tours
+
+    Returns:
+        La réponse de l'agent, MESSAGE_INDISPONIBLE si Mistral est coupé,
+        ou MESSAGE_ERREUR si toutes les tentatives échouent
+    """
+    messages = preparer_messages(user_message, conversation_history, system_instruction)
+    reponse, _ = executer_tour(messages, user_message, session_id)
+    return reponse
+
+
+def preparer_messages(user_message, conversation_history=None, system_instruction=None):
+    """
+    Messages d'un tour : historique, instruction système, message de l'utilisateur et catalogue.
+
+    Returns:
+        La liste des messages à passer à executer_tour
+    """
+    # Si pas d'historique fourni, initialiser avec une liste vide
+    if conversation_history is None:
+        conversation_history = []
+
+    # Préparation des messages avec l'historique complet
+    messages = conversation_history.copy()
+
+    # Ajouter l'instruction système si elle est fournie
+    if system_instruction:
+        if not any(role == "system" for role, _ in messages):
+            messages.insert(0, ("system", system_instruction))
+
+    # Ajouter le message de l'utilisateur
+    messages.append(("user", user_message))
+    avec_catalogue(messages)
+    return messages
+
+
+def executer_tour(messages, user_message, session_id=None, idempotency_key=None):
+    """
+    Exécute un tour (lectures anticipées, tentatives, journal des tours).
+
+    Les écritures vers l'API sont idempotentes d'une tentative à l'autre
+    (voir idempotence.py) : une tentative relancée ne crée rien en double.
+    TURN_DEADLINE borne le tour entier : les tentatives partagent la même
+    échéance et aucune n'est relancée une fois celle-ci passée.
+
+    Args:
+        idempotency_key: Clé fournie par le client pour ce tour (None : clé aléatoire)
+
+    Returns:
+        Un tuple (réponse, processeur) ; `processeur.messages` contient
+        l'historique du tour complété par les messages produits par l'agent
+    """
+    debut = time.time()
+    tentatives = 0
+    reponse = MESSAGE_ERREUR
+    erreur = None
+    echeance = time.monotonic() + TURN_DEADLINE
+    operation = f"{session_id}:{idempotency_key}" if idempotency_key else None
+    # Lectures anticipées lancées pendant le premier appel au LLM (voir prefetch.py)
+    with prefetch.tour(user_message), idempotence.operation(operation):
+        while tentatives < TENTATIVES:
+            tentatives += 1
+            processor = StreamProcessor(DEBUG_SINK)
+            try:
+                with idempotence.tentative():
+                    reponse = router.executer(messages, processor, user_message, echeance)
+                erreur = None
+                break
+            except ServiceIndisponible as e:
+                reponse, erreur = MESSAGE_INDISPONIBLE, repr(e)
+                break
+            except Exception as e:
+                # Ne pas afficher les messages d'erreur de tentative
+                erreur = repr(e)
+                if time.monotonic() + DELAI_TENTATIVE >= echeance:
+                    break
+                time.sleep(DELAI_TENTATIVE)
+
+    turn_log.log({
+        "session_id": session_id,
+        "started_at": debut,
+        "ended_at": time.time(),
+        "latency_s": round(time.time() - debut, 4),
+        "attempts": tentatives,
+        "user_message": user_message,
+        "response": reponse,
+        "error": erreur,
+        "steps": processor.etapes,
+        "tool_calls": processor.tool_calls,
+        "tokens": processor.tokens,
+        "tier": processor.tier,
+        "escalations": processor.escalades,
+        "early_termination": processor.arret,
+        "history_length": len(messages),
+    })
+    processor.erreur = erreur
+    return reponse, processor
+
+
+def nouvelle_conversation(system_instruction=SYSTEM_INSTRUCTION, session_id=None):
+    """
+    Démarre une conversation : l'agent génère son message d'accueil.
+
+    Returns:
+        Un tuple (message d'accueil, historique initial)
+    """
+    greeting_response = api_ask_agent(MESSAGE_ACCUEIL, [], system_instruction, session_id=session_id)
+
+    conversation_history = [
+        # Message système et demande de présentation (cachés pour l'utilisateur)
+        ("system", system_instruction),
+        ("user", MESSAGE_ACCUEIL),
+        # Réponse de bienvenue
+        ("assistant", greeting_response),
+    ]
+    return greeting_response, conversation_history
+
+
+def demarrer_thread(thread_id, system_instruction=SYSTEM_INSTRUCTION):
+    """
+    Démarre une conversation persistée (voir conversations.py) par le message d'accueil.
+
+    Returns:
+        Le message d'accueil
+    """
+    greeting_response = api_ask_agent(MESSAGE_ACCUEIL, [], system_instruction, session_id=thread_id)
+    conversations.store.ajouter(thread_id, [
+        SystemMessage(system_instruction),
+        HumanMessage(MESSAGE_ACCUEIL),
+        AIMessage(greeting_response),
+    ])
+    return greeting_response
+
+
+def ask_thread(thread_id, user_message: str, idempotency_key=None):
+    """
+    Tour d'une conversation persistée : seul le nouveau message est ajouté à
+    l'état stocké, avec les appels d'outils et la réponse de ce tour.
+
+    Une requête renvoyée avec la même clé d'idempotence reçoit la réponse
+    enregistrée du tour réussi, sans relancer l'agent ni modifier la conversation.
+
+    Args:
+        idempotency_key: Clé du client pour ce tour
+
+    Returns:
+        La réponse de l'agent
+    """
+    cle_tour = f"{thread_id}:{idempotency_key}" if idempotency_key else None
+    if cle_tour is not None:
+        deja = idempotence.ledger.lire_tour(cle_tour)
+        if deja is not None:
+            metrics.incr("idempotency.turn_replays")
+            return deja
+
+    historique = conversations.store.charger(thread_id)
+    messages = historique + [HumanMessage(user_message)]
+    avec_catalogue(messages)
+
+    reponse, processor = executer_tour(messages, user_message, session_id=thread_id, idempotency_key=idempotency_key)
+
+    # Messages produits pendant le tour (appels d'outils, résultats, réponse finale)
+    nouveaux = processor.messages[len(messages):]
+    dernier = nouveaux[-1] if nouveaux else None
+    if not (isinstance(dernier, AIMessage) and not dernier.tool_calls):
+        # Réponse partielle, dégradée ou erreur : on garde le texte renvoyé au client
+        nouveaux.append(AIMessage(reponse))
+    conversations.store.ajouter(thread_id, [HumanMessage(user_message)] + nouveaux)
+    if cle_tour is not None and processor.erreur is None:
+        idempotence.ledger.enregistrer_tour(cle_tour, reponse)
+    return reponse
@@ -1,91 +1,132 @@
-from flask import Flask, request, jsonify
-from base import api_ask_agent
+import functools
+import hmac
+import os
+
+from flask import Flask, request, jsonify, abort
+from agent_core import ask_thread, demarrer_thread
 from flask_cors import CORS
+import conversations
+import metrics
+import profiling
+import resilience
+from admission import AdmissionController, Surcharge, PRIORITE_EN_COURS, PRIORITE_NOUVELLE
 
 app = Flask(__name__)
 CORS(app)
 
-# Initialiser l'historique de conversation
-conversation_history = []
-
-# Définir le comportement de l'agent via une instruction système
-system_instruction = """
-Tu es Kimrau, le responsable temporaire de l'Hôtel California, un établissement luxueux et prestigieux.
-Tu dois accueillir les clients avec courtoisie et professionnalisme, répondre à leurs questions et les aider.
-Pour le premier message, présente-toi et souhaite la bienvenue au client à l'Hôtel California.
-Après chaque réponse à une question, demande poliment s'il y a autre chose que tu peux faire pour aider le client.
-Si le client indique qu'il n'a plus besoin d'aide (en disant par exemple "rien d'autre merci"), remercie-le et dis au revoir poliment.
-Utilise un langage formel mais chaleureux, adapté à un établissement hôtelier de luxe. Sois concis, bref et efficace, ne sors jamais à l'utilisateur du texte 
-ressembla à du JSON. Lorsque tu fais une recherche via search_duckduckgo, fais un résumé d'une ligne de ce que tu as trouvé. 
+# Session utilisée par le frontend, qui n'envoie pas d'identifiant
+SESSION_PAR_DEFAUT = "default"
 
-Je te donne une liste de mots clés à associer avec les méthodes de requêtes API 
-'GET': ['obtenir', 'voir', 'afficher', 'consulter', 'rechercher', 'lister'],
-'POST': ['créer', 'ajouter', 'réserver', 'envoyer', 'demander', 'faire'],
-'PUT': ['modifier', 'mettre à jour', 'changer', 'éditer', 'actualiser'],
-'DELETE': ['supprimer', 'annuler', 'effacer', 'désactiver', 'retirer']
-"""
+# Nombre de tours d'agent simultanés, taille et attente maximale de la file
+admission = AdmissionController(
+    max_concurrent=int(os.getenv("KIMRAU_MAX_TURNS", "8")),
+    max_queue=int(os.getenv("KIMRAU_MAX_QUEUE", "32")),
+    max_wait=float(os.getenv("KIMRAU_MAX_WAIT", "20")),
+)
 
-# Demander à l'agent de générer le message d'accueil
-greeting_response = api_ask_agent("Présente-toi en tant que responsable de l'hôtel et souhaite la bienvenue au client.",
-                                  [], system_instruction)
+MESSAGE_SURCHARGE = "Kimrau est très sollicité en ce moment, merci de réessayer dans quelques instants."
 
-# Afficher uniquement la réponse de l'agent
-# print(f"\nKimrau: {greeting_response}\n")
 
-# Ajouter le message système à l'historique (caché pour l'utilisateur)
-conversation_history.append(("system", system_instruction))
+def jeton_profilage(route):
+    """Routes de profilage : absentes sans KIMRAU_PROFILING_TOKEN, sinon réservées au porteur du jeton"""
+    @functools.wraps(route)
+    def wrapper(*args, **kwargs):
+        if not profiling.PROFILING_TOKEN:
+            abort(404)
+        jeton = request.headers.get("Authorization", "").removeprefix("Bearer ").strip()
+        if not hmac.compare_digest(jeton.encode(), profiling.PROFILING_TOKEN.encode()):
+            return jsonify({"error": "Jeton de profilage invalide"}), 401
+        return route(*args, **kwargs)
+    return wrapper
 
-# Ajouter le message de demande de présentation (caché pour l'utilisateur)
-conversation_history.append(
-    ("user", "Présente-toi en tant que responsable de l'hôtel et souhaite la bienvenue au client."))
 
-# Ajouter la réponse de bienvenue à l'historique
-conversation_history.append(("assistant", greeting_response))
+def demarrer_conversation(session_id):
+    """Une nouvelle session commence par le message d'accueil"""
+    if not conversations.store.existe(session_id):
+        demarrer_thread(session_id)
 
 @app.route('/chat', methods=['POST'])
 def chat():
-    global conversation_history  # On utilise la variable globale
     data = request.get_json()
     user_message = data.get("message")
-    response = api_ask_agent(user_message, conversation_history)
-
-    # Ajouter la demande de l'utilisateur à l'historique
-    conversation_history.append(("user", user_message))
-
-    # Ajouter la réponse de l'agent à l'historique
-    conversation_history.append(("assistant", response))
-
-    print(conversation_history)
+    session_id = data.get("session_id", SESSION_PAR_DEFAUT)
+
+    # Les conversations en cours passent avant les nouvelles sessions
+    priorite = PRIORITE_EN_COURS if conversations.store.existe(session_id) else PRIORITE_NOUVELLE
+    try:
+        with admission.admit(priorite), profiling.profilage.requete(session_id):
+            demarrer_conversation(session_id)
+            # Seuls les messages du tour sont ajoutés à la conversation persistée :
+            # le tour suivant peut être servi par un autre worker, ou après un redémarrage
+            response = ask_thread(session_id, user_message, request.headers.get("Idempotency-Key"))
+    except Surcharge as e:
+        return jsonify({"response": MESSAGE_SURCHARGE, "error": str(e)}), 503, {"Retry-After": str(e.retry_after)}
 
     return jsonify({"response": response})
 
 @app.route('/restart', methods=['POST'])
 def restart():
-    global conversation_history  # On utilise la variable globale
-    # Initialiser l'historique de conversation
-    conversation_history = []
-
-    # Demander à l'agent de générer le message d'accueil
-    greeting_response = api_ask_agent(
-        "Présente-toi en tant que responsable de l'hôtel et souhaite la bienvenue au client.",
-        [], system_instruction)
-
-    # Afficher uniquement la réponse de l'agent
-    # print(f"\nKimrau: {greeting_response}\n")
-
-    # Ajouter le message système à l'historique (caché pour l'utilisateur)
-    conversation_history.append(("system", system_instruction))
-
-    # Ajouter le message de demande de présentation (caché pour l'utilisateur)
-    conversation_history.append(
-        ("user", "Présente-toi en tant que responsable de l'hôtel et souhaite la bienvenue au client."))
-
-    # Ajouter la réponse de bienvenue à l'historique
-    conversation_history.append(("assistant", greeting_response))
-
-    print(conversation_history)
+    data = request.get_json(silent=True) or {}
+    session_id = data.get("session_id", SESSION_PAR_DEFAUT)
+    # Réinitialiser l'historique avec un nouveau message d'accueil : le tour
+    # d'accueil est admis comme celui d'une nouvelle session
+    try:
+        with admission.admit(PRIORITE_NOUVELLE):
+            conversations.store.supprimer(session_id)
+            demarrer_conversation(session_id)
+    except Surcharge as e:
+        return jsonify({"response": MESSAGE_SURCHARGE, "error": str(e)}), 503, {"Retry-After": str(e.retry_after)}
 
     return jsonify({"response": "ok"})
 
+@app.route('/status', methods=['GET'])
+def status():
+    # État des coupe-circuits et limiteurs de débit (API hôtel, Mistral)
+    return jsonify(resilience.etat())
+
+@app.route('/metrics', methods=['GET'])
+def metrics_route():
+    # File d'admission, temps d'attente et autres métriques du processus
+    return jsonify(metrics.snapshot())
+
+@app.route('/profiling', methods=['GET', 'POST'])
+@jeton_profilage
+def profiling_route():
+    # POST {"mode": "cprofile" | "tracemalloc", "requests": N} : profile les N prochaines requêtes /chat
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or {}
+        try:
+            profiling.profilage.armer(data.get("mode", "cprofile"), data.get("requests", 1))
+        except (TypeError, ValueError) as e:
+            return jsonify({"error": str(e)}), 400
+    return jsonify(profiling.profilage.etat())
+
+@app.route('/profiling/<int:id_capture>', methods=['GET'])
+@jeton_profilage
+def profiling_capture(id_capture):
+    # ?format=prof : statistiques cProfile brutes (pstats, snakeviz) ; texte par défaut
+    capture = profiling.profilage.capture(id_capture)
+    if capture is None:
+        return jsonify({"error": "Capture introuvable"}), 404
+    contenu, mimetype, nom = profiling.rapport(capture, request.args.get("format", "text"))
+    return contenu, 200, {"Content-Type": mimetype, "Content-Disposition": f'attachment; filename="{nom}"'}
+
+@app.route('/profiling/sampling', methods=['GET', 'POST'])
+@jeton_profilage
+def profiling_sampling():
+    # POST {"enabled": true | false, "reset": true} ; GET ?format=collapsed : piles échantillonnées
+    echantillonneur = profiling.echantillonneur
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or {}
+        if data.get("reset"):
+            echantillonneur.reinitialiser()
+        if data.get("enabled") is True:
+            echantillonneur.demarrer()
+        elif data.get("enabled") is False:
+            echantillonneur.arreter()
+    elif request.args.get("format") == "collapsed":
+        return echantillonneur.collapsed(), 200, {"Content-Type": "text/plain; charset=utf-8"}
+    return jsonify(echantillonneur.etat())
+
 if __name__ == '__main__':
-    app.run(host='127.0.0.1', port=52001, debug=True)
\ No newline at end of file
+    app.run(host='127.0.0.1', port=52001, debug=True)
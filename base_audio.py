@@ -1,6 +1,8 @@
+"""
+Mode vocal de l'agent Kimrau (adaptateur au-dessus de agent_core).
+"""
 import os
 import time
-import sys
 import tempfile
 import threading
 import wave
@@ -8,19 +10,13 @@ import pyaudio
 import speech_recognition as sr
 from gtts import gTTS
 import pygame
-import requests
 from dotenv import load_dotenv
-from langchain_core.messages import HumanMessage, AIMessage
-from langchain_mistralai import ChatMistralAI
-from langchain_core.tools import tool
-from langgraph.prebuilt import create_react_agent
+
+from agent_core import api_ask_agent, nouvelle_conversation, MOTS_FIN, SYSTEM_INSTRUCTION
 
 # Charger les variables depuis .env
 load_dotenv(override=True)
 
-# Récupérer les clés API
-mistral_api_key = os.getenv("MISTRAL_API_KEY")
-hotel_api_token = os.getenv("HOTEL_API_TOKEN")
 # Vous aurez peut-être besoin d'une clé API pour Whisper si vous utilisez l'API OpenAI
 openai_api_key = os.getenv("OPENAI_API_KEY")
 
@@ -31,76 +27,9 @@ CHANNELS = 1
 RATE = 44100
 RECORD_SECONDS = 5  # Durée d'enregistrement par défaut
 
-# LLM Configuration
-model = ChatMistralAI(
-    model="mistral-small-latest",
-    api_key=mistral_api_key,  # Assurez-vous que la clé API est passée correctement
-    temperature=0.7,
-    max_retries=5
-)
-
 # Initialiser le recognizer pour la reconnaissance vocale
 recognizer = sr.Recognizer()
 
-def print_stream(stream):
-    reponse = ""
-    for s in stream:
-        message = s.get("messages", [])[-1] if s.get("messages") else None
-        if isinstance(message, (HumanMessage, AIMessage)):
-            reponse = message.content
-    return reponse
-
-def api_ask_agent(user_message: str, conversation_history=None, system_instruction=None):
-    """
-    Interroge l'agent avec l'historique de conversation pour maintenir le contexte
-    """
-    # Si pas d'historique fourni, initialiser avec une liste vide
-    if conversation_history is None:
-        conversation_history = []
-    
-    # Préparation des messages avec l'historique complet
-    messages = conversation_history.copy()
-    
-    # Ajouter l'instruction système si elle est fournie
-    if system_instruction:
-        if not any(role == "system" for role, _ in messages):
-            messages.insert(0, ("system", system_instruction))
-    
-    # Ajouter le message de l'utilisateur
-    messages.append(("user", user_message))
-    
-    inputs = {"messages": messages}
-    reponse = ""
-    reussi = False
-    iteration = 0
-    max_iteration = 5
-
-    
-    while (not reussi and iteration < max_iteration):
-        try:
-            # Approche directe si le streaming ne fonctionne pas
-            if iteration > 2:
-                # Essayer une approche sans streaming après quelques échecs
-                output = graph(inputs)
-                last_message = output.get("messages", [])[-1] if output.get("messages") else None
-                if isinstance(last_message, (HumanMessage, AIMessage)):
-                    reponse = last_message.content
-                reussi = True
-            else:
-                # Essayer avec streaming d'abord
-                stream_result = graph.stream(inputs, stream_mode="values")
-                reponse = print_stream(stream_result)
-                reussi = True
-        except Exception as e:
-            print(f"Erreur (tentative {iteration+1}): {str(e)}")
-            iteration += 1
-            time.sleep(1)
-    
-    if not reussi:
-        return "Désolé, je n'ai pas pu traiter votre demande. Veuillez réessayer."
-    
-    return reponse
-
 # Fonctions pour l'enregistrement audio
 def record_audio(output_file, duration=None):
     """Enregistre l'audio du microphone et sauvegarde dans un fichier"""
@@ -204,46 +133,13 @@ def play_audio(audio_file):
         print(f"Erreur lors de la lecture audio: {e}")
         print("Échec de la lecture audio, vérifiez votre configuration pygame")
 
-# Définition des outils comme dans votre code original
-@tool
-def get_restaurants():
-    """Get All Restaurants"""
-    name: str = "api_restaurants"
-    description: str = "Get All Restaurants"
-    api_url = "https://app-584240518682.europe-west9.run.app/api/restaurants/"
-    headers = {
-        "Authorization": f"Token {hotel_api_token}"
-    }
-    response = requests.get(api_url, headers=headers)
-    if response.status_code == 200:
-        return response.json()
-    else:
-        return None
-
-# Créer l'agent
-tools = [get_restaurants]  # Ajoutez les autres outils comme dans votre code original
-graph = create_react_agent(model, tools=tools)
-
 def run_interactive_voice_agent():
     """Fonction pour exécuter l'agent en mode interactif avec communication vocale"""
-    # Initialiser l'historique de conversation
-    conversation_history = []
-    
-    # Définir le comportement de l'agent via une instruction système
-    system_instruction = """
-    Tu es Kimrau, le responsable temporaire de l'Hôtel California, un établissement luxueux et prestigieux.
-    Tu dois accueillir les clients avec courtoisie et professionnalisme, répondre à leurs questions et les aider.
-    Pour le premier message, présente-toi et souhaite la bienvenue au client à l'Hôtel California.
-    Après chaque réponse à une question, demande poliment s'il y a autre chose que tu peux faire pour aider le client.
-    Si le client indique qu'il n'a plus besoin d'aide (en disant par exemple "rien d'autre merci"), remercie-le et dis au revoir poliment.
-    Utilise un langage formel mais chaleureux, adapté à un établissement hôtelier de luxe.
-    """
-    
     print("Initialisation de l'agent vocal Kimrau...")
     
     try:
         # Demander à l'agent de générer le message d'accueil
-        greeting_response = api_ask_agent("Présente-toi en tant que responsable de l'hôtel et souhaite la bienvenue au client.", [], system_instruction)
+        greeting_response, conversation_history = nouvelle_conversation()
         
         # Afficher la réponse textuelle de l'agent
         print(f"\nKimrau: {greeting_response}\n")
@@ -264,17 +160,9 @@ def run_interactive_voice_agent():
         except Exception as e:
             print(f"Erreur lors du traitement audio: {e}")
         
-        # Ajouter le message système à l'historique
-        conversation_history.append(("system", system_instruction))
-        
-        # Ajouter le message de demande de présentation
-        conversation_history.append(("user", "Présente-toi en tant que responsable de l'hôtel et souhaite la bienvenue au client."))
-        
-        # Ajouter la réponse de bienvenue à l'historique
-        conversation_history.append(("assistant", greeting_response))
-        
     except Exception as e:
         print(f"Erreur lors de l'initialisation: {e}")
+        conversation_history = [("system", SYSTEM_INSTRUCTION)]
         greeting_response = "Bonjour et bienvenue à l'Hôtel California. Je suis Kimrau, le responsable temporaire. Comment puis-je vous aider aujourd'hui?"
         print(f"\nKimrau (message par défaut): {greeting_response}\n")
     
@@ -347,7 +235,7 @@ def run_interactive_voice_agent():
             continue
         
         # Vérifier si l'utilisateur souhaite terminer la conversation
-        if user_input.lower() in ["rien d'autre merci", "rien d'autre", "au revoir", "merci", "rien merci", "quit", "exit"]:
+        if user_input.lower() in MOTS_FIN:
             try:
                 farewell_response = api_ask_agent(user_input, conversation_history)
             except:
@@ -0,0 +1,119 @@
+"""
+Exécution en lot de conversations scriptées (régressions nocturnes, comparaison
+de prompts ou d'outils).
+
+Entrée JSONL, une conversation par ligne :
+    {"id": "resa-belvedere", "turns": ["Bonjour", "Je voudrais réserver au Belvedere vendredi soir"]}
+
+Sortie JSONL, une ligne par tour :
+    {"conversation_id": ..., "turn": 0, "user_message": ..., "response": ..., "latency_s": ..., "error": false}
+
+    python batch.py conversations.jsonl resultats.jsonl --workers 4
+
+Les conversations tournent en parallèle dans un pool de threads ; les appels
+à Mistral et à l'API de l'hôtel restent soumis aux limiteurs de débit
+partagés (resilience.py). Relancer la même commande reprend un lot
+interrompu : les tours déjà réussis dans la sortie ne sont pas rejoués et
+l'historique des conversations inachevées est reconstruit depuis la sortie.
+Un tour en échec (MESSAGE_ERREUR, MESSAGE_INDISPONIBLE) est écrit avec
+"error": true, arrête sa conversation et sera rejoué à la reprise.
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from agent_core import SYSTEM_INSTRUCTION, executer_tour, nouvelle_conversation, preparer_messages
+
+
+def lire_jsonl(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(ligne) for ligne in f if ligne.strip()]
+
+
+def tours_deja_faits(path):
+    """Tours réussis dans une sortie existante : {conversation_id: {numéro de tour: ligne}}"""
+    faits = {}
+    if os.path.exists(path):
+        for ligne in lire_jsonl(path):
+            if ligne.get("error"):
+                continue
+            faits.setdefault(ligne["conversation_id"], {})[ligne["turn"]] = ligne
+    return faits
+
+
+class BatchRunner:
+    def __init__(self, output, workers=4, greeting=False):
+        self.output = output
+        self.workers = workers
+        self.greeting = greeting
+        self._lock = threading.Lock()
+
+    def _ecrire(self, ligne):
+        with self._lock, open(self.output, "a", encoding="utf-8") as f:
+            f.write(json.dumps(ligne, ensure_ascii=False) + "\n")
+
+    def executer_conversation(self, conversation, faits):
+        conversation_id = conversation["id"]
+        system_instruction = conversation.get("system_instruction", SYSTEM_INSTRUCTION)
+        if self.greeting:
+            _, history = nouvelle_conversation(system_instruction, session_id=f"batch:{conversation_id}")
+        else:
+            history = [("system", system_instruction)]
+
+        for numero, user_message in enumerate(conversation["turns"]):
+            deja = faits.get(numero)
+            if deja is not None:
+                # Reprise : l'historique est reconstruit depuis la sortie existante
+                response = deja["response"]
+            else:
+                debut = time.monotonic()
+                messages = preparer_messages(user_message, history)
+                response, processor = executer_tour(messages, user_message, session_id=f"batch:{conversation_id}")
+                self._ecrire({
+                    "conversation_id": conversation_id,
+                    "turn": numero,
+                    "user_message": user_message,
+                    "response": response,
+                    "latency_s": round(time.monotonic() - debut, 4),
+                    "error": processor.erreur is not None,
+                })
+                if processor.erreur is not None:
+                    # La suite de la conversation dépend de ce tour : elle sera reprise au prochain lancement
+                    raise RuntimeError(f"tour {numero} en échec : {processor.erreur}")
+            history.append(("user", user_message))
+            history.append(("assistant", response))
+        return conversation_id
+
+    def executer(self, conversations):
+        """
+        Returns:
+            Le nombre de conversations exécutées (hors conversations déjà terminées)
+        """
+        faits = tours_deja_faits(self.output)
+        a_faire = [c for c in conversations if len(faits.get(c["id"], {})) < len(c["turns"])]
+        print(f"{len(conversations) - len(a_faire)} conversations déjà faites, {len(a_faire)} à exécuter")
+
+        debut = time.monotonic()
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = [pool.submit(self.executer_conversation, c, faits.get(c["id"], {})) for c in a_faire]
+            for i, future in enumerate(as_completed(futures), 1):
+                try:
+                    print(f"[{i}/{len(a_faire)}] {future.result()} terminée")
+                except Exception as e:
+                    print(f"[{i}/{len(a_faire)}] échec : {e!r}")
+        print(f"Lot terminé en {time.monotonic() - debut:.1f} s")
+        return len(a_faire)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="Conversations scriptées (JSONL)")
+    parser.add_argument("output", help="Réponses et durées par tour (JSONL, reprise automatique)")
+    parser.add_argument("--workers", type=int, default=4, help="Conversations exécutées en parallèle")
+    parser.add_argument("--greeting", action="store_true",
+                        help="Commencer chaque conversation par le message d'accueil de l'agent")
+    args = parser.parse_args()
+    BatchRunner(args.output, args.workers, args.greeting).executer(lire_jsonl(args.input))
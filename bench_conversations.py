@@ -0,0 +1,115 @@
+"""
+Benchmark mémoire des conversations gardées en mémoire (conversations.py).
+
+Construit N conversations (accueil puis plusieurs tours avec appel d'outil),
+chacune relue depuis sa forme stockée comme après un chargement en base, et
+mesure avec tracemalloc les octets par conversation pour :
+
+- tuples (role, texte) relus depuis JSON (ancien historique des sessions) ;
+- messages LangChain (BaseMessage) ;
+- enregistrements compacts, sans puis avec compression des anciens messages.
+
+Affiche aussi le temps de reconstruction des messages d'une conversation.
+
+    python bench_conversations.py --sessions 10000 --turns 6
+"""
+import argparse
+import json
+import os
+import time
+import tracemalloc
+
+os.environ.setdefault("KIMRAU_MODEL", "fake")
+os.environ.setdefault("KIMRAU_TURN_LOG", "")
+os.environ.setdefault("MISTRAL_API_KEY", "bench")
+
+import mock_backend  # noqa: E402
+
+_server, _url = mock_backend.run_mock_backend(port=0)
+os.environ["HOTEL_API_URL"] = _url
+
+from langchain_core.messages import (AIMessage, HumanMessage, SystemMessage, ToolMessage,  # noqa: E402
+                                     message_to_dict, messages_from_dict)
+
+import conversations  # noqa: E402
+from agent_core import MESSAGE_ACCUEIL, SYSTEM_INSTRUCTION  # noqa: E402
+
+
+def conversation(numero, turns):
+    """Messages d'une conversation type, différents d'une session à l'autre"""
+    messages = [
+        SystemMessage(SYSTEM_INSTRUCTION),
+        HumanMessage(MESSAGE_ACCUEIL),
+        AIMessage("Bienvenue à l'Hôtel California ! Je suis Kimrau, que puis-je faire pour vous ?"),
+    ]
+    for tour in range(turns):
+        id_reservation = numero * 100 + tour
+        appel = {"name": "get_reservation_by_id_reservation", "args": {"id": id_reservation},
+                 "id": f"call_{numero}_{tour}"}
+        reservation = {"id": id_reservation, "client": numero, "date": "2026-11-20", "restaurant": 2, "meal": 3,
+                       "number_of_guests": 2, "special_requests": f"Table près de la fenêtre, anniversaire {numero}"}
+        messages += [
+            HumanMessage(f"Bonjour, pouvez-vous me donner le détail de la réservation n° {id_reservation} ?"),
+            AIMessage("", tool_calls=[appel]),
+            ToolMessage(json.dumps([reservation] * 3, ensure_ascii=False), tool_call_id=appel["id"],
+                        name=appel["name"]),
+            AIMessage(f"La réservation n° {id_reservation} est au nom du client {numero}, pour 2 personnes le "
+                      f"20 novembre au restaurant 2, avec la demande suivante : table près de la fenêtre pour "
+                      f"un anniversaire. Souhaitez-vous la modifier ?"),
+        ]
+    return messages
+
+
+def tuples(lignes):
+    """Ancien historique : (role, texte), tel que relu depuis le JSON des sessions"""
+    roles = {"system": "system", "human": "user", "ai": "assistant"}
+    messages = [json.loads(ligne) for ligne in lignes]
+    return json.loads(json.dumps([(roles[m["type"]], m["data"]["content"])
+                                  for m in messages if m["type"] in roles and m["data"]["content"]]))
+
+
+def base_messages(lignes):
+    return messages_from_dict([json.loads(ligne) for ligne in lignes])
+
+
+def compacts(lignes):
+    resultat = conversations._Conversation()
+    resultat.etendre(len(lignes) - 1, [json.loads(ligne) for ligne in lignes])
+    return resultat
+
+
+def mesurer(nom, construire, stockees, compression=None):
+    if compression is not None:
+        conversations.COMPRESSER_APRES = compression
+    tracemalloc.start()
+    avant = tracemalloc.get_traced_memory()[0]
+    sessions = {numero: construire(lignes) for numero, lignes in enumerate(stockees)}
+    octets = tracemalloc.get_traced_memory()[0] - avant
+    tracemalloc.stop()
+
+    reconstruction = ""
+    if isinstance(sessions[0], conversations._Conversation):
+        debut = time.perf_counter()
+        for numero in range(min(len(sessions), 1000)):
+            sessions[numero].messages()
+        reconstruction = f"{(time.perf_counter() - debut) / min(len(sessions), 1000) * 1e6:.0f}"
+    print(f"{nom:<28}{octets / len(stockees):>16.0f}{octets / 2 ** 20:>12.1f}{reconstruction:>20}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=10000, help="Nombre de conversations en mémoire")
+    parser.add_argument("--turns", type=int, default=6, help="Tours par conversation")
+    args = parser.parse_args()
+    fenetre = conversations.COMPRESSER_APRES or 20
+
+    # Forme stockée en base (une ligne JSON par message), comme dans conversations.py
+    stockees = [[json.dumps(message_to_dict(m), ensure_ascii=False) for m in conversation(numero, args.turns)]
+                for numero in range(args.sessions)]
+    print(f"{args.sessions} conversations, {args.turns} tours, "
+          f"{len(stockees[0])} messages, instruction système de {len(SYSTEM_INSTRUCTION)} caractères")
+    print(f"{'représentation':<28}{'octets / session':>16}{'total Mio':>12}{'reconstruction µs':>20}")
+    mesurer("tuples (role, texte)", tuples, stockees)
+    mesurer("BaseMessage", base_messages, stockees)
+    mesurer("compacts", compacts, stockees, compression=0)
+    mesurer("compacts + compression", compacts, stockees, compression=fenetre)
@@ -0,0 +1,84 @@
+"""
+Benchmark des moteurs de boucle d'agent : LangGraph (create_react_agent) et
+la boucle minimale de lean_agent.py, sur le backend simulé.
+
+Chaque tour fait trois étapes (appel du modèle factice, outil du catalogue
+servi par le cache, réponse). Le modèle et l'outil ne coûtent presque rien :
+le temps mesuré est celui du moteur. Affiche, pour plusieurs longueurs
+d'historique, le surcoût par étape et le pic de mémoire allouée par tour.
+
+    python bench_engine.py --turns 300 --history 0 50 200
+"""
+import argparse
+import os
+import time
+import tracemalloc
+
+os.environ.setdefault("KIMRAU_MODEL", "fake")
+os.environ.setdefault("KIMRAU_TURN_LOG", "")
+os.environ.setdefault("MISTRAL_API_KEY", "bench")
+
+import mock_backend  # noqa: E402
+
+_server, _url = mock_backend.run_mock_backend(port=0)
+os.environ["HOTEL_API_URL"] = _url
+
+from langgraph.prebuilt import create_react_agent  # noqa: E402
+
+from agent_core import StreamProcessor  # noqa: E402
+from hotel_tools import tools  # noqa: E402
+from lean_agent import LeanAgent  # noqa: E402
+
+MESSAGE = "Quels restaurants proposez-vous ?"
+
+
+def historique(longueur):
+    messages = [("system", "Tu es Kimrau, le responsable de l'Hôtel California.")]
+    for i in range(longueur // 2):
+        messages += [("user", f"Question {i} sur l'hôtel"), ("assistant", f"Réponse {i} du concierge")]
+    return messages + [("user", MESSAGE)]
+
+
+def tour(graph, messages):
+    processor = StreamProcessor()
+    processor.process(graph.stream({"messages": messages}, stream_mode="updates"))
+    return processor.nb_etapes
+
+
+def bench(nom, graph, turns, longueur):
+    messages = historique(longueur)
+    for _ in range(10):
+        tour(graph, messages)
+
+    etapes = 0
+    debut = time.perf_counter()
+    for _ in range(turns):
+        etapes += tour(graph, messages)
+    duree = time.perf_counter() - debut
+
+    tracemalloc.start()
+    pics = []
+    for _ in range(min(turns, 50)):
+        tracemalloc.reset_peak()
+        avant = tracemalloc.get_traced_memory()[0]
+        tour(graph, messages)
+        pics.append(tracemalloc.get_traced_memory()[1] - avant)
+    tracemalloc.stop()
+
+    print(f"{nom:<12}{longueur:>12}{duree / etapes * 1e6:>16.0f}{turns / duree:>12.1f}"
+          f"{sorted(pics)[len(pics) // 2] / 1024:>16.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=300, help="Tours mesurés par configuration")
+    parser.add_argument("--history", type=int, nargs="+", default=[0, 50, 200],
+                        help="Longueurs d'historique (messages) à tester")
+    args = parser.parse_args()
+
+    model = mock_backend.FakeHotelModel()
+    moteurs = [("langgraph", create_react_agent(model, tools=tools)), ("lean", LeanAgent(model, tools))]
+    print(f"{'moteur':<12}{'historique':>12}{'µs / étape':>16}{'tours/s':>12}{'pic Kio/tour':>16}")
+    for longueur in args.history:
+        for nom, graph in moteurs:
+            bench(nom, graph, args.turns, longueur)
@@ -0,0 +1,83 @@
+"""
+Benchmark des relances de GET (hedging.py) sur le backend simulé.
+
+Le backend simulé répond en MOCK_LATENCY secondes, sauf une requête sur
+1 / --slow-rate qui attend --slow-latency secondes de plus (démarrage à
+froid). Des clients concurrents lisent des fiches clients, d'abord sans
+relance, puis avec ; affiche les percentiles de latence, le taux de
+relance et la part des relances qui ont répondu en premier.
+
+    python bench_hedging.py --requests 2000 --slow-rate 0.03 --slow-latency 0.5
+"""
+import argparse
+import os
+import threading
+import time
+
+os.environ.setdefault("HOTEL_API_RATE", "10000")
+os.environ.setdefault("HOTEL_API_BURST", "10000")
+os.environ.setdefault("MOCK_LATENCY", "0.01")
+
+import mock_backend  # noqa: E402
+
+_server, _url = mock_backend.run_mock_backend(port=0)
+os.environ["HOTEL_API_URL"] = _url
+
+import hotel_api  # noqa: E402
+import metrics  # noqa: E402
+from hedging import Hedger  # noqa: E402
+
+hotel_api.API_BASE_URL = _url
+
+
+def charge(requests, clients):
+    latences = []
+    lock = threading.Lock()
+
+    def client(numero):
+        for i in range(numero, requests, clients):
+            debut = time.monotonic()
+            # Identifiants distincts : pas de partage par SingleFlight entre clients
+            hotel_api.get(f"/clients/{42 if i % 2 else 1535}/", params={"n": i})
+            with lock:
+                latences.append(time.monotonic() - debut)
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latences
+
+
+def bench(nom, hedger, requests, clients):
+    hotel_api.hedger = hedger
+    metrics.reset()
+    # Préchauffage : connexions ouvertes et p90 mesuré avant la série
+    charge(200, clients)
+    metrics.reset()
+    latences = charge(requests, clients)
+    compteurs = metrics.snapshot()["counters"]
+    relances = compteurs.get("hotel_api.hedge.sent", 0)
+    gagnees = compteurs.get("hotel_api.hedge.won", 0)
+    print(f"{nom:<16}" + "".join(f"{metrics.percentile(latences, p) * 1000:>10.1f}" for p in (50, 90, 99, 99.9))
+          + f"{relances / len(latences):>12.1%}{gagnees / relances if relances else 0:>12.1%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000, help="GET mesurés par configuration")
+    parser.add_argument("--clients", type=int, default=4, help="Clients concurrents")
+    parser.add_argument("--slow-rate", type=float, default=0.03, help="Part des requêtes lentes")
+    parser.add_argument("--slow-latency", type=float, default=0.5, help="Latence supplémentaire (secondes)")
+    parser.add_argument("--budget", type=float, default=0.05, help="Part maximale de requêtes en plus")
+    args = parser.parse_args()
+
+    mock_backend.MOCK_SLOW_RATE = args.slow_rate
+    mock_backend.MOCK_SLOW_LATENCY = args.slow_latency
+    print(f"{'':<16}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'p99.9 ms':>10}{'relances':>12}{'gagnées':>12}")
+    bench("sans relance", None, args.requests, args.clients)
+    bench("avec relance", Hedger(budget=args.budget), args.requests, args.clients)
+    jauges = metrics.snapshot()["gauges"]
+    print(f"\nMétriques : hotel_api.hedge.rate={jauges.get('hotel_api.hedge.rate')} "
+          f"hotel_api.hedge.p99_gain_s={jauges.get('hotel_api.hedge.p99_gain_s')}")
@@ -0,0 +1,112 @@
+"""
+Benchmark du mode multi-processus (serve.py) sur le backend simulé.
+
+Pour chaque nombre de workers, lance serve.py avec le modèle factice
+(KIMRAU_MODEL=fake) et le backend simulé, puis mesure le débit de /chat
+sous une charge de clients concurrents.
+
+    python bench_serve.py --workers 1 2 4 --clients 32 --duration 10
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+MESSAGES = ["Quels restaurants proposez-vous ?", "Et vos spas ?", "Quels sont les menus ?", "Merci beaucoup"]
+
+
+def _port_libre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _attendre(port, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"le serveur n'écoute pas sur le port {port}")
+
+
+def _client(args):
+    """Envoie des tours de conversation en boucle ; renvoie (tours réussis, erreurs)"""
+    url, session_id, duration = args
+    fin = time.monotonic() + duration
+    ok = erreurs = 0
+    i = 0
+    while time.monotonic() < fin:
+        body = json.dumps({"message": MESSAGES[i % len(MESSAGES)], "session_id": session_id}).encode()
+        req = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json"})
+        try:
+            with urllib.request.urlopen(req, timeout=30) as response:
+                response.read()
+            ok += 1
+        except OSError:
+            erreurs += 1
+        i += 1
+    return ok, erreurs
+
+
+def bench(workers, clients, duration, backend_url):
+    port = _port_libre()
+    dossier = tempfile.mkdtemp(prefix="kimrau_bench_")
+    env = dict(os.environ, KIMRAU_MODEL="fake", HOTEL_API_URL=backend_url,
+               KIMRAU_STATE_DB=os.path.join(dossier, "state.db"),
+               KIMRAU_CONVERSATIONS_DB=os.path.join(dossier, "conversations.db"),
+               KIMRAU_LEDGER_DB=os.path.join(dossier, "ledger.db"))
+    server = subprocess.Popen([sys.executable, "serve.py", "--workers", str(workers), "--port", str(port)],
+                              env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        _attendre(port)
+        url = f"http://127.0.0.1:{port}/chat"
+        # Tour d'échauffement : imports, message d'accueil, cache catalogue
+        _client((url, "echauffement", 1))
+        with multiprocessing.Pool(clients) as pool:
+            debut = time.monotonic()
+            resultats = pool.map(_client, [(url, f"bench-{i}", duration) for i in range(clients)])
+            ecoule = time.monotonic() - debut
+    finally:
+        server.terminate()
+        server.wait()
+    ok = sum(r[0] for r in resultats)
+    erreurs = sum(r[1] for r in resultats)
+    return ok / ecoule, erreurs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1])
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10)
+    args = parser.parse_args()
+
+    backend_port = _port_libre()
+    backend = subprocess.Popen([sys.executable, "-c",
+                                f"from mock_backend import app; app.run(port={backend_port}, threaded=True)"],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        _attendre(backend_port)
+        backend_url = f"http://127.0.0.1:{backend_port}/api"
+        print(f"{os.cpu_count()} cœurs, {args.clients} clients, {args.duration:.0f} s par mesure")
+        print(f"{'workers':>8} {'tours/s':>10} {'accélération':>13} {'erreurs':>8}")
+        reference = None
+        for workers in sorted(set(args.workers)):
+            debit, erreurs = bench(workers, args.clients, args.duration, backend_url)
+            reference = reference or debit
+            print(f"{workers:>8} {debit:>10.1f} {debit / reference:>12.2f}x {erreurs:>8}")
+    finally:
+        backend.terminate()
+
+
+if __name__ == "__main__":
+    main()
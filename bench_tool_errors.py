@@ -0,0 +1,89 @@
+"""
+Benchmark des erreurs d'outils typées (tool_result.py) sur le backend simulé.
+
+Rejoue des tours qui réussissent ou échouent (identifiant inconnu, données
+invalides, création de réservation) avec le modèle factice, d'abord avec les
+outils actuels, puis avec l'ancien protocole (`None` sur tout statut non
+200, 201 traité comme un échec). Affiche le nombre moyen d'appels au LLM et
+d'appels d'outils par tour, et les réservations créées en double.
+
+    python bench_tool_errors.py --repeat 20
+"""
+import argparse
+import os
+import time
+from datetime import date, timedelta
+
+os.environ.setdefault("KIMRAU_MODEL", "fake")
+os.environ.setdefault("KIMRAU_MODEL_FAST", "")
+os.environ.setdefault("KIMRAU_TURN_LOG", "")
+os.environ.setdefault("MISTRAL_API_KEY", "bench")
+
+import mock_backend  # noqa: E402
+
+_server, _url = mock_backend.run_mock_backend(port=0)
+os.environ["HOTEL_API_URL"] = _url
+
+from langchain_core.tools import StructuredTool  # noqa: E402
+
+from agent_core import StreamProcessor  # noqa: E402
+from hotel_tools import tools  # noqa: E402
+from model_router import ModelRouter, Tier  # noqa: E402
+
+# Date valide (dans un mois) : une seule création réussie par série de tours
+DATE = (date.today() + timedelta(days=30)).isoformat()
+
+TOURS = [
+    "Bonjour, je voudrais voir le client n° 42",
+    "Pouvez-vous retrouver le client n° 9999 ?",
+    "Je cherche la réservation n° 123",
+    "Je cherche la réservation n° 9999",
+    f"Je voudrais réserver pour 2 personnes le {DATE}",
+    "Je voudrais réserver pour 2 personnes le 31/02",
+    f"Je voudrais réserver pour 0 personnes le {DATE}",
+]
+
+
+def ancien_protocole(outil):
+    """Outil qui renvoie ce que renvoyait l'ancien code : None ou une erreur sans détail exploitable"""
+    def appel(**kwargs):
+        resultat = outil.func(**kwargs)
+        if isinstance(resultat, dict) and "retryable" in resultat:
+            if outil.name.startswith("delete_") or outil.name == "put_reservation":
+                return {"error": f"Failed: {resultat['status']}"}
+            return None
+        if outil.name.startswith("post_"):
+            # L'ancien code attendait 200 : la création (201) était vue comme un échec
+            return None
+        return resultat
+    return StructuredTool.from_function(appel, name=outil.name, description=outil.description,
+                                        args_schema=outil.args_schema)
+
+
+def bench(nom, outils, repeat):
+    router = ModelRouter([Tier("strong", mock_backend.FakeHotelModel(), outils, 30)], 45, max_steps=25)
+    avant = len(mock_backend.RESERVATIONS)
+    appels_llm = appels_outils = tours = 0
+    debut = time.monotonic()
+    for _ in range(repeat):
+        for message in TOURS:
+            processor = StreamProcessor()
+            router.executer([("system", "Tu es Kimrau"), ("user", message)], processor, message)
+            appels_llm += sum(1 for etape in processor.etapes if etape["node"] == "agent")
+            appels_outils += len(processor.tool_calls)
+            tours += 1
+    duree = time.monotonic() - debut
+    creees = len(mock_backend.RESERVATIONS) - avant
+    attendues = repeat  # une seule création valide par série de tours
+    print(f"{nom:<18}{appels_llm / tours:>14.2f}{appels_outils / tours:>16.2f}"
+          f"{creees - attendues:>12}{tours / duree:>12.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20, help="Nombre de passages sur la série de tours")
+    args = parser.parse_args()
+
+    print(f"{'protocole':<18}{'LLM / tour':>14}{'outils / tour':>16}{'doublons':>12}{'tours/s':>12}")
+    bench("ancien (None)", [ancien_protocole(outil) for outil in tools], args.repeat)
+    bench("erreurs typées", tools, args.repeat)
@@ -0,0 +1,152 @@
+"""
+Index des places restantes par restaurant, date et repas.
+
+Construit à partir du flux des réservations (réplique locale si elle est
+active, sinon l'API), puis tenu à jour au fil des réservations créées,
+modifiées ou supprimées par les outils. Il est reconstruit entièrement
+toutes les REBUILD_INTERVAL secondes pour intégrer les changements faits
+hors de l'agent : la reconstruction se fait en arrière-plan (seule la
+première est attendue), et les réservations modifiées pendant qu'elle lit
+le flux sont rejouées sur le nouvel index.
+"""
+import os
+import threading
+import time
+
+import catalogue
+import hotel_api
+import replica
+
+REBUILD_INTERVAL = float(os.getenv("CAPACITY_REBUILD_INTERVAL", "300"))
+
+
+class CapacityIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rebuild_lock = threading.Lock()
+        # id réservation -> (restaurant, date, repas, convives)
+        self._reservations = {}
+        # (restaurant, date, repas) -> convives réservés
+        self._reserves = {}
+        # Modifications reçues pendant une reconstruction, None hors reconstruction
+        self._journal = None
+        self.built_at = None
+
+    def _ajouter(self, cle, convives):
+        total = self._reserves.get(cle, 0) + convives
+        if total:
+            self._reserves[cle] = total
+        else:
+            self._reserves.pop(cle, None)
+
+    def appliquer(self, reservation):
+        """Ajoute une réservation créée ou remplace une réservation modifiée"""
+        with self._lock:
+            self._appliquer(reservation)
+            if self._journal is not None:
+                self._journal.append((self._appliquer, reservation))
+
+    def _appliquer(self, reservation):
+        self._retirer(reservation["id"])
+        cle = (int(reservation["restaurant"]), str(reservation["date"]), int(reservation["meal"]))
+        convives = int(reservation.get("number_of_guests") or 0)
+        self._reservations[reservation["id"]] = (*cle, convives)
+        self._ajouter(cle, convives)
+
+    def retirer(self, id_reservation):
+        with self._lock:
+            self._retirer(id_reservation)
+            if self._journal is not None:
+                self._journal.append((self._retirer, id_reservation))
+
+    def _retirer(self, id_reservation):
+        ancienne = self._reservations.pop(id_reservation, None)
+        if ancienne is not None:
+            self._ajouter(ancienne[:3], -ancienne[3])
+
+    def reconstruire(self):
+        with self._lock:
+            self._journal = []
+        try:
+            if replica.active("reservations"):
+                reservations = replica.replica.tous("reservations")
+            else:
+                reservations = list(hotel_api.iter_pages("/reservations/"))
+        except BaseException:
+            with self._lock:
+                self._journal = None
+            raise
+        with self._lock:
+            journal, self._journal = self._journal, None
+            self._reservations.clear()
+            self._reserves.clear()
+            for reservation in reservations:
+                self._appliquer(reservation)
+            # Le flux a pu être lu avant ces modifications
+            for operation, argument in journal:
+                operation(argument)
+            self.built_at = time.monotonic()
+
+    def _reconstruire_en_fond(self):
+        try:
+            self.reconstruire()
+        except Exception as e:
+            print(f"Reconstruction de l'index des places impossible : {e!r}")
+        finally:
+            self._rebuild_lock.release()
+
+    def _a_jour(self):
+        """
+        Reconstruit l'index s'il est trop ancien (un seul thread s'en charge) :
+        la première fois en attendant, ensuite en arrière-plan.
+        """
+        if self.built_at is not None and time.monotonic() - self.built_at < REBUILD_INTERVAL:
+            return
+        if self.built_at is None:
+            with self._rebuild_lock:
+                if self.built_at is None:
+                    self.reconstruire()
+            return
+        if self._rebuild_lock.acquire(blocking=False):
+            threading.Thread(target=self._reconstruire_en_fond, name="capacity-rebuild", daemon=True).start()
+
+    def reserves(self, id_restaurant, date, id_meal) -> int:
+        self._a_jour()
+        with self._lock:
+            return self._reserves.get((int(id_restaurant), str(date), int(id_meal)), 0)
+
+    def disponibilite(self, restaurant, date, meal, number_of_guests):
+        """
+        Places restantes pour un restaurant, une date et un repas.
+
+        Returns:
+            Un dictionnaire décrivant la disponibilité, ou {"error": ...} si le
+            restaurant ou le repas est inconnu
+        """
+        resto = catalogue.trouver_restaurant(restaurant)
+        if resto is None:
+            noms = ", ".join(r["name"] for r in catalogue.restaurants())
+            return {"error": f"Restaurant inconnu : {restaurant}. Restaurants disponibles : {noms}"}
+        repas = catalogue.trouver_repas(meal)
+        if repas is None:
+            noms = ", ".join(m["name"] for m in catalogue.repas())
+            return {"error": f"Repas inconnu : {meal}. Repas disponibles : {noms}"}
+        if not resto.get("is_active", True):
+            return {"restaurant": resto["name"], "available": False, "reason": "Restaurant fermé"}
+
+        reserves = self.reserves(resto["id"], date, repas["id"])
+        restantes = max(0, resto["capacity"] - reserves)
+        return {
+            "restaurant": resto["name"],
+            "id_restaurant": resto["id"],
+            "date": date,
+            "meal": repas["name"],
+            "id_meal": repas["id"],
+            "opening_hours": resto.get("opening_hours"),
+            "capacity": resto["capacity"],
+            "remaining_seats": restantes,
+            "available": restantes >= number_of_guests,
+        }
+
+
+index = CapacityIndex()
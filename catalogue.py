@@ -0,0 +1,134 @@
+"""
+Accès au catalogue de l'hôtel (restaurants, spas, repas) depuis le cache de
+`hotel_api`, et résolution des noms donnés par le client vers les
+identifiants de l'API.
+
+`resume()` produit un résumé compact du catalogue, ajouté au contexte système
+de chaque tour : l'agent répond aux questions sur les restaurants, spas et
+repas en un seul appel au LLM, sans étape d'outil.
+"""
+import json
+import threading
+import unicodedata
+
+import hotel_api
+import metrics
+
+# Noms de repas tels que le client les formule -> nom dans l'API
+SYNONYMES_REPAS = {
+    "petit dejeuner": "breakfast",
+    "petit-dejeuner": "breakfast",
+    "matin": "breakfast",
+    "dejeuner": "lunch",
+    "midi": "lunch",
+    "diner": "dinner",
+    "soir": "dinner",
+    "souper": "dinner",
+}
+
+
+def _resultats(data):
+    if data is None:
+        return []
+    return data.get("results", []) if isinstance(data, dict) else data
+
+
+def restaurants():
+    return _resultats(hotel_api.get_cached("/restaurants/"))
+
+
+def spas():
+    return _resultats(hotel_api.get_cached("/spas/"))
+
+
+def repas():
+    return _resultats(hotel_api.get_cached("/meals/"))
+
+
+def normaliser(texte) -> str:
+    """Minuscules, sans accents ni espaces superflus"""
+    texte = unicodedata.normalize("NFKD", str(texte))
+    texte = "".join(c for c in texte if not unicodedata.combining(c))
+    return " ".join(texte.lower().split())
+
+
+def _trouver(elements, valeur, synonymes=None):
+    """Élément dont l'id ou le nom correspond à `valeur` (nom exact, puis partiel)"""
+    if valeur is None:
+        return None
+    cle = normaliser(valeur)
+    if cle.isdigit():
+        return next((e for e in elements if e["id"] == int(cle)), None)
+    cle = (synonymes or {}).get(cle, cle)
+    exact = [e for e in elements if normaliser(e["name"]) == cle]
+    if exact:
+        return exact[0]
+    partiels = [e for e in elements if cle in normaliser(e["name"]) or normaliser(e["name"]) in cle]
+    return partiels[0] if len(partiels) == 1 else None
+
+
+def trouver_restaurant(nom_ou_id):
+    """Restaurant désigné par son identifiant ou son nom ("belvedere", "Le Belvédère"...), sinon None"""
+    return _trouver(restaurants(), nom_ou_id)
+
+
+def trouver_repas(nom_ou_id):
+    """Repas désigné par son identifiant ou son nom, en anglais ou en français ("dîner"), sinon None"""
+    return _trouver(repas(), nom_ou_id, SYNONYMES_REPAS)
+
+
+# Dernier résumé construit et empreinte du catalogue dont il est issu
+_resume = {"empreinte": None, "texte": ""}
+_resume_lock = threading.Lock()
+
+
+def _ligne_restaurant(r):
+    etat = "" if r.get("is_active", True) else " [fermé]"
+    return (f"- {r['name']} (id {r['id']}){etat} : {r.get('description', '')} ; "
+            f"{r.get('opening_hours', '')} ; {r.get('location', '')} ; {r.get('capacity', '?')} couverts")
+
+
+def _ligne_spa(s):
+    return (f"- {s['name']} (id {s['id']}) : {s.get('description', '')} ; {s.get('opening_hours', '')} ; "
+            f"{s.get('location', '')} ; {s.get('phone_number', '')} ; {s.get('email', '')}")
+
+
+def _construire(restos, liste_spas, liste_repas):
+    lignes = ["Catalogue de l'hôtel (à jour : réponds directement aux questions sur les restaurants, "
+              "spas et repas, sans appeler get_restaurants, get_spas ni get_meals)."]
+    if restos:
+        lignes += ["Restaurants :"] + [_ligne_restaurant(r) for r in restos]
+    if liste_spas:
+        lignes += ["Spas :"] + [_ligne_spa(s) for s in liste_spas]
+    if liste_repas:
+        lignes.append("Repas : " + ", ".join(f"{m['name']} (id {m['id']})" for m in liste_repas))
+    return "\n".join(lignes)
+
+
+def resume() -> str:
+    """
+    Résumé compact du catalogue, reconstruit seulement quand le catalogue change.
+
+    Returns:
+        Le texte du résumé ; le dernier résumé connu si l'API est injoignable,
+        ou "" si aucun catalogue n'a encore pu être lu
+    """
+    try:
+        donnees = (restaurants(), spas(), repas())
+    except Exception as e:
+        print(f"Lecture du catalogue impossible : {e!r}")
+        return _resume["texte"]
+    if not any(donnees):
+        return _resume["texte"]
+    empreinte = hash(json.dumps(donnees, sort_keys=True))
+    with _resume_lock:
+        if empreinte != _resume["empreinte"]:
+            _resume["texte"] = _construire(*donnees)
+            _resume["empreinte"] = empreinte
+            metrics.incr("catalogue.summary_rebuilds")
+        return _resume["texte"]
+
+
+def prechauffer():
+    """Construit le résumé en arrière-plan (démarrage) : le premier tour n'attend pas l'API"""
+    threading.Thread(target=resume, name="catalogue-warmup", daemon=True).start()
@@ -0,0 +1,317 @@
+"""
+Conversations persistées message par message (SQLite, mode WAL).
+
+Chaque conversation (thread) garde tous ses messages, y compris les appels
+d'outils et leurs résultats : au tour suivant, le modèle voit les données
+déjà obtenues et ne les redemande pas. Un tour n'écrit que ses nouveaux
+messages, sans réécrire l'historique, et un worker redémarré (ou un autre
+worker, voir serve.py) reprend la conversation là où elle s'était arrêtée.
+
+Les messages récemment utilisés restent en mémoire ; seuls les messages
+ajoutés par un autre processus sont relus dans la base. En mémoire, chaque
+message est un `Enregistrement` compact : l'instruction système, identique
+d'une conversation à l'autre, n'est gardée qu'une fois (référencée par son
+numéro), et les anciens messages longs sont compressés.
+
+La taille est bornée pour les serveurs qui tournent longtemps : au-delà de
+KIMRAU_MAX_SESSION_MESSAGES messages, les plus anciens tours d'une
+conversation sont supprimés (en mémoire et dans la base, l'instruction
+système est gardée), et le cache de chaque processus ne dépasse pas
+KIMRAU_MAX_CACHED_MESSAGES messages au total.
+"""
+import json
+import os
+import sqlite3
+import sys
+import threading
+import zlib
+from collections import OrderedDict
+
+from langchain_core.messages import message_to_dict, messages_from_dict
+
+import metrics
+
+CONVERSATIONS_DB = os.getenv("KIMRAU_CONVERSATIONS_DB", "kimrau_conversations.db")
+# Conversations gardées en mémoire dans chaque processus
+CACHE_THREADS = int(os.getenv("KIMRAU_CONVERSATIONS_CACHE", "1000"))
+# Messages gardés par conversation, instruction système non comprise (0 : pas de limite)
+MAX_MESSAGES = int(os.getenv("KIMRAU_MAX_SESSION_MESSAGES", "200"))
+# Messages gardés en mémoire, toutes conversations confondues
+MAX_MESSAGES_CACHE = int(os.getenv("KIMRAU_MAX_CACHED_MESSAGES", "200000"))
+# Les messages plus anciens que les N derniers d'une conversation sont compressés (0 : jamais)
+COMPRESSER_APRES = int(os.getenv("KIMRAU_CONVERSATIONS_COMPRESS_AFTER", "20"))
+# Taille minimale (caractères) d'un texte compressé : en dessous, zlib ne gagne rien
+SEUIL_COMPRESSION = 200
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    thread_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    message TEXT NOT NULL,
+    PRIMARY KEY (thread_id, seq)
+);
+CREATE TABLE IF NOT EXISTS generations (
+    thread_id TEXT PRIMARY KEY,
+    generation INTEGER NOT NULL
+);
+"""
+
+
+# Instructions système partagées : texte -> numéro, et numéro -> texte
+_instructions = {}
+_textes = []
+_instructions_lock = threading.Lock()
+
+
+def interner_instruction(texte) -> int:
+    """Numéro de l'instruction système, enregistrée une seule fois par processus"""
+    with _instructions_lock:
+        numero = _instructions.get(texte)
+        if numero is None:
+            numero = _instructions[texte] = len(_textes)
+            _textes.append(texte)
+        return numero
+
+
+class Enregistrement:
+    """
+    Message gardé en mémoire.
+
+    Attributes:
+        type: Type du message ("system", "human", "ai", "tool"), chaîne internée
+        contenu: Texte du message, numéro d'instruction système (int) ou texte compressé (bytes)
+        donnees: Autres champs non vides (appels d'outils, tool_call_id...) en JSON, éventuellement compressés
+    """
+    __slots__ = ("type", "contenu", "donnees")
+
+    def __init__(self, type, contenu, donnees=None):
+        self.type = type
+        self.contenu = contenu
+        self.donnees = donnees
+
+    @classmethod
+    def depuis_dict(cls, message):
+        """Enregistrement d'un message sérialisé par `message_to_dict`"""
+        data = dict(message["data"])
+        type = sys.intern(data.pop("type", message["type"]))
+        contenu = data.pop("content")
+        if not isinstance(contenu, str):
+            # Contenu multimodal (liste de blocs) : gardé avec les autres champs
+            data["content"], contenu = contenu, ""
+        elif type == "system":
+            contenu = interner_instruction(contenu)
+        # Champs vides ou par défaut : recréés par `messages_from_dict`
+        reste = {k: v for k, v in data.items() if not (v is None or v is False or v in ("", [], {}))}
+        return cls(type, contenu, json.dumps(reste, ensure_ascii=False) if reste else None)
+
+    def compresser(self):
+        if isinstance(self.contenu, str) and len(self.contenu) >= SEUIL_COMPRESSION:
+            self.contenu = zlib.compress(self.contenu.encode())
+        if isinstance(self.donnees, str) and len(self.donnees) >= SEUIL_COMPRESSION:
+            self.donnees = zlib.compress(self.donnees.encode())
+
+    def vers_dict(self):
+        contenu = self.contenu
+        if isinstance(contenu, int):
+            contenu = _textes[contenu]
+        elif isinstance(contenu, bytes):
+            contenu = zlib.decompress(contenu).decode()
+        donnees = self.donnees
+        if isinstance(donnees, bytes):
+            donnees = zlib.decompress(donnees).decode()
+        data = {"content": contenu, "type": self.type}
+        if donnees:
+            data.update(json.loads(donnees))
+        return {"type": self.type, "data": data}
+
+
+class _Conversation:
+    """
+    Conversation en cache : dernier seq lu et enregistrements, dont les `compresses` premiers sont compressés.
+
+    `generation` change à chaque suppression de la conversation (/restart) : une
+    conversation recommencée par un autre processus n'est pas confondue avec l'ancienne.
+    """
+    __slots__ = ("seq", "enregistrements", "compresses", "generation")
+
+    def __init__(self, seq=-1, enregistrements=None, compresses=0, generation=0):
+        self.seq = seq
+        self.enregistrements = enregistrements if enregistrements is not None else []
+        self.compresses = compresses
+        self.generation = generation
+
+    def copie(self):
+        """Copie à étendre hors du verrou : la conversation en cache peut être lue par d'autres threads"""
+        return _Conversation(self.seq, list(self.enregistrements), self.compresses, self.generation)
+
+    def etendre(self, seq, messages):
+        """Ajoute des messages sérialisés ; compresse ceux qui sortent de la fenêtre récente"""
+        self.enregistrements.extend(Enregistrement.depuis_dict(m) for m in messages)
+        self.seq = seq
+        if COMPRESSER_APRES:
+            limite = len(self.enregistrements) - COMPRESSER_APRES
+            for enregistrement in self.enregistrements[self.compresses:limite]:
+                enregistrement.compresser()
+            self.compresses = max(self.compresses, limite)
+
+    def messages(self):
+        return messages_from_dict([e.vers_dict() for e in self.enregistrements])
+
+    def tronquer(self, max_messages):
+        """
+        Supprime les plus anciens tours au-delà de `max_messages` messages.
+
+        La conversation repart au début d'un tour (message de l'utilisateur) :
+        un appel d'outil n'est jamais séparé de son résultat.
+
+        Returns:
+            Le seq du premier message gardé après l'instruction système, None si rien n'est supprimé
+        """
+        enregistrements = self.enregistrements
+        systeme = 1 if enregistrements and enregistrements[0].type == "system" else 0
+        if not max_messages or len(enregistrements) - systeme <= max_messages:
+            return None
+        debut = len(enregistrements) - max_messages
+        suivant = next((i for i in range(debut, len(enregistrements)) if enregistrements[i].type == "human"), None)
+        if suivant is None:
+            # Dernier tour plus long que la limite : il est gardé en entier
+            suivant = next((i for i in range(debut - 1, systeme, -1) if enregistrements[i].type == "human"), None)
+        if suivant is None or suivant <= systeme:
+            return None
+        # Les messages qui suivent l'instruction système ont des seq consécutifs
+        premier = self.seq - (len(enregistrements) - 1 - suivant)
+        self.enregistrements = enregistrements[:systeme] + enregistrements[suivant:]
+        self.compresses = max(systeme, self.compresses - (suivant - systeme))
+        return premier
+
+
+class ConversationStore:
+    """
+    Args:
+        path: Fichier SQLite des conversations
+        cache_threads: Nombre de conversations gardées en mémoire
+        max_messages: Messages gardés par conversation (0 : pas de limite)
+        max_messages_cache: Messages gardés en mémoire, toutes conversations confondues
+    """
+
+    def __init__(self, path, cache_threads=CACHE_THREADS, max_messages=MAX_MESSAGES,
+                 max_messages_cache=MAX_MESSAGES_CACHE):
+        self.path = path
+        self.cache_threads = cache_threads
+        self.max_messages = max_messages
+        self.max_messages_cache = max_messages_cache
+        self._local = threading.local()
+        # thread_id -> _Conversation
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._db().executescript(_SCHEMA)
+
+    def _db(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _dernier_seq(self, thread_id):
+        row = self._db().execute("SELECT MAX(seq) FROM messages WHERE thread_id = ?", (thread_id,)).fetchone()
+        return row[0] if row[0] is not None else -1
+
+    def _etat(self, thread_id):
+        """Dernier seq et génération de la conversation, lus ensemble"""
+        row = self._db().execute(
+            "SELECT (SELECT MAX(seq) FROM messages WHERE thread_id = ?), "
+            "(SELECT generation FROM generations WHERE thread_id = ?)", (thread_id, thread_id)).fetchone()
+        return (row[0] if row[0] is not None else -1), row[1] or 0
+
+    def _garder(self, thread_id, conversation):
+        with self._lock:
+            self._cache[thread_id] = conversation
+            self._cache.move_to_end(thread_id)
+            total = sum(len(c.enregistrements) for c in self._cache.values())
+            while len(self._cache) > 1 and (len(self._cache) > self.cache_threads or total > self.max_messages_cache):
+                _, ancienne = self._cache.popitem(last=False)
+                total -= len(ancienne.enregistrements)
+        metrics.gauge("conversations.cached_messages", total)
+
+    def _tronquer(self, thread_id, conversation):
+        """Applique la limite de messages par conversation, en mémoire et dans la base"""
+        avant = len(conversation.enregistrements)
+        premier = conversation.tronquer(self.max_messages)
+        if premier is None:
+            return
+        # L'instruction système (seq 0) est gardée
+        systeme = 0 if conversation.enregistrements[0].type == "system" else -1
+        self._db().execute("DELETE FROM messages WHERE thread_id = ? AND seq > ? AND seq < ?",
+                           (thread_id, systeme, premier))
+        metrics.incr("conversations.trimmed_messages", avant - len(conversation.enregistrements))
+
+    def existe(self, thread_id) -> bool:
+        return self._dernier_seq(thread_id) >= 0
+
+    def charger(self, thread_id):
+        """
+        Messages de la conversation (liste de BaseMessage), [] si elle n'existe pas.
+
+        Les messages sont reconstruits à chaque appel : l'appelant peut y
+        ajouter les messages du tour sans toucher au cache.
+        """
+        dernier, generation = self._etat(thread_id)
+        with self._lock:
+            conversation = self._cache.get(thread_id)
+        if conversation is None or conversation.generation != generation or conversation.seq > dernier:
+            # Pas en cache, ou conversation supprimée ou recommencée par un autre processus
+            conversation = _Conversation(generation=generation)
+        if conversation.seq < dernier:
+            conversation = conversation.copie()
+            rows = self._db().execute("SELECT seq, message FROM messages WHERE thread_id = ? AND seq > ? ORDER BY seq",
+                                      (thread_id, conversation.seq)).fetchall()
+            conversation.etendre(rows[-1][0], [json.loads(row[1]) for row in rows])
+            self._tronquer(thread_id, conversation)
+        self._garder(thread_id, conversation)
+        return conversation.messages()
+
+    def ajouter(self, thread_id, nouveaux):
+        """Ajoute les messages d'un tour à la fin de la conversation"""
+        dicts = [message_to_dict(m) for m in nouveaux]
+        lignes = [json.dumps(d, ensure_ascii=False) for d in dicts]
+        db = self._db()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            dernier, generation = self._etat(thread_id)
+            debut = dernier + 1
+            db.executemany("INSERT INTO messages (thread_id, seq, message) VALUES (?, ?, ?)",
+                           [(thread_id, debut + i, ligne) for i, ligne in enumerate(lignes)])
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        with self._lock:
+            conversation = self._cache.get(thread_id)
+        if conversation is not None and conversation.generation == generation and conversation.seq == debut - 1:
+            conversation = conversation.copie()
+            conversation.etendre(debut + len(nouveaux) - 1, dicts)
+            self._tronquer(thread_id, conversation)
+            self._garder(thread_id, conversation)
+
+    def supprimer(self, thread_id):
+        db = self._db()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            db.execute("DELETE FROM messages WHERE thread_id = ?", (thread_id,))
+            db.execute("INSERT INTO generations (thread_id, generation) VALUES (?, 1) "
+                       "ON CONFLICT(thread_id) DO UPDATE SET generation = generation + 1", (thread_id,))
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        with self._lock:
+            self._cache.pop(thread_id, None)
+
+    def thread_ids(self):
+        return [row[0] for row in self._db().execute("SELECT DISTINCT thread_id FROM messages")]
+
+
+store = ConversationStore(CONVERSATIONS_DB)
@@ -0,0 +1,164 @@
+"""
+Requêtes de relance (« hedged requests ») pour les lectures de l'API hôtel.
+
+Un GET qui n'a pas répondu après le p90 observé de sa ressource est doublé
+par une seconde requête identique ; la première réponse valide est gardée,
+l'autre est ignorée. Un démarrage à froid de Cloud Run sur une instance ne
+bloque donc plus tout le tour.
+
+Les relances sont bornées par un budget : chaque GET ajoute `budget`
+crédit (0.05 : au plus 5 % de requêtes en plus), chaque relance en consomme
+un. Sans assez de mesures pour une ressource, pas de relance.
+
+Une requête qui ne peut pas être relancée (pas de délai connu, pas de
+crédit) s'exécute dans le thread appelant ; les autres passent par le pool
+pour que l'appelant puisse prendre la réponse de la relance sans attendre
+la requête principale. La latence d'une requête principale est mesurée à
+partir de son démarrage effectif : l'attente dans le pool n'entre pas dans
+le p90.
+
+Métriques : hotel_api.hedge.sent / won / skipped_budget, taux de relance
+(hotel_api.hedge.rate), latence des GET avec et sans relance
+(hotel_api.get.latency_s, hotel_api.get.latency_unhedged_s) et gain sur le
+p99 (hotel_api.hedge.p99_gain_s).
+"""
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import metrics
+
+# Mesures gardées par ressource pour estimer le p90
+RESERVOIR = 256
+# Mesures nécessaires avant de relancer les requêtes d'une ressource
+MIN_MESURES = 50
+# Le p90 est recalculé toutes les N mesures
+RECALCUL = 16
+
+
+def _ressource(path):
+    return path.strip("/").split("/")[0]
+
+
+class Hedger:
+    """
+    Args:
+        budget: Part maximale de requêtes supplémentaires (0.05 : 5 %)
+        quantile: Percentile de latence au-delà duquel la requête est relancée
+        delai_min: Attente minimale avant une relance (secondes)
+        credits_max: Relances possibles en rafale après une période calme
+        workers: Threads d'exécution des requêtes
+    """
+
+    def __init__(self, budget=0.05, quantile=90, delai_min=0.05, credits_max=10, workers=16):
+        self.budget = budget
+        self.quantile = quantile
+        self.delai_min = delai_min
+        self.credits_max = credits_max
+        self._credits = 0.0
+        self._latences = {}  # ressource -> deque des latences sans relance
+        self._mesures = {}  # ressource -> nombre total de mesures
+        self._delais = {}  # ressource -> délai avant relance
+        self._reelles = deque(maxlen=metrics.RESERVOIR)
+        self._sans_relance = deque(maxlen=metrics.RESERVOIR)
+        self.requetes = 0
+        self.relances = 0
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="hotel-hedge")
+
+    def _observer(self, ressource, duree):
+        """Latence d'une requête principale ; le délai avant relance est recalculé toutes les RECALCUL mesures"""
+        with self._lock:
+            latences = self._latences.get(ressource)
+            if latences is None:
+                latences = self._latences[ressource] = deque(maxlen=RESERVOIR)
+            latences.append(duree)
+            self._sans_relance.append(duree)
+            mesures = self._mesures[ressource] = self._mesures.get(ressource, 0) + 1
+            if len(latences) >= MIN_MESURES and (mesures % RECALCUL == 0 or ressource not in self._delais):
+                self._delais[ressource] = max(self.delai_min, metrics.percentile(list(latences), self.quantile))
+        metrics.observe("hotel_api.get.latency_unhedged_s", duree)
+
+    def _mesurer(self, ressource, principal):
+        """Exécute la requête principale ; sa latence est mesurée même si la relance gagne"""
+        debut = time.monotonic()
+        try:
+            return principal()
+        finally:
+            self._observer(ressource, time.monotonic() - debut)
+
+    def _credit_disponible(self) -> bool:
+        with self._lock:
+            return self._credits >= 1
+
+    def _prendre_credit(self) -> bool:
+        with self._lock:
+            if self._credits < 1:
+                return False
+            self._credits -= 1
+            self.relances += 1
+            metrics.gauge("hotel_api.hedge.rate", round(self.relances / self.requetes, 4))
+            return True
+
+    def _terminer(self, duree):
+        metrics.observe("hotel_api.get.latency_s", duree)
+        with self._lock:
+            self._reelles.append(duree)
+            if self.requetes % RECALCUL:
+                return
+            gain = metrics.percentile(list(self._sans_relance), 99) - metrics.percentile(list(self._reelles), 99)
+        metrics.gauge("hotel_api.hedge.p99_gain_s", round(gain, 4))
+
+    def executer(self, path, principal, relance):
+        """
+        Exécute `principal()`, doublé par `relance()` s'il tarde.
+
+        Args:
+            path: Chemin de l'API (la latence est suivie par ressource)
+            principal: Requête à exécuter
+            relance: Requête identique, qui échoue tout de suite si elle ne peut pas partir
+
+        Returns:
+            La première réponse valide (pas d'exception ni de statut 5xx)
+        """
+        ressource = _ressource(path)
+        debut = time.monotonic()
+        with self._lock:
+            self.requetes += 1
+            self._credits = min(self.credits_max, self._credits + self.budget)
+
+        # Délai avant relance : p90 observé de la ressource, None sans assez de mesures
+        delai = self._delais.get(ressource)
+        if delai is None or not self._credit_disponible():
+            try:
+                return self._mesurer(ressource, principal)
+            finally:
+                self._terminer(time.monotonic() - debut)
+
+        futur = self._pool.submit(self._mesurer, ressource, principal)
+        if not wait([futur], timeout=delai).done:
+            if self._prendre_credit():
+                metrics.incr("hotel_api.hedge.sent")
+                try:
+                    return self._premiere([futur, self._pool.submit(relance)])
+                finally:
+                    self._terminer(time.monotonic() - debut)
+            metrics.incr("hotel_api.hedge.skipped_budget")
+
+        try:
+            return futur.result()
+        finally:
+            self._terminer(time.monotonic() - debut)
+
+    def _premiere(self, futurs):
+        """Première réponse valide ; à défaut, le résultat (ou l'erreur) de la requête principale"""
+        en_cours = set(futurs)
+        while en_cours:
+            finis, en_cours = wait(en_cours, return_when=FIRST_COMPLETED)
+            for futur in finis:
+                if futur.exception() is None and futur.result().status_code < 500:
+                    if futur is futurs[1]:
+                        metrics.incr("hotel_api.hedge.won")
+                    return futur.result()
+        return futurs[0].result()
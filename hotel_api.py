@@ -0,0 +1,337 @@
+"""
+Client HTTP partagé vers l'API de l'Hôtel California.
+
+Un seul `requests.Session` est réutilisé par tous les points d'entrée (texte,
+vocal, HTTP) : les connexions TLS vers Cloud Run restent ouvertes d'un appel
+à l'autre. Les lectures du catalogue (restaurants, spas, repas) changent
+rarement et sont gardées en cache quelques minutes.
+
+Les GET identiques lancés en même temps (plusieurs sessions qui demandent la
+liste des restaurants à l'expiration du cache, par exemple) partagent une
+seule requête HTTP en vol : voir `SingleFlight`. Pendant un tour, les GET
+consultent d'abord le cache du tour, rempli par anticipation (voir prefetch.py).
+
+Chaque requête a un timeout par ressource, consomme un jeton du limiteur de
+débit partagé et passe par le coupe-circuit `hotel_api` (voir resilience.py).
+Avec HOTEL_API_HEDGE=1, un GET trop lent est doublé par une seconde requête
+(voir hedging.py). Les écritures portent une clé d'idempotence : un tour
+relancé ne les renvoie pas à l'API (voir idempotence.py).
+"""
+import asyncio
+import contextvars
+import os
+import threading
+import time
+import weakref
+
+import requests
+from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+
+import idempotence
+import metrics
+import shared_state
+from hedging import Hedger
+from resilience import CircuitBreaker, ServiceIndisponible, TokenBucket
+
+# Charger les variables depuis .env
+load_dotenv(override=True)
+
+hotel_api_token = os.getenv("HOTEL_API_TOKEN")
+API_BASE_URL = os.getenv("HOTEL_API_URL", "https://app-584240518682.europe-west9.run.app/api").rstrip("/")
+
+# Durée de vie (secondes) des entrées du cache catalogue
+CATALOGUE_TTL = float(os.getenv("HOTEL_CATALOGUE_TTL", "300"))
+
+# Timeouts (connexion, lecture) en secondes, par ressource
+DEFAULT_TIMEOUT = (3.05, float(os.getenv("HOTEL_API_TIMEOUT", "10")))
+TIMEOUTS = {
+    "restaurants": (3.05, 5),
+    "spas": (3.05, 5),
+    "meals": (3.05, 5),
+}
+
+# Débit maximal vers l'API, partagé par toutes les sessions du processus
+limiter = TokenBucket("hotel_api", rate=float(os.getenv("HOTEL_API_RATE", "20")),
+                      capacity=float(os.getenv("HOTEL_API_BURST", "40")))
+# Attente maximale d'un jeton avant d'abandonner la requête
+LIMITER_MAX_WAIT = 2.0
+
+breaker = CircuitBreaker("hotel_api", failure_threshold=5, reset_timeout=30)
+
+# Relance des GET lents, au plus HOTEL_API_HEDGE_BUDGET de requêtes en plus
+hedger = Hedger(budget=float(os.getenv("HOTEL_API_HEDGE_BUDGET", "0.05"))) \
+    if os.getenv("HOTEL_API_HEDGE", "0") == "1" else None
+
+# Session partagée : pool de connexions keep-alive
+session = requests.Session()
+session.headers["Authorization"] = f"Token {hotel_api_token}"
+session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=32))
+session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=32))
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+# Cache du tour en cours : clé de requête -> Future de la réponse lue par anticipation
+tour_cache = contextvars.ContextVar("tour_cache", default=None)
+# Attente maximale d'une lecture anticipée encore en vol avant de refaire l'appel
+PREFETCH_MAX_WAIT = 5.0
+
+
+class _Call:
+    """Requête en vol partagée entre plusieurs appelants"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Déduplication des appels identiques simultanés.
+
+    Le premier appelant d'une clé exécute la fonction ; les appelants
+    suivants (threads ou coroutines) attendent son résultat au lieu de
+    relancer le même appel.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._async_calls = weakref.WeakKeyDictionary()  # boucle asyncio -> {clé: tâche}
+        self.partages = 0
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.partages += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    async def do_async(self, key, fn):
+        """Variante asyncio : `fn` (bloquante) tourne dans un thread, partagé avec `do`"""
+        loop = asyncio.get_running_loop()
+        calls = self._async_calls.setdefault(loop, {})
+        task = calls.get(key)
+        if task is None:
+            task = calls[key] = loop.create_task(asyncio.to_thread(self.do, key, fn))
+            task.add_done_callback(lambda _: calls.pop(key, None))
+        else:
+            self.partages += 1
+        # shield : l'annulation d'un appelant n'annule pas la requête des autres
+        return await asyncio.shield(task)
+
+
+_flight = SingleFlight()
+
+
+def _cle(path, params):
+    return path, tuple(sorted((params or {}).items()))
+
+
+def url(path: str) -> str:
+    """Construit l'URL complète d'un chemin de l'API (ex: "/clients/")"""
+    return API_BASE_URL + path
+
+
+def timeout(path: str):
+    """Timeout (connexion, lecture) applicable à un chemin"""
+    return TIMEOUTS.get(path.strip("/").split("/")[0], DEFAULT_TIMEOUT)
+
+
+def request(method: str, path: str, attente_jeton: float = LIMITER_MAX_WAIT, url_absolue: str = None,
+            **kwargs) -> requests.Response:
+    """
+    Envoie une requête via la couche de résilience.
+
+    Les erreurs réseau, timeouts et réponses 5xx comptent comme des échecs
+    pour le coupe-circuit ; les 4xx sont des réponses valides de l'API.
+
+    Args:
+        attente_jeton: Attente maximale d'un jeton du limiteur de débit (secondes)
+        url_absolue: URL complète à appeler à la place de `url(path)` (lien
+            "next" d'une pagination) ; `path` sert alors au timeout
+
+    Raises:
+        ServiceIndisponible: circuit ouvert ou limite de débit atteinte
+        requests.RequestException: erreur réseau ou timeout
+    """
+    # Circuit ouvert : échouer tout de suite, sans consommer de jeton
+    breaker.before_call()
+    try:
+        limiter.acquire(timeout=attente_jeton)
+    except ServiceIndisponible:
+        breaker.abandon()
+        raise
+    try:
+        response = session.request(method, url_absolue or url(path), timeout=timeout(path), **kwargs)
+    except requests.RequestException:
+        breaker.record_failure()
+        raise
+    if response.status_code >= 500:
+        breaker.record_failure()
+    else:
+        breaker.record_success()
+    return response
+
+
+def _anticipe(key):
+    """Réponse lue par anticipation pendant ce tour, sinon None"""
+    cache = tour_cache.get()
+    future = cache.get(key) if cache else None
+    if future is None:
+        return None
+    try:
+        response = future.result(timeout=PREFETCH_MAX_WAIT)
+    except Exception:
+        return None
+    metrics.incr("prefetch.hits")
+    return response
+
+
+def _oublier_tour():
+    # Une écriture rend les lectures anticipées du tour obsolètes
+    cache = tour_cache.get()
+    if cache:
+        cache.clear()
+
+
+def _get(path, params):
+    if hedger is None:
+        return request("GET", path, params=params)
+    # La relance ne part que si un jeton du limiteur est disponible tout de suite
+    return hedger.executer(path, lambda: request("GET", path, params=params),
+                           lambda: request("GET", path, attente_jeton=0, params=params))
+
+
+def get(path: str, params=None) -> requests.Response:
+    """GET dédupliqué : les appels identiques simultanés partagent la même réponse"""
+    key = _cle(path, params)
+    response = _anticipe(key)
+    if response is not None:
+        return response
+    return _flight.do(key, lambda: _get(path, params))
+
+
+async def get_async(path: str, params=None) -> requests.Response:
+    """Version asyncio de `get`, dédupliquée avec les appelants synchrones"""
+    return await _flight.do_async(_cle(path, params), lambda: _get(path, params))
+
+
+def _ressource(path):
+    """Préfixe de la ressource d'un chemin ("/restaurants/3/" -> "/restaurants/")"""
+    return "/" + path.strip("/").split("/")[0] + "/"
+
+
+def _ecrire(method, path, json=None):
+    """Écriture idempotente : une écriture déjà réussie lors d'une tentative précédente renvoie la réponse enregistrée"""
+    _oublier_tour()
+    cle = idempotence.cle(method, path, json)
+    if cle is None:
+        response = request(method, path, json=json)
+    else:
+        response = idempotence.ledger.lire(cle)
+        if response is not None:
+            metrics.incr("idempotency.replays")
+            return response
+        response = request(method, path, json=json, headers={"Idempotency-Key": cle})
+        if 200 <= response.status_code < 300:
+            idempotence.ledger.enregistrer(cle, method, path, response)
+    if 200 <= response.status_code < 300:
+        # Les lectures en cache de la ressource modifiée (catalogue) sont obsolètes
+        invalidate(_ressource(path))
+    return response
+
+
+def post(path: str, json=None) -> requests.Response:
+    return _ecrire("POST", path, json=json)
+
+
+def put(path: str, json=None) -> requests.Response:
+    return _ecrire("PUT", path, json=json)
+
+
+def delete(path: str) -> requests.Response:
+    return _ecrire("DELETE", path)
+
+
+def iter_pages(path: str, params=None):
+    """Parcourt tous les éléments d'une liste de l'API (pagination DRF ou liste simple)"""
+    response = get(path, params=params)
+    while True:
+        response.raise_for_status()
+        body = response.json()
+        if isinstance(body, list):
+            yield from body
+            return
+        yield from body.get("results", [])
+        if not body.get("next"):
+            return
+        response = request("GET", path, url_absolue=body["next"])
+
+
+def get_cached(path: str, params=None, ttl: float = CATALOGUE_TTL):
+    """
+    GET avec cache à durée de vie limitée (mémoire, ou base partagée en
+    mode multi-processus).
+
+    Returns:
+        Le corps JSON de la réponse si le statut est 200, sinon None.
+        Les échecs ne sont jamais mis en cache.
+    """
+    key = _cle(path, params)
+    if shared_state.is_shared():
+        data = shared_state.state.cache_get(_cle_partagee(key))
+        if data is not None:
+            return data
+    else:
+        now = time.monotonic()
+        with _cache_lock:
+            entry = _cache.get(key)
+            if entry is not None and entry[0] > now:
+                return entry[1]
+
+    response = get(path, params=params)
+    if response.status_code != 200:
+        return None
+    data = response.json()
+    if shared_state.is_shared():
+        shared_state.state.cache_set(_cle_partagee(key), data, ttl)
+    else:
+        with _cache_lock:
+            _cache[key] = (time.monotonic() + ttl, data)
+    return data
+
+
+def _cle_partagee(key):
+    path, params = key
+    return path + "?" + "&".join(f"{k}={v}" for k, v in params)
+
+
+def invalidate(prefix: str = ""):
+    """Vide les entrées du cache dont le chemin commence par `prefix`"""
+    if shared_state.is_shared():
+        shared_state.state.cache_invalidate(prefix)
+    with _cache_lock:
+        for key in [k for k in _cache if k[0].startswith(prefix)]:
+            del _cache[key]
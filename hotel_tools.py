@@ -0,0 +1,857 @@
+"""
+Outils LangChain exposés à l'agent Kimrau.
+
+Toutes les requêtes vers l'API de l'hôtel passent par le client partagé de
+`hotel_api` (pool de connexions, cache du catalogue). Si la réplique locale
+est activée (voir replica.py), les lectures de clients et de réservations
+sont servies localement et les écritures la mettent à jour.
+
+Les échecs sont renvoyés au modèle sous forme d'erreurs typées (statut,
+erreur temporaire ou non, erreurs par champ) : voir tool_result.py.
+"""
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain_core.tools import tool
+
+import capacity
+import catalogue
+import hotel_api
+import profiling
+import replica
+import tool_result
+import validation
+import web_search
+from tool_result import protege
+
+# Durée de vie (secondes) du schéma OpenAPI en cache
+SCHEMA_TTL = 3600
+# Clients homonymes au-delà desquels find_guest_reservations demande de préciser
+MAX_CLIENTS_TROUVES = 5
+
+# Lectures parallèles des outils composites
+_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="composite")
+
+
+@tool
+@protege("lister les restaurants")
+def get_restaurants():
+    """Get All Restaurants
+
+    Exemple response body
+        {
+      "count": 3,
+      "next": null,
+      "previous": null,
+      "results": [
+        {
+          "id": 19,
+          "name": "Le Maison Royale",
+          "description": "Une expérience gastronomique raffinée mettant en vedette les saveurs de la cuisine française contemporaine",
+          "capacity": 80,
+          "opening_hours": "07:00-23:00",
+          "location": "Rez-de-chaussée",
+          "is_active": true
+        },
+        {
+          "id": 20,
+          "name": "Bistrot de la piscine",
+          "description": "Une cuisine décontractée aux saveurs méditerranéennes",
+          "capacity": 40,
+          "opening_hours": "11:00-22:00",
+          "location": "Terrasse de la piscine",
+          "is_active": true
+        },
+        {
+          "id": 21,
+          "name": "Le Belvedere",
+          "description": "Une table d'exception avec vue panoramique sur la ville",
+          "capacity": 60,
+          "opening_hours": "16:00-23:00",
+          "location": "13ème étage",
+          "is_active": true
+        }
+      ]
+    }"""
+    name: str = "api_restaurants"
+    description: str = "Get All Restaurants"
+    api_path = "/restaurants/"
+    return _catalogue(api_path, "lister les restaurants")
+
+
+def _catalogue(api_path, action):
+    data = hotel_api.get_cached(api_path)
+    if data is None:
+        # get_cached ne garde pas la réponse en échec : erreur temporaire
+        return tool_result.erreur_service(None, action)
+    return data
+
+
+@tool
+@protege("lister les spas")
+def get_spas():
+    """Get All Spas
+
+        Exemple Response body
+        [
+      {
+        "id": 1,
+        "name": "Relaxation Spa",
+        "description": "Un spa dédié à la relaxation avec des massages professionnels et des bains chauds.",
+        "location": "123 Wellness Street, Paris, France",
+        "phone_number": "+33 1 23 45 67 89",
+        "email": "contact@relaxationspa.fr",
+        "opening_hours": "Lundi - Dimanche : 09:00 - 20:00",
+        "created_at": "2024-12-08T15:32:43.062749+01:00",
+        "updated_at": "2024-12-08T15:32:43.062754+01:00"
+      },
+      {
+        "id": 2,
+        "name": "Thermal Bliss Spa",
+        "description": "Découvrez nos sources thermales naturelles et nos soins corporels personnalisés.",
+        "location": "456 Thermal Avenue, Lyon, France",
+        "phone_number": "+33 4 56 78 90 12",
+        "email": "info@thermalblissspa.fr",
+        "opening_hours": "Lundi - Vendredi : 10:00 - 18:00",
+        "created_at": "2024-12-08T15:32:43.063120+01:00",
+        "updated_at": "2024-12-08T15:32:43.063124+01:00"
+      },
+      {
+        "id": 3,
+        "name": "Luxury Escape Spa",
+        "description": "Un spa haut de gamme offrant des soins de luxe et des expériences uniques.",
+        "location": "789 Luxury Road, Nice, France",
+        "phone_number": "+33 6 98 76 54 32",
+        "email": "hello@luxuryescapespa.fr",
+        "opening_hours": "Samedi - Dimanche : 11:00 - 23:00",
+        "created_at": "2024-12-08T15:32:43.063471+01:00",
+        "updated_at": "2024-12-08T15:32:43.063475+01:00"
+      },
+      {
+        "id": 4,
+        "name": "Relaxation Spa",
+        "description": "Un spa dédié à la relaxation avec des massages professionnels et des bains chauds.",
+        "location": "123 Wellness Street, Paris, France",
+        "phone_number": "+33 1 23 45 67 89",
+        "email": "contact@relaxationspa.fr",
+        "opening_hours": "Lundi - Dimanche : 09:00 - 20:00",
+        "created_at": "2024-12-08T15:33:20.203330+01:00",
+        "updated_at": "2024-12-08T15:33:20.203334+01:00"
+      },
+      {
+        "id": 5,
+        "name": "Thermal Bliss Spa",
+        "description": "Découvrez nos sources thermales naturelles et nos soins corporels personnalisés.",
+        "location": "456 Thermal Avenue, Lyon, France",
+        "phone_number": "+33 4 56 78 90 12",
+        "email": "info@thermalblissspa.fr",
+        "opening_hours": "Lundi - Vendredi : 10:00 - 18:00",
+        "created_at": "2024-12-08T15:33:20.203794+01:00",
+        "updated_at": "2024-12-08T15:33:20.203800+01:00"
+      },
+      {
+        "id": 6,
+        "name": "Luxury Escape Spa",
+        "description": "Un spa haut de gamme offrant des soins de luxe et des expériences uniques.",
+        "location": "789 Luxury Road, Nice, France",
+        "phone_number": "+33 6 98 76 54 32",
+        "email": "hello@luxuryescapespa.fr",
+        "opening_hours": "Samedi - Dimanche : 11:00 - 23:00",
+        "created_at": "2024-12-08T15:33:20.204194+01:00",
+        "updated_at": "2024-12-08T15:33:20.204199+01:00"
+      },
+      {
+        "id": 7,
+        "name": "Relaxation Spa",
+        "description": "Un spa dédié à la relaxation avec des massages professionnels et des bains chauds.",
+        "location": "123 Wellness Street, Paris, France",
+        "phone_number": "+33 1 23 45 67 89",
+        "email": "contact@relaxationspa.fr",
+        "opening_hours": "Lundi - Dimanche : 09:00 - 20:00",
+        "created_at": "2025-03-21T17:57:54.064799+01:00",
+        "updated_at": "2025-03-21T17:57:54.064803+01:00"
+      },
+      {
+        "id": 8,
+        "name": "Thermal Bliss Spa",
+        "description": "Découvrez nos sources thermales naturelles et nos soins corporels personnalisés.",
+        "location": "456 Thermal Avenue, Lyon, France",
+        "phone_number": "+33 4 56 78 90 12",
+        "email": "info@thermalblissspa.fr",
+        "opening_hours": "Lundi - Vendredi : 10:00 - 18:00",
+        "created_at": "2025-03-21T17:57:54.065438+01:00",
+        "updated_at": "2025-03-21T17:57:54.065443+01:00"
+      },
+      {
+        "id": 9,
+        "name": "Luxury Escape Spa",
+        "description": "Un spa haut de gamme offrant des soins de luxe et des expériences uniques.",
+        "location": "789 Luxury Road, Nice, France",
+        "phone_number": "+33 6 98 76 54 32",
+        "email": "hello@luxuryescapespa.fr",
+        "opening_hours": "Samedi - Dimanche : 11:00 - 23:00",
+        "created_at": "2025-03-21T17:57:54.065791+01:00",
+        "updated_at": "2025-03-21T17:57:54.065795+01:00"
+      },
+      {
+        "id": 10,
+        "name": "Relaxation Spa",
+        "description": "Un spa dédié à la relaxation avec des massages professionnels et des bains chauds.",
+        "location": "123 Wellness Street, Paris, France",
+        "phone_number": "+33 1 23 45 67 89",
+        "email": "contact@relaxationspa.fr",
+        "opening_hours": "Lundi - Dimanche : 09:00 - 20:00",
+        "created_at": "2025-03-22T11:05:30.080622+01:00",
+        "updated_at": "2025-03-22T11:05:30.080639+01:00"
+      },
+      {
+        "id": 11,
+        "name": "Thermal Bliss Spa",
+        "description": "Découvrez nos sources thermales naturelles et nos soins corporels personnalisés.",
+        "location": "456 Thermal Avenue, Lyon, France",
+        "phone_number": "+33 4 56 78 90 12",
+        "email": "info@thermalblissspa.fr",
+        "opening_hours": "Lundi - Vendredi : 10:00 - 18:00",
+        "created_at": "2025-03-22T11:05:30.081172+01:00",
+        "updated_at": "2025-03-22T11:05:30.081189+01:00"
+      },
+      {
+        "id": 12,
+        "name": "Luxury Escape Spa",
+        "description": "Un spa haut de gamme offrant des soins de luxe et des expériences uniques.",
+        "location": "789 Luxury Road, Nice, France",
+        "phone_number": "+33 6 98 76 54 32",
+        "email": "hello@luxuryescapespa.fr",
+        "opening_hours": "Samedi - Dimanche : 11:00 - 23:00",
+        "created_at": "2025-03-22T11:05:30.081624+01:00",
+        "updated_at": "2025-03-22T11:05:30.081641+01:00"
+      }
+    ]
+    """
+    name: str = "api_spas"
+    description: str = "Get All Spas"
+    api_path = "/spas/"
+    return _catalogue(api_path, "lister les spas")
+
+@tool
+@protege("lister les repas")
+def get_meals():
+    """Get All Meals
+
+    Exemple response body
+    {
+      "count": 3,
+      "next": null,
+      "previous": null,
+      "results": [
+        {
+          "id": 19,
+          "name": "Breakfast"
+        },
+        {
+          "id": 20,
+          "name": "Lunch"
+        },
+        {
+          "id": 21,
+          "name": "Dinner"
+        }
+      ]
+    }"""
+    name: str = "api_meals"
+    description: str = "Get All Meals"
+    api_path = "/meals/"
+    return _catalogue(api_path, "lister les repas")
+
+
+@tool
+@protege("modifier la réservation")
+def put_reservation(id_reservation: int, id_client: int, id_restaurant: int | str, date: str, id_meal: int | str,
+                    number_of_guests: int, special_requests: str = ""):
+    """
+    Met à jour les informations d'une réservation existante dans la base de données de l'hôtel
+
+    Args:
+        id_reservation: Identifiant unique de la réservation à modifier
+        id_client: Identifiant du client associé à la réservation
+        id_restaurant: Identifiant ou nom du restaurant concerné
+        date: Date de la réservation (YYYY-MM-DD, ou en toutes lettres : "vendredi prochain", "12 juin")
+        id_meal: Identifiant ou nom du repas ("Dinner", "dîner"...)
+        number_of_guests: Nombre de personnes pour la réservation
+        special_requests: Demandes particulières ou commentaires associés à la réservation
+
+    Returns:
+        Les données de la réservation mises à jour en cas de succès,
+        ou un dictionnaire contenant les détails de l'erreur en cas d'échec
+    """
+    name: str = "api_put_reservation"
+    description: str = "Put a reservation into the database"
+    api_path = f"/reservations/{id_reservation}/"
+    try:
+        json_data = validation.reservation(id_client, id_restaurant, date, id_meal, number_of_guests, special_requests)
+    except validation.ErreurValidation as e:
+        return tool_result.erreur_validation(e, f"modifier la réservation {id_reservation}")
+    except validation.CatalogueIndisponible as e:
+        return tool_result.erreur_service(e, f"modifier la réservation {id_reservation}")
+    response = hotel_api.put(api_path, json=json_data)
+    if tool_result.succes(response, "PUT"):
+        if replica.active():
+            replica.replica.upsert("reservations", response.json())
+        capacity.index.appliquer(response.json())
+        return response.json()
+    else:
+        return tool_result.erreur(response, f"modifier la réservation {id_reservation}")
+
+
+@tool
+@protege("supprimer la réservation")
+def delete_reservation(id_reservation: int):
+    """
+    Supprime une réservation de la base de données de l'hôtel
+
+    Args:
+        id_reservation: Identifiant unique de la réservation à supprimer
+
+    Returns:
+        Un dictionnaire avec un message de confirmation en cas de succès,
+        ou un dictionnaire contenant les détails de l'erreur en cas d'échec
+    """
+    name: str = "api_delete_reservation"
+    description: str = "Delete a reservation from the database"
+    api_path = f"/reservations/{id_reservation}/"
+    response = hotel_api.delete(api_path)
+
+    if tool_result.succes(response, "DELETE"):
+        if replica.active():
+            replica.replica.delete("reservations", id_reservation)
+        capacity.index.retirer(id_reservation)
+        return {"message": "Reservation successfully deleted"}
+    else:
+        return tool_result.erreur(response, f"supprimer la réservation {id_reservation}")
+
+
+@tool
+@protege("créer la réservation")
+def post_reservation(id_client: int, id_restaurant: int | str, date: str, id_meal: int | str, number_of_guests: int,
+                     special_requests: str = ""):
+    """Post a reservation into the database
+
+    Args:
+        id_client (int): L'ID du client.
+        id_restaurant (int | str): L'ID ou le nom du restaurant.
+        date (str): Date de la réservation (YYYY-MM-DD, ou en toutes lettres : "vendredi prochain", "12 juin").
+        id_meal (int | str): L'ID ou le nom du repas ("Dinner", "dîner"...).
+        number_of_guests (int): Nombre de convives.
+        special_requests (str, optional): Demandes spéciales. Par défaut "".
+
+    Returns:
+        dict: Les informations de la réservation créée, ou une erreur typée (voir tool_result.py).
+    """
+    name: str = "api_post_reservation"
+    description: str = "Post a reservation into the database"
+    api_path = "/reservations/"
+    try:
+        json = validation.reservation(id_client, id_restaurant, date, id_meal, number_of_guests, special_requests)
+    except validation.ErreurValidation as e:
+        return tool_result.erreur_validation(e, "créer la réservation")
+    except validation.CatalogueIndisponible as e:
+        return tool_result.erreur_service(e, "créer la réservation")
+    response = hotel_api.post(api_path, json=json)
+    if tool_result.succes(response, "POST"):
+        if replica.active():
+            replica.replica.upsert("reservations", response.json())
+        capacity.index.appliquer(response.json())
+        return response.json()
+    else:
+        return tool_result.erreur(response, "créer la réservation")
+
+@tool
+@protege("trouver la réservation")
+def get_reservation_by_id_reservation(id: int):
+    """
+    Récupère les informations d'une réservation spécifique à partir de son identifiant.
+
+    Args:
+        id (int): L'identifiant unique de la réservation.
+
+    Returns:
+        dict: Un dictionnaire contenant les détails de la réservation si la requête réussit (statut 200),
+              sinon une erreur typée (statut 404 si la réservation n'existe pas).
+
+    Exemples:
+        >>> get_reservation_by_id_reservation(123)
+        {
+            "id": 123,
+            "client": 45,
+            "restaurant": 12,
+            "date": "2025-03-23",
+            "meal": 7,
+            "number_of_guests": 2,
+            "special_requests": "Table avec vue"
+        }
+
+    Remarque:
+        - L'API requiert une authentification avec un token.
+        - Si l'ID fourni ne correspond à aucune réservation, la fonction retournera une erreur 404.
+    """
+    name: str = "api_reservation_reservation"
+    description: str = "Get Informations on a reservation by id reservation"
+    if replica.active("reservations"):
+        reservation = replica.replica.get("reservations", id)
+        if reservation is not None:
+            return reservation
+    api_path = f"/reservations/{id}/"
+    response = hotel_api.get(api_path)
+    if tool_result.succes(response):
+        return response.json()
+    else:
+        return tool_result.erreur(response, f"trouver la réservation {id}")
+
+@tool
+@protege("lister les réservations du client")
+def get_reservation_by_id_client(id: int):
+    """
+    Récupère les informations sur les réservations d'un client spécifique à partir de son identifiant.
+
+    Args:
+        id (int): L'identifiant unique du client.
+
+    Returns:
+        list[dict]: Une liste de dictionnaires contenant les détails des réservations du client si la requête réussit (statut 200),
+                    sinon une erreur typée.
+
+    Exemples:
+        >>> get_reservation_by_id_client(45)
+        [
+            {
+                "id": 123,
+                "client": 45,
+                "restaurant": 12,
+                "date": "2025-03-23",
+                "meal": 7,
+                "number_of_guests": 2,
+                "special_requests": "Table avec vue"
+            },
+            {
+                "id": 124,
+                "client": 45,
+                "restaurant": 15,
+                "date": "2025-04-02",
+                "meal": 3,
+                "number_of_guests": 4,
+                "special_requests": "Anniversaire"
+            }
+        ]
+
+    Remarque:
+        - L'API requiert une authentification avec un token.
+        - Si le client n'a aucune réservation, la liste des résultats est vide.
+        - Cette requête peut retourner plusieurs réservations si le client en possède plusieurs.
+    """
+    name: str = "api_reservation_client"
+    description: str = "Get Informations on a reservation by id client"
+    if replica.active("reservations"):
+        reservations = replica.replica.reservations_du_client(id)
+        if reservations:
+            return replica.page(reservations)
+    api_path = "/reservations/"
+    response = hotel_api.get(api_path, params={"client": id})
+    if tool_result.succes(response):
+        return response.json()
+    else:
+        return tool_result.erreur(response, f"lister les réservations du client {id}")
+
+
+@tool
+@protege("modifier le client")
+def put_client(id_client: int, name_client: str, phone_number: str, room_number: str, special_requests: str):
+    """
+    Met à jour les informations d'un client existant dans la base de données de l'hôtel
+
+    Args:
+        id_client: Identifiant unique du client à modifier
+        name_client: Nom complet du client
+        phone_number: Numéro de téléphone du client
+        room_number: Numéro de chambre attribué au client
+        special_requests: Demandes particulières ou commentaires associés au client
+
+    Returns:
+        Les données du client mises à jour en cas de succès, une erreur typée en cas d'échec
+    """
+    name: str = "api_put_client"
+    description: str = "Put a client into the database"
+    api_path = f"/clients/{id_client}/"
+    try:
+        json = validation.client(name_client, phone_number, room_number, special_requests)
+    except validation.ErreurValidation as e:
+        return tool_result.erreur_validation(e, f"modifier le client {id_client}")
+    response = hotel_api.put(api_path, json=json)
+    if tool_result.succes(response, "PUT"):
+        if replica.active():
+            replica.replica.upsert("clients", response.json())
+        return response.json()
+    else:
+        return tool_result.erreur(response, f"modifier le client {id_client}")
+
+
+@tool
+@protege("supprimer le client")
+def delete_client(id_client: int):
+    """
+    Supprime un client de la base de données de l'hôtel
+
+    Args:
+        id_client: Identifiant unique du client à supprimer
+
+    Returns:
+        Un dictionnaire avec un message de confirmation en cas de succès,
+        ou un dictionnaire contenant les détails de l'erreur en cas d'échec
+    """
+    name: str = "api_delete_client"
+    description: str = "Delete a client from the database"
+    api_path = f"/clients/{id_client}/"
+    response = hotel_api.delete(api_path)
+
+    if tool_result.succes(response, "DELETE"):
+        if replica.active():
+            replica.replica.delete("clients", id_client)
+        return {"message": "Client successfully deleted"}
+    else:
+        return tool_result.erreur(response, f"supprimer le client {id_client}")
+
+
+@tool
+@protege("créer le client")
+def post_client(name_client: str, phone_number: str, room_number: str, special_requests: str):
+    """
+    Ajoute un nouveau client dans la base de données de l'hôtel.
+
+    Args:
+        name_client (str): Le nom complet du client.
+        phone_number (str): Le numéro de téléphone du client.
+        room_number (str): Le numéro de la chambre attribuée au client.
+        special_requests (str): Toute demande spécifique formulée par le client.
+
+    Returns:
+        dict: Le client créé si la requête réussit (statut 201),
+              sinon une erreur typée.
+
+    Exemples:
+        >>> post_client("Jean Dupont", "+33612345678", "205", "Oreillers supplémentaires")
+        {
+            "id": 1,
+            "name": "Jean Dupont",
+            "phone_number": "+33612345678",
+            "room_number": "205",
+            "special_requests": "Oreillers supplémentaires"
+        }
+
+    Remarque:
+        - L'API requiert une authentification avec un token.
+        - Assurez-vous que les informations du client sont correctes avant d'envoyer la requête.
+        - En cas d'échec de la requête (ex: problème réseau, données invalides), la fonction retournera une erreur
+          typée indiquant les champs à corriger.
+    """
+    name: str = "api_post_client"
+    description: str = "Post a client into the database"
+    api_path = "/clients/"
+    try:
+        json = validation.client(name_client, phone_number, room_number, special_requests)
+    except validation.ErreurValidation as e:
+        return tool_result.erreur_validation(e, "créer le client")
+    response = hotel_api.post(api_path, json=json)
+    if tool_result.succes(response, "POST"):
+        if replica.active():
+            replica.replica.upsert("clients", response.json())
+        return response.json()
+    else:
+        return tool_result.erreur(response, "créer le client")
+
+@tool
+@protege("trouver le client")
+def get_client_by_id(id: int):
+    """
+    Récupère les informations d'un client à partir de son identifiant unique.
+
+    Args:
+        id (int): L'identifiant du client à rechercher.
+
+    Returns:
+        dict: Un dictionnaire contenant les informations du client si la requête réussit (statut 200),
+              sinon une erreur typée.
+
+    Exemples:
+        >>> get_client_by_id(42)
+        {
+            "id": 42,
+            "name": "Alice Martin",
+            "phone_number": "+33698765432",
+            "room_number": "302",
+            "special_requests": "Vue sur la mer"
+        }
+
+    Remarque:
+        - L'API requiert une authentification avec un token.
+        - Assurez-vous que l'ID fourni est valide et existe dans la base de données.
+        - En cas d'échec de la requête (ex: ID inexistant, problème réseau), la fonction retournera une erreur typée.
+    """
+    name: str = "api_client_by_id"
+    description: str = "Get Informations on a client by id client"
+    if replica.active("clients"):
+        client = replica.replica.get("clients", id)
+        if client is not None:
+            return client
+    api_path = f"/clients/{id}/"
+    response = hotel_api.get(api_path)
+    if tool_result.succes(response):
+        return response.json()
+    else:
+        return tool_result.erreur(response, f"trouver le client {id}")
+
+@tool
+@protege("rechercher le client")
+def get_client_by_search(search: str):
+    """
+    Récupère les informations d'un client à partir de spécificité comme le nom du client.
+
+    Args:
+        search (str): spécificité comme le nom du client à rechercher.
+
+    Returns:
+        dict: Un dictionnaire contenant les informations du client si la requête réussit (statut 200),
+              sinon une erreur typée.
+
+    Exemples:
+        >>> get_client_by_search("George Dupont")
+        {
+          "id": 1535,
+          "name": "Georges Dupont",
+          "phone_number": "1234567890",
+          "room_number": "101",
+          "special_requests": "None"
+        }
+
+    Remarque:
+        - L'API requiert une authentification avec un token.
+        - Assurez-vous que l'ID fourni est valide et existe dans la base de données.
+        - En cas d'échec de la requête (ex: ID inexistant, problème réseau), la fonction retournera une erreur typée.
+    """
+    name: str = "api_client_search"
+    description: str = "Get Informations on a client by search"
+    if replica.active("clients"):
+        clients = replica.replica.chercher_clients(search)
+        if clients:
+            return replica.page(clients)
+    api_path = "/clients/"
+    response = hotel_api.get(api_path, params={"search": search})
+    if tool_result.succes(response):
+        return response.json()
+    else:
+        return tool_result.erreur(response, f"rechercher le client {search}")
+
+@tool
+@protege("lire le schéma de l'API")
+def get_schema():
+    """Get OpenApi3 schema for this API of https://app-584240518682.europe-west9.run.app/api/"""
+    name: str = "api_schema"
+    description: str = "Get OpenApi3 schema for this API of https://app-584240518682.europe-west9.run.app/api/"
+    api_path = "/schema/"
+    # Le schéma change rarement : gardé en cache comme le catalogue
+    schema = hotel_api.get_cached(api_path, params={"format": "json"}, ttl=SCHEMA_TTL)
+    return schema if schema is not None else tool_result.erreur_service(None, "lire le schéma de l'API")
+
+@tool
+@protege("vérifier la disponibilité")
+def check_availability(restaurant: str, date: str, meal: str, number_of_guests: int):
+    """
+    Vérifie en un seul appel s'il reste de la place dans un restaurant pour une date et un repas.
+
+    Args:
+        restaurant (str): Nom du restaurant (ex: "Le Belvedere") ou son identifiant.
+        date (str): Date au format YYYY-MM-DD ou en toutes lettres ("samedi", "demain").
+        meal (str): Repas ("Breakfast", "Lunch", "Dinner", "dîner"...) ou son identifiant.
+        number_of_guests (int): Nombre de convives.
+
+    Returns:
+        dict: capacité, places restantes ("remaining_seats") et "available" (True s'il
+              reste assez de places), avec les identifiants du restaurant et du repas
+              utilisables pour post_reservation ; ou {"error": ...} si le restaurant
+              ou le repas est inconnu, la date invalide ou passée, ou le nombre de
+              convives invalide.
+
+    Exemples:
+        >>> check_availability("Le Belvedere", "2025-03-28", "Dinner", 6)
+        {
+            "restaurant": "Le Belvedere",
+            "id_restaurant": 21,
+            "date": "2025-03-28",
+            "meal": "Dinner",
+            "id_meal": 21,
+            "opening_hours": "16:00-23:00",
+            "capacity": 60,
+            "remaining_seats": 42,
+            "available": true
+        }
+    """
+    name: str = "api_check_availability"
+    description: str = "Check remaining seats for a restaurant, date and meal"
+    try:
+        jour, convives = validation.creneau(date, number_of_guests)
+    except validation.ErreurValidation as e:
+        return tool_result.erreur_validation(e, "vérifier la disponibilité")
+    return capacity.index.disponibilite(restaurant, jour, meal, convives)
+
+def _nom(element):
+    return element["name"] if element else None
+
+
+def _resume_reservation(reservation):
+    """Réservation compacte, avec les noms du restaurant et du repas"""
+    return {
+        "id": reservation["id"],
+        "date": reservation["date"],
+        "restaurant": _nom(catalogue.trouver_restaurant(reservation["restaurant"])),
+        "id_restaurant": reservation["restaurant"],
+        "meal": _nom(catalogue.trouver_repas(reservation["meal"])),
+        "id_meal": reservation["meal"],
+        "number_of_guests": reservation["number_of_guests"],
+        "special_requests": reservation.get("special_requests") or "",
+    }
+
+
+def _resultats(data):
+    return data.get("results", []) if isinstance(data, dict) else data
+
+
+@tool
+@protege("retrouver les réservations du client")
+def find_guest_reservations(name: str):
+    """
+    Retrouve en un seul appel un client par son nom et toutes ses réservations, avec les noms
+    des restaurants et des repas. À utiliser plutôt que get_client_by_search puis
+    get_reservation_by_id_client.
+
+    Args:
+        name (str): Nom (ou partie du nom) du client, ex: "Georges Dupont".
+
+    Returns:
+        dict: {"clients": [{"id", "name", "room_number", "reservations": [...]}]}, chaque réservation
+              avec "id", "date", "restaurant", "meal", "number_of_guests", "special_requests" ;
+              ou une erreur typée si aucun client ne correspond.
+
+    Exemples:
+        >>> find_guest_reservations("Dupont")
+        {
+            "clients": [
+                {
+                    "id": 1535,
+                    "name": "Georges Dupont",
+                    "room_number": "101",
+                    "reservations": [
+                        {"id": 123, "date": "2025-03-23", "restaurant": "Le Belvedere", "id_restaurant": 21,
+                         "meal": "Dinner", "id_meal": 21, "number_of_guests": 2, "special_requests": "Table avec vue"}
+                    ]
+                }
+            ]
+        }
+    """
+    # Pas de variable `name` ici : elle masquerait le paramètre
+    description: str = "Find a guest by name with all their reservations"
+    trouves = get_client_by_search.func(name)
+    if isinstance(trouves, dict) and "retryable" in trouves:
+        return trouves
+    clients = _resultats(trouves)[:MAX_CLIENTS_TROUVES]
+    if not clients:
+        return tool_result.erreur_validation(validation.ErreurValidation(
+            {"name": [f"Aucun client ne correspond à {name!r}. Vérifie l'orthographe auprès du client."]}),
+            "retrouver les réservations du client")
+
+    # Réservations de chaque client en parallèle (le contexte du tour suit : cache des lectures anticipées)
+    futures = [_pool.submit(contextvars.copy_context().run, get_reservation_by_id_client.func, c["id"])
+               for c in clients]
+    resultat = []
+    for client, future in zip(clients, futures):
+        reservations = future.result()
+        if isinstance(reservations, dict) and "retryable" in reservations:
+            return reservations
+        resultat.append({
+            "id": client["id"],
+            "name": client["name"],
+            "room_number": client.get("room_number"),
+            "reservations": [_resume_reservation(r) for r in _resultats(reservations)],
+        })
+    return {"clients": resultat}
+
+
+@tool
+@protege("modifier la réservation")
+def rebook_reservation(id_reservation: int, date: str = "", restaurant: int | str = "", meal: int | str = "",
+                       number_of_guests: int = 0, special_requests: str | None = None):
+    """
+    Modifie une réservation en un seul appel : relit la réservation, vérifie la disponibilité du
+    nouveau créneau puis enregistre la modification. Seuls les champs fournis changent.
+
+    Args:
+        id_reservation (int): Identifiant de la réservation à modifier.
+        date (str, optional): Nouvelle date (YYYY-MM-DD ou en toutes lettres : "samedi", "12 juin").
+        restaurant (int | str, optional): Nouveau restaurant (nom ou identifiant).
+        meal (int | str, optional): Nouveau repas (nom ou identifiant : "Dinner", "dîner"...).
+        number_of_guests (int, optional): Nouveau nombre de convives.
+        special_requests (str, optional): Nouvelles demandes particulières.
+
+    Returns:
+        dict: La réservation modifiée (noms du restaurant et du repas inclus) et "previous", l'ancienne
+              version ; ou une erreur typée (réservation introuvable, créneau complet, champ invalide).
+    """
+    name: str = "api_rebook_reservation"
+    description: str = "Change date, restaurant, meal or guests of a reservation in one step"
+    actuelle = get_reservation_by_id_reservation.func(id_reservation)
+    if isinstance(actuelle, dict) and "retryable" in actuelle:
+        return actuelle
+    try:
+        nouvelle = validation.reservation(
+            actuelle["client"], restaurant or actuelle["restaurant"], date or actuelle["date"],
+            meal or actuelle["meal"], number_of_guests or actuelle["number_of_guests"],
+            actuelle.get("special_requests") if special_requests is None else special_requests)
+    except validation.ErreurValidation as e:
+        return tool_result.erreur_validation(e, f"modifier la réservation {id_reservation}")
+    except validation.CatalogueIndisponible as e:
+        return tool_result.erreur_service(e, f"modifier la réservation {id_reservation}")
+
+    disponibilite = capacity.index.disponibilite(nouvelle["restaurant"], nouvelle["date"], nouvelle["meal"],
+                                                 nouvelle["number_of_guests"])
+    if "remaining_seats" not in disponibilite:
+        # Restaurant ou repas introuvable dans le catalogue : rien à comparer
+        return disponibilite
+    restantes = disponibilite["remaining_seats"]
+    meme_creneau = (int(actuelle["restaurant"]), str(actuelle["date"]), int(actuelle["meal"])) == \
+        (nouvelle["restaurant"], nouvelle["date"], nouvelle["meal"])
+    if meme_creneau:
+        # Les places de la réservation elle-même sont libérées par la modification
+        restantes += int(actuelle["number_of_guests"])
+    if restantes < nouvelle["number_of_guests"]:
+        return tool_result.erreur_validation(validation.ErreurValidation(
+            {"number_of_guests": [f"Plus que {restantes} places pour ce créneau. Propose une autre date, "
+                                  "un autre repas ou un autre restaurant au client."]}),
+            f"modifier la réservation {id_reservation}")
+
+    modifiee = put_reservation.func(id_reservation, nouvelle["client"], nouvelle["restaurant"], nouvelle["date"],
+                                    nouvelle["meal"], nouvelle["number_of_guests"], nouvelle["special_requests"])
+    if isinstance(modifiee, dict) and "retryable" in modifiee:
+        return modifiee
+    return dict(_resume_reservation(modifiee), previous=_resume_reservation(actuelle))
+
+@tool
+def search_duckduckgo(search: str):
+    """Search on the Web"""
+    name: str = "api_duckduckgo"
+    description: str = "Search on the web"
+    return web_search.rechercher(search)
+
+
+tools = [get_restaurants, get_spas, get_meals, put_client, delete_client, post_client, get_client_by_id, get_client_by_search, put_reservation, delete_reservation, post_reservation, get_reservation_by_id_reservation, get_reservation_by_id_client, check_availability, get_schema, search_duckduckgo, find_guest_reservations, rebook_reservation]
+
+# Pendant une requête profilée (profiling.py), les outils exécutés dans un
+# autre thread que la requête (ToolNode, appels parallèles) sont aussi profilés
+for _outil in tools:
+    _outil.func = profiling.dans_le_thread(_outil.func)
@@ -0,0 +1,158 @@
+"""
+Clés d'idempotence et registre local des écritures vers l'API hôtel.
+
+Un tour relancé après une erreur (voir executer_tour) rejoue les écritures
+de la tentative précédente. Chaque écriture (POST, PUT, DELETE) reçoit donc
+une clé calculée à partir de l'opération logique : le tour en cours, la
+méthode, le chemin, les données envoyées (déjà normalisées par
+validation.py) et son rang parmi les écritures identiques de la tentative.
+La n-ième écriture identique d'une tentative rejoue la n-ième de la
+tentative précédente ; une nouvelle écriture identique dans la même
+tentative (PUT 2, PUT 5, PUT 2) est bien exécutée.
+
+La clé est envoyée à l'API (en-tête Idempotency-Key) et, après un succès,
+la réponse est enregistrée dans un registre SQLite local : une écriture
+rejouée renvoie la réponse enregistrée sans rappeler l'API.
+
+Le tour est identifié par la clé Idempotency-Key de la requête /chat quand
+le client en fournit une, sinon par un identifiant aléatoire. La réponse
+d'un tour réussi est aussi enregistrée sous cette clé : une requête /chat
+renvoyée reçoit la même réponse sans relancer l'agent (voir ask_thread).
+"""
+import contextvars
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+import requests
+
+LEDGER_DB = os.getenv("KIMRAU_LEDGER_DB", "kimrau_ledger.db")
+# Durée de conservation des écritures enregistrées (secondes)
+LEDGER_TTL = float(os.getenv("KIMRAU_LEDGER_TTL", str(24 * 3600)))
+# Les entrées expirées sont supprimées toutes les N écritures enregistrées
+PURGE = 500
+
+# Opération logique en cours (un tour de conversation)
+_operation = contextvars.ContextVar("operation", default=None)
+# Tentative en cours du tour (partagée avec les threads des outils par le contexte)
+_tentative = contextvars.ContextVar("tentative", default=None)
+
+
+class _Tentative:
+    """Rang de chaque écriture parmi les écritures identiques de la tentative"""
+
+    def __init__(self):
+        self._occurrences = {}
+        self._lock = threading.Lock()
+
+    def rang(self, empreinte) -> int:
+        with self._lock:
+            rang = self._occurrences.get(empreinte, 0)
+            self._occurrences[empreinte] = rang + 1
+            return rang
+
+
+@contextmanager
+def operation(cle=None):
+    """Portée des clés d'idempotence : un tour, tentatives comprises"""
+    jeton = _operation.set(cle or uuid.uuid4().hex)
+    try:
+        yield
+    finally:
+        _operation.reset(jeton)
+
+
+@contextmanager
+def tentative():
+    """Une tentative du tour : les rangs des écritures repartent de zéro"""
+    jeton = _tentative.set(_Tentative())
+    try:
+        yield
+    finally:
+        _tentative.reset(jeton)
+
+
+def cle(method: str, path: str, corps=None):
+    """Clé d'idempotence d'une écriture, None hors d'une opération"""
+    portee = _operation.get()
+    if portee is None:
+        return None
+    donnees = json.dumps(corps, sort_keys=True, ensure_ascii=False, default=str)
+    empreinte = f"{method}\n{path}\n{donnees}"
+    courante = _tentative.get()
+    rang = courante.rang(empreinte) if courante is not None else 0
+    return hashlib.sha256(f"{portee}\n{rang}\n{empreinte}".encode()).hexdigest()
+
+
+class Ledger:
+    """
+    Args:
+        path: Fichier SQLite du registre
+        ttl: Durée de conservation des écritures (secondes)
+    """
+
+    def __init__(self, path, ttl=LEDGER_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._local = threading.local()
+        self._ecritures = 0
+
+    def _db(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS operations (key TEXT PRIMARY KEY, method TEXT NOT NULL, "
+                         "path TEXT NOT NULL, status INTEGER NOT NULL, content_type TEXT, body BLOB, "
+                         "created_at REAL NOT NULL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS tours (key TEXT PRIMARY KEY, response TEXT NOT NULL, "
+                         "created_at REAL NOT NULL)")
+            self._local.conn = conn
+        return conn
+
+    def lire(self, cle_operation):
+        """Réponse enregistrée pour la clé (requests.Response), None si l'écriture n'a pas encore réussi"""
+        row = self._db().execute("SELECT status, content_type, body FROM operations WHERE key = ? AND created_at > ?",
+                                 (cle_operation, time.time() - self.ttl)).fetchone()
+        if row is None:
+            return None
+        response = requests.Response()
+        response.status_code, response._content = row[0], row[2] or b""
+        if row[1]:
+            response.headers["Content-Type"] = row[1]
+        response.encoding = "utf-8"
+        return response
+
+    def enregistrer(self, cle_operation, method, path, response):
+        self._db().execute(
+            "INSERT OR REPLACE INTO operations (key, method, path, status, content_type, body, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (cle_operation, method, path, response.status_code, response.headers.get("Content-Type"),
+             response.content, time.time()))
+        self._purger()
+
+    def lire_tour(self, cle_tour):
+        """Réponse enregistrée d'un tour /chat, None si le tour n'a pas encore réussi"""
+        row = self._db().execute("SELECT response FROM tours WHERE key = ? AND created_at > ?",
+                                 (cle_tour, time.time() - self.ttl)).fetchone()
+        return row[0] if row else None
+
+    def enregistrer_tour(self, cle_tour, reponse):
+        self._db().execute("INSERT OR REPLACE INTO tours (key, response, created_at) VALUES (?, ?, ?)",
+                           (cle_tour, reponse, time.time()))
+        self._purger()
+
+    def _purger(self):
+        self._ecritures += 1
+        if self._ecritures % PURGE == 0:
+            limite = time.time() - self.ttl
+            self._db().execute("DELETE FROM operations WHERE created_at <= ?", (limite,))
+            self._db().execute("DELETE FROM tours WHERE created_at <= ?", (limite,))
+
+
+ledger = Ledger(LEDGER_DB)
@@ -0,0 +1,90 @@
+"""
+Boucle d'agent minimale (appel du modèle, exécution des outils), alternative
+à `create_react_agent` pour les déploiements à fort débit.
+
+`LeanAgent.stream()` produit les mêmes mises à jour que le graphe LangGraph
+en mode "updates" ({"agent": {"messages": [...]}}, {"tools": {...}}) : le
+routeur de modèles et `StreamProcessor` l'utilisent sans changement. Pas de
+canaux, de checkpoints ni de copie de l'état à chaque étape : l'historique
+du tour est une seule liste à laquelle on ajoute les nouveaux messages.
+
+Activée avec KIMRAU_ENGINE=lean ; LangGraph reste le moteur par défaut.
+"""
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain_core.messages import AIMessage, ToolMessage, convert_to_messages
+from langgraph.errors import GraphRecursionError
+from langgraph.prebuilt.tool_node import TOOL_CALL_ERROR_TEMPLATE, msg_content_output
+
+# Limite d'étapes par défaut, comme LangGraph
+RECURSION_LIMIT = 25
+
+_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="lean-tools")
+
+
+class LeanAgent:
+    """
+    Args:
+        model: Modèle de chat capable d'appeler des outils
+        tools: Outils LangChain proposés au modèle
+    """
+
+    def __init__(self, model, tools):
+        self.model = model.bind_tools(tools)
+        self.tools = {t.name: t for t in tools}
+
+    def _outil(self, call):
+        """Exécute un appel d'outil ; les erreurs sont renvoyées au modèle comme le fait ToolNode"""
+        outil = self.tools.get(call["name"])
+        if outil is None:
+            contenu = f"Error: {call['name']} is not a valid tool, try one of [{', '.join(self.tools)}]."
+            return ToolMessage(contenu, name=call["name"], tool_call_id=call["id"], status="error")
+        try:
+            resultat = outil.invoke(call["args"])
+        except Exception as e:
+            contenu = TOOL_CALL_ERROR_TEMPLATE.format(error=repr(e))
+            return ToolMessage(contenu, name=call["name"], tool_call_id=call["id"], status="error")
+        return ToolMessage(msg_content_output(resultat), name=call["name"], tool_call_id=call["id"])
+
+    def _outils(self, tool_calls):
+        if len(tool_calls) == 1:
+            return [self._outil(tool_calls[0])]
+        # Appels parallèles : chaque thread reprend le contexte du tour (cache des lectures anticipées)
+        futures = [_pool.submit(contextvars.copy_context().run, self._outil, call) for call in tool_calls]
+        return [future.result() for future in futures]
+
+    def stream(self, inputs, config=None, stream_mode="updates"):
+        """
+        Exécute la boucle modèle -> outils jusqu'à une réponse sans appel d'outil.
+
+        Raises:
+            GraphRecursionError: le nombre d'étapes dépasse `recursion_limit`
+        """
+        limite = (config or {}).get("recursion_limit", RECURSION_LIMIT)
+        messages = convert_to_messages(inputs["messages"])
+        etapes = 0
+        while True:
+            etapes += 1
+            if etapes > limite:
+                raise GraphRecursionError(f"Recursion limit of {limite} reached without hitting a stop condition.")
+            message = self.model.invoke(messages)
+            messages.append(message)
+            yield {"agent": {"messages": [message]}}
+            if not isinstance(message, AIMessage) or not message.tool_calls:
+                return
+
+            etapes += 1
+            if etapes > limite:
+                raise GraphRecursionError(f"Recursion limit of {limite} reached without hitting a stop condition.")
+            resultats = self._outils(message.tool_calls)
+            messages.extend(resultats)
+            yield {"tools": {"messages": resultats}}
+
+    def invoke(self, inputs, config=None):
+        """Exécute un tour complet ; renvoie {"messages": [...]} comme le graphe"""
+        messages = convert_to_messages(inputs["messages"])
+        for update in self.stream(inputs, config):
+            for data in update.values():
+                messages.extend(data["messages"])
+        return {"messages": messages}
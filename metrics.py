@@ -0,0 +1,73 @@
+"""
+Métriques internes du processus (compteurs, jauges, distributions).
+
+Les valeurs sont exposées en JSON par la route /metrics de api.py. En mode
+multi-processus, chaque worker publie ses propres métriques.
+"""
+import threading
+from collections import deque
+
+_lock = threading.Lock()
+_counters = {}
+_gauges = {}
+_histograms = {}
+
+# Nombre d'observations gardées par distribution pour les percentiles
+RESERVOIR = 1024
+
+
+def incr(name: str, value: float = 1):
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def gauge(name: str, value: float):
+    with _lock:
+        _gauges[name] = value
+
+
+def observe(name: str, value: float):
+    """Ajoute une observation (durée en secondes, nombre d'étapes...) à une distribution"""
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = {"count": 0, "sum": 0.0, "max": 0.0, "recent": deque(maxlen=RESERVOIR)}
+        histogram["count"] += 1
+        histogram["sum"] += value
+        histogram["max"] = max(histogram["max"], value)
+        histogram["recent"].append(value)
+
+
+def percentile(values, p: float):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p / 100 * len(values)))]
+
+
+def _resume(histogram):
+    recent = list(histogram["recent"])
+    return {
+        "count": histogram["count"],
+        "mean": round(histogram["sum"] / histogram["count"], 4) if histogram["count"] else 0.0,
+        "max": round(histogram["max"], 4),
+        "p50": round(percentile(recent, 50), 4),
+        "p90": round(percentile(recent, 90), 4),
+        "p99": round(percentile(recent, 99), 4),
+    }
+
+
+def snapshot():
+    with _lock:
+        return {
+            "counters": dict(_counters),
+            "gauges": dict(_gauges),
+            "histograms": {name: _resume(h) for name, h in _histograms.items()},
+        }
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _gauges.clear()
+        _histograms.clear()
@@ -0,0 +1,282 @@
+"""
+Backend de l'hôtel simulé et modèle factice, pour les benchmarks et tests de charge.
+
+- `app` : API Flask en mémoire qui reproduit les routes utilisées par les
+  outils (restaurants, spas, repas, clients, réservations)
+- `FakeHotelModel` : modèle de chat scripté qui appelle les outils selon des
+  mots clés, sans réseau ni clé Mistral
+
+Lancer l'agent sur le backend simulé :
+    HOTEL_API_URL=http://127.0.0.1:52002/api KIMRAU_MODEL=fake python api.py
+"""
+import itertools
+import json
+import os
+import random
+import re
+import threading
+import time
+import uuid
+
+from flask import Flask, jsonify, request
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+# Latence simulée de chaque requête (secondes)
+MOCK_LATENCY = float(os.getenv("MOCK_LATENCY", "0"))
+# Queue de latence (démarrage à froid d'une instance Cloud Run) : une requête sur
+# 1 / MOCK_SLOW_RATE attend MOCK_SLOW_LATENCY secondes de plus
+MOCK_SLOW_RATE = float(os.getenv("MOCK_SLOW_RATE", "0"))
+MOCK_SLOW_LATENCY = float(os.getenv("MOCK_SLOW_LATENCY", "1"))
+
+RESTAURANTS = [
+    {"id": 19, "name": "Le Maison Royale",
+     "description": "Une expérience gastronomique raffinée mettant en vedette les saveurs de la cuisine française contemporaine",
+     "capacity": 80, "opening_hours": "07:00-23:00", "location": "Rez-de-chaussée", "is_active": True},
+    {"id": 20, "name": "Bistrot de la piscine", "description": "Une cuisine décontractée aux saveurs méditerranéennes",
+     "capacity": 40, "opening_hours": "11:00-22:00", "location": "Terrasse de la piscine", "is_active": True},
+    {"id": 21, "name": "Le Belvedere", "description": "Une table d'exception avec vue panoramique sur la ville",
+     "capacity": 60, "opening_hours": "16:00-23:00", "location": "13ème étage", "is_active": True},
+]
+
+SPAS = [
+    {"id": 1, "name": "Relaxation Spa",
+     "description": "Un spa dédié à la relaxation avec des massages professionnels et des bains chauds.",
+     "location": "123 Wellness Street, Paris, France", "phone_number": "+33 1 23 45 67 89",
+     "email": "contact@relaxationspa.fr", "opening_hours": "Lundi - Dimanche : 09:00 - 20:00",
+     "created_at": "2024-12-08T15:32:43.062749+01:00", "updated_at": "2024-12-08T15:32:43.062754+01:00"},
+    {"id": 2, "name": "Thermal Bliss Spa",
+     "description": "Découvrez nos sources thermales naturelles et nos soins corporels personnalisés.",
+     "location": "456 Thermal Avenue, Lyon, France", "phone_number": "+33 4 56 78 90 12",
+     "email": "info@thermalblissspa.fr", "opening_hours": "Lundi - Vendredi : 10:00 - 18:00",
+     "created_at": "2024-12-08T15:32:43.063120+01:00", "updated_at": "2024-12-08T15:32:43.063124+01:00"},
+]
+
+MEALS = [{"id": 19, "name": "Breakfast"}, {"id": 20, "name": "Lunch"}, {"id": 21, "name": "Dinner"}]
+
+CLIENTS = {
+    1535: {"id": 1535, "name": "Georges Dupont", "phone_number": "1234567890", "room_number": "101",
+           "special_requests": "None"},
+    42: {"id": 42, "name": "Alice Martin", "phone_number": "+33698765432", "room_number": "302",
+         "special_requests": "Vue sur la mer"},
+}
+
+RESERVATIONS = {
+    123: {"id": 123, "client": 1535, "restaurant": 21, "date": "2025-03-23", "meal": 21, "number_of_guests": 2,
+          "special_requests": "Table avec vue"},
+    124: {"id": 124, "client": 42, "restaurant": 19, "date": "2025-04-02", "meal": 20, "number_of_guests": 4,
+          "special_requests": "Anniversaire"},
+}
+
+_ids = itertools.count(1000)
+_lock = threading.Lock()
+
+app = Flask(__name__)
+
+
+@app.before_request
+def _latence():
+    if MOCK_LATENCY:
+        time.sleep(MOCK_LATENCY)
+    if MOCK_SLOW_RATE and random.random() < MOCK_SLOW_RATE:
+        time.sleep(MOCK_SLOW_LATENCY)
+
+
+def _page(results):
+    return jsonify({"count": len(results), "next": None, "previous": None, "results": results})
+
+
+def _horodater(data):
+    now = time.strftime("%Y-%m-%dT%H:%M:%S+00:00", time.gmtime())
+    data.setdefault("created_at", now)
+    data["updated_at"] = now
+    return data
+
+
+@app.get("/api/restaurants/")
+def restaurants():
+    return _page(RESTAURANTS)
+
+
+@app.get("/api/spas/")
+def spas():
+    return jsonify(SPAS)
+
+
+@app.get("/api/meals/")
+def meals():
+    return _page(MEALS)
+
+
+def _valider_reservation(data):
+    """Erreurs par champ au format DRF, comme l'API réelle"""
+    erreurs = {}
+    if not re.fullmatch(r"\d{4}-\d{2}-\d{2}", str(data.get("date", ""))):
+        erreurs["date"] = ["Date has wrong format. Use one of these formats instead: YYYY-MM-DD."]
+    if data.get("client") not in CLIENTS:
+        erreurs["client"] = [f'Invalid pk "{data.get("client")}" - object does not exist.']
+    if data.get("restaurant") not in [r["id"] for r in RESTAURANTS]:
+        erreurs["restaurant"] = [f'Invalid pk "{data.get("restaurant")}" - object does not exist.']
+    if str(data.get("meal")) not in [str(m["id"]) for m in MEALS]:
+        erreurs["meal"] = [f'Invalid pk "{data.get("meal")}" - object does not exist.']
+    if not isinstance(data.get("number_of_guests"), int) or data["number_of_guests"] < 1:
+        erreurs["number_of_guests"] = ["Ensure this value is greater than or equal to 1."]
+    return erreurs
+
+
+def _valider_client(data):
+    return {} if data.get("name") else {"name": ["This field may not be blank."]}
+
+
+def _collection(store, filtre, valider):
+    if request.method == "GET":
+        return _page([item for item in list(store.values()) if filtre(item)])
+    erreurs = valider(request.get_json())
+    if erreurs:
+        return jsonify(erreurs), 400
+    data = _horodater(dict(request.get_json(), id=next(_ids)))
+    with _lock:
+        store[data["id"]] = data
+    return jsonify(data), 201
+
+
+def _element(store, id, valider):
+    with _lock:
+        item = store.get(id)
+        if item is None:
+            return jsonify({"detail": "Not found."}), 404
+        if request.method == "DELETE":
+            del store[id]
+            return "", 204
+        if request.method == "PUT":
+            erreurs = valider(dict(item, **request.get_json()))
+            if erreurs:
+                return jsonify(erreurs), 400
+            item = store[id] = _horodater(dict(item, **request.get_json(), id=id))
+    return jsonify(item)
+
+
+@app.route("/api/clients/", methods=["GET", "POST"])
+def clients():
+    search = request.args.get("search", "").lower()
+    return _collection(CLIENTS, lambda c: search in c["name"].lower(), _valider_client)
+
+
+@app.route("/api/clients/<int:id>/", methods=["GET", "PUT", "DELETE"])
+def client(id):
+    return _element(CLIENTS, id, _valider_client)
+
+
+@app.route("/api/reservations/", methods=["GET", "POST"])
+def reservations():
+    client_id = request.args.get("client", type=int)
+    return _collection(RESERVATIONS, lambda r: client_id is None or r["client"] == client_id, _valider_reservation)
+
+
+@app.route("/api/reservations/<int:id>/", methods=["GET", "PUT", "DELETE"])
+def reservation(id):
+    return _element(RESERVATIONS, id, _valider_reservation)
+
+
+def run_mock_backend(host="127.0.0.1", port=52002):
+    """
+    Démarre le backend simulé dans un thread.
+
+    Returns:
+        Un tuple (serveur werkzeug, URL de base de l'API)
+    """
+    from werkzeug.serving import make_server
+
+    server = make_server(host, port, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_port}/api"
+
+
+# --- Modèle factice ---------------------------------------------------------
+
+# (expression régulière sur le message du client, outil appelé, arguments)
+REGLES = [
+    (r"restaurant", "get_restaurants", lambda m: {}),
+    (r"\bspas?\b", "get_spas", lambda m: {}),
+    (r"menu|repas", "get_meals", lambda m: {}),
+    (r"client n°\s*(\d+)", "get_client_by_id", lambda m: {"id": int(m.group(1))}),
+    (r"réservation n°\s*(\d+)", "get_reservation_by_id_reservation", lambda m: {"id": int(m.group(1))}),
+    (r"réservations (?:au nom )?de (\w+(?: \w+)?)", "find_guest_reservations", lambda m: {"name": m.group(1)}),
+    (r"réserver pour (\d+) (?:personnes? )?le (\S+)", "post_reservation",
+     lambda m: {"id_client": 1535, "id_restaurant": 21, "date": m.group(2), "id_meal": "21",
+                "number_of_guests": int(m.group(1)), "special_requests": ""}),
+]
+
+OUTILS_CATALOGUE = {"get_restaurants", "get_spas", "get_meals"}
+
+# Rappels du même outil au-delà desquels le modèle abandonne
+MAX_RAPPELS = 2
+
+
+class FakeHotelModel(BaseChatModel):
+    """
+    Modèle de chat scripté : appelle un outil choisi par mots clés, puis
+    répond en résumant le résultat de l'outil.
+
+    Comme un vrai modèle, il rappelle le même outil quand le résultat ne dit
+    pas pourquoi l'appel a échoué (`null`, erreur sans statut), et renonce
+    tout de suite devant une erreur typée non temporaire (voir tool_result.py).
+    """
+
+    latency: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-hotel"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+        dernier = messages[-1]
+        message = None
+        if isinstance(dernier, ToolMessage):
+            message = self._apres_outil(messages, dernier)
+        else:
+            # Comme le vrai modèle, répondre sans outil quand le catalogue est dans le contexte système
+            catalogue = any(isinstance(m, SystemMessage) and "Catalogue de l'hôtel" in str(m.content)
+                            for m in messages)
+            for motif, outil, arguments in REGLES:
+                match = re.search(motif, str(dernier.content), re.IGNORECASE)
+                if match and catalogue and outil in OUTILS_CATALOGUE:
+                    message = AIMessage(content="D'après notre catalogue : ...")
+                    break
+                if match:
+                    message = AIMessage(content="", tool_calls=[
+                        {"name": outil, "args": arguments(match), "id": uuid.uuid4().hex[:9]}])
+                    break
+        if message is None:
+            message = AIMessage(content="Bienvenue à l'Hôtel California, que puis-je faire pour vous ?")
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _apres_outil(self, messages, resultat):
+        try:
+            data = json.loads(resultat.content)
+        except ValueError:
+            data = resultat.content
+        type_erreur = isinstance(data, dict) and "error" in data and "retryable" in data
+        if type_erreur and not data["retryable"]:
+            return AIMessage(content=f"Je ne peux pas donner suite : {data.get('validation') or data['error']}")
+        if data is None or (isinstance(data, dict) and "error" in data) or resultat.status == "error":
+            # Résultat inexplicable (ou erreur temporaire) : rappeler le même outil
+            debut_tour = max(i for i, m in enumerate(messages) if isinstance(m, HumanMessage))
+            appels = [m for m in messages[debut_tour:] if isinstance(m, AIMessage) and m.tool_calls]
+            dernier_appel = appels[-1].tool_calls[0]
+            rappels = sum(1 for m in appels if m.tool_calls[0]["name"] == dernier_appel["name"]) - 1
+            if rappels < MAX_RAPPELS:
+                return AIMessage(content="", tool_calls=[
+                    dict(dernier_appel, id=uuid.uuid4().hex[:9])])
+            return AIMessage(content="Je suis désolé, je n'ai pas pu obtenir cette information.")
+        return AIMessage(content=f"Voici ce que j'ai trouvé : {resultat.content[:200]}")
+
+
+if __name__ == "__main__":
+    app.run(host="127.0.0.1", port=52002, threaded=True)
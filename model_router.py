@@ -0,0 +1,260 @@
+"""
+Cascade de modèles : un modèle rapide et peu coûteux par défaut, un modèle
+plus capable seulement quand le tour le demande.
+
+Un tour part sur le premier niveau, sauf si le message annonce une écriture
+(réserver, modifier, annuler...). Il passe au niveau suivant quand :
+- le modèle rapide veut appeler un outil d'écriture (l'appel n'est pas exécuté,
+  le modèle supérieur reprend à partir des résultats déjà obtenus) ;
+- un outil renvoie une erreur ;
+- la réponse finale est vide ou hésitante (faible confiance) ;
+- l'appel au modèle rapide échoue (délai dépassé, erreur réseau, coupe-circuit
+  du modèle rapide ouvert).
+
+Chaque niveau a un budget de latence (délai maximal d'un appel au modèle) et
+le tour entier a un budget : on n'escalade que s'il reste de quoi attendre
+le niveau supérieur. Le niveau qui a traité chaque tour est publié dans les
+métriques et dans le journal des tours.
+
+Un tour est aussi borné en nombre d'étapes et en durée : une fois l'une des
+limites atteinte, l'agent répond au mieux avec les résultats d'outils déjà
+obtenus au lieu de boucler.
+"""
+import json
+import time
+
+from langchain_core.messages import AIMessage, ToolMessage
+from langgraph.errors import GraphRecursionError
+from langgraph.prebuilt import create_react_agent
+
+import metrics
+from lean_agent import LeanAgent
+
+# Outils qui modifient des données : confiés au niveau supérieur
+OUTILS_COMPLEXES = {
+    "post_reservation", "put_reservation", "delete_reservation",
+    "post_client", "put_client", "delete_client", "rebook_reservation",
+}
+
+# Verbes d'écriture (voir SYSTEM_INSTRUCTION) : le tour part directement au niveau supérieur
+# (verbes seulement : "ma réservation n° 12" reste une lecture)
+MOTS_COMPLEXES = ["réserver", "reserver", "modifi", "chang", "annul", "supprim", "déplac", "deplac",
+                  "mettre à jour", "mettre a jour", "créer", "creer", "ajout"]
+
+# Formulations d'une réponse peu sûre d'elle
+HESITATIONS = ["je ne sais pas", "je ne suis pas sûr", "je ne suis pas sur", "je ne peux pas",
+               "je n'ai pas pu", "pas en mesure"]
+
+# Consigne du dernier appel quand le tour a épuisé ses étapes
+CONSIGNE_PARTIELLE = ("(Consigne interne, pas du client) Le nombre d'étapes de ce tour est épuisé. "
+                      "Réponds maintenant au client avec les informations déjà obtenues, sans appeler "
+                      "d'outil, et indique ce qui reste à vérifier.")
+REPONSE_PARTIELLE = "Je n'ai pas pu terminer toutes les vérifications, mais voici ce que j'ai trouvé :"
+REPONSE_INCOMPLETE = ("Je suis désolé, je n'ai pas pu terminer votre demande à temps. "
+                      "Pourriez-vous la reformuler ou la préciser ?")
+
+
+class Tier:
+    """
+    Args:
+        name: Nom du niveau, repris dans les métriques ("fast", "strong")
+        model: Modèle de chat (avec ses outils liés par le graphe)
+        tools: Outils de l'agent
+        budget_s: Délai maximal attendu d'un tour sur ce niveau
+        engine: "langgraph" (create_react_agent) ou "lean" (boucle minimale, voir lean_agent.py)
+    """
+
+    def __init__(self, name, model, tools, budget_s, engine="langgraph"):
+        self.name = name
+        self.model = model
+        self.budget_s = budget_s
+        if engine == "lean":
+            self.graph = LeanAgent(model, tools)
+        else:
+            self.graph = create_react_agent(model, tools=tools)
+
+
+def niveau_initial(user_message, nb_tiers) -> int:
+    """Niveau de départ : le plus haut si le client demande une écriture"""
+    texte = user_message.lower()
+    if nb_tiers > 1 and any(mot in texte for mot in MOTS_COMPLEXES):
+        return nb_tiers - 1
+    return 0
+
+
+def raison_escalade(message):
+    """
+    Raison de passer au niveau supérieur après `message`, sinon None.
+
+    Returns:
+        Un tuple (raison, garder) : `garder` indique si le message doit rester
+        dans l'historique transmis au niveau supérieur
+    """
+    if isinstance(message, ToolMessage):
+        if message.status == "error" or str(message.content).lstrip().startswith('{"error"'):
+            return "tool_error", True
+        return None
+    if not isinstance(message, AIMessage):
+        return None
+    if any(call["name"] in OUTILS_COMPLEXES for call in message.tool_calls):
+        # Appel non exécuté : le niveau supérieur décidera lui-même
+        return "complex_tool", False
+    if message.invalid_tool_calls:
+        return "invalid_tool_call", False
+    if not message.tool_calls:
+        texte = str(message.content).strip().lower()
+        if not texte or any(h in texte for h in HESITATIONS):
+            return "low_confidence", False
+    return None
+
+
+def resume_outils(messages, limite=6) -> str:
+    """Texte lisible tiré des résultats d'outils obtenus (sans JSON brut)"""
+    lignes = []
+    for message in messages:
+        if not isinstance(message, ToolMessage) or message.status == "error":
+            continue
+        try:
+            data = json.loads(message.content)
+        except (TypeError, ValueError):
+            data = message.content
+        if isinstance(data, dict) and "results" in data:
+            data = data["results"]
+        if isinstance(data, list):
+            noms = [str(e.get("name", e.get("id", ""))) for e in data if isinstance(e, dict)]
+            if noms:
+                lignes.append(", ".join(noms[:10]))
+        elif isinstance(data, dict) and "error" not in data:
+            lignes.append(", ".join(f"{k} : {v}" for k, v in list(data.items())[:limite] if v not in (None, "")))
+        elif isinstance(data, str) and data.strip() and data != "null":
+            lignes.append(data.strip()[:300])
+    # Un modèle qui boucle répète les mêmes lectures : une ligne par résultat distinct
+    return "\n".join(f"- {ligne}" for ligne in dict.fromkeys(lignes))
+
+
+class ModelRouter:
+    """
+    Args:
+        tiers: Niveaux du moins coûteux au plus capable
+        turn_budget_s: Budget de latence d'un tour, escalades comprises
+        max_steps: Nombre maximal d'étapes du graphe (appels LLM et outils) par tour
+        deadline_s: Durée maximale d'un tour ; au-delà, réponse partielle
+    """
+
+    def __init__(self, tiers, turn_budget_s, max_steps=12, deadline_s=60.0):
+        self.tiers = tiers
+        self.turn_budget_s = turn_budget_s
+        self.max_steps = max_steps
+        self.deadline_s = deadline_s
+
+    def executer(self, messages, processor, user_message="", echeance=None):
+        """
+        Exécute un tour en escaladant si besoin ; `processor` (StreamProcessor)
+        reçoit toutes les étapes, tous niveaux confondus.
+
+        Args:
+            echeance: Fin du tour (time.monotonic()), commune à toutes ses
+                tentatives ; par défaut `deadline_s` après le début de l'appel
+
+        Returns:
+            La réponse finale de l'agent, ou une réponse partielle si le tour
+            dépasse son nombre d'étapes ou sa durée maximale
+        """
+        debut = time.monotonic()
+        if echeance is None:
+            echeance = debut + self.deadline_s
+        niveau = niveau_initial(user_message, len(self.tiers))
+        messages = list(messages)
+        arret = None
+        while True:
+            tier = self.tiers[niveau]
+            processor.tier = tier.name
+            if processor.nb_etapes >= self.max_steps:
+                arret = "max_steps"
+                break
+            if time.monotonic() >= echeance:
+                arret = "deadline"
+                break
+            peut_escalader = (niveau < len(self.tiers) - 1 and
+                              time.monotonic() - debut + self.tiers[niveau + 1].budget_s <= self.turn_budget_s and
+                              time.monotonic() + self.tiers[niveau + 1].budget_s <= echeance)
+            raison = None
+            config = {"recursion_limit": self.max_steps - processor.nb_etapes + 1}
+            try:
+                for update in tier.graph.stream({"messages": messages}, config, stream_mode="updates"):
+                    for message in processor.feed(update):
+                        escalade = raison_escalade(message) if peut_escalader and raison is None else None
+                        if escalade is not None:
+                            raison, garder = escalade
+                            if not garder:
+                                processor.annuler(message)
+                                continue
+                        # Tous les résultats d'outils de l'étape sont gardés : chaque appel a sa réponse
+                        messages.append(message)
+                    if raison is not None:
+                        # Quitter le flux : le graphe n'exécute pas l'étape suivante
+                        break
+                    arret = self._arret(processor, messages, echeance)
+                    if arret is not None:
+                        break
+            except GraphRecursionError:
+                arret = "max_steps"
+            except Exception:
+                if not peut_escalader:
+                    raise
+                raison = "error"
+
+            if raison is None or arret is not None:
+                break
+            processor.escalades.append({"from": tier.name, "reason": raison})
+            metrics.incr(f"router.escalations.{raison}")
+            niveau += 1
+
+        if arret is not None:
+            metrics.incr(f"turn.early_termination.{arret}")
+            processor.arret = arret
+            processor.reponse = self.reponse_partielle(tier, messages, arret)
+
+        processor.messages = messages
+        duree = time.monotonic() - debut
+        metrics.observe("turn.steps", processor.nb_etapes)
+        metrics.incr(f"router.{tier.name}.turns")
+        metrics.observe(f"router.{tier.name}.latency_s", duree)
+        if duree > self.turn_budget_s:
+            metrics.incr("router.budget_exceeded")
+        return processor.reponse
+
+    def _arret(self, processor, messages, echeance):
+        """Raison d'arrêter un tour inachevé ("max_steps", "deadline"), sinon None"""
+        dernier = messages[-1] if messages else None
+        if isinstance(dernier, AIMessage) and not dernier.tool_calls:
+            return None
+        if processor.nb_etapes >= self.max_steps:
+            return "max_steps"
+        if time.monotonic() >= echeance:
+            return "deadline"
+        return None
+
+    def reponse_partielle(self, tier, messages, arret):
+        """
+        Meilleure réponse possible avec les résultats d'outils déjà obtenus.
+
+        Étapes épuisées : un dernier appel au modèle, sans outils, rédige la
+        réponse. Délai dépassé (ou appel en échec) : réponse construite
+        localement, sans nouvel appel.
+        """
+        # Un appel d'outil resté sans réponse rendrait l'historique invalide
+        while messages and isinstance(messages[-1], AIMessage) and messages[-1].tool_calls:
+            messages.pop()
+        if arret == "max_steps":
+            try:
+                message = tier.model.invoke(messages + [("user", CONSIGNE_PARTIELLE)])
+                if str(message.content).strip():
+                    return str(message.content).strip()
+            except Exception:
+                # Repli sur la réponse construite localement
+                metrics.incr("turn.partial_answer_errors")
+        trouve = resume_outils(messages)
+        if trouve:
+            return f"{REPONSE_PARTIELLE}\n{trouve}"
+        return REPONSE_INCOMPLETE
@@ -0,0 +1,93 @@
+"""
+Lectures anticipées pendant le premier appel au LLM.
+
+Quand le client donne son nom ou un numéro (client, réservation), l'agent
+appelle presque toujours `get_client_by_search` puis
+`get_reservation_by_id_client`, mais seulement après un aller-retour complet
+avec le LLM. Le message est analysé localement (expressions régulières) et
+les lectures probables sont lancées en parallèle dès le début du tour. Leurs
+réponses sont rangées dans le cache du tour (`hotel_api.tour_cache`) : quand
+le modèle appelle l'outil, `hotel_api.get` les y trouve.
+
+Les lectures servies par la réplique locale ne sont pas anticipées.
+"""
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import hotel_api
+import metrics
+import replica
+
+PREFETCH = os.getenv("KIMRAU_PREFETCH", "1") != "0"
+
+_NUMERO = r"\s*(?:n\s*°|no\.?|num[ée]ro|#)?\s*(\d+)"
+RESERVATION_ID = re.compile(r"r[ée]servation" + _NUMERO, re.IGNORECASE)
+CLIENT_ID = re.compile(r"client" + _NUMERO, re.IGNORECASE)
+# "je m'appelle Georges Dupont", "au nom de Mme Martin"... : jusqu'à trois mots en majuscule
+_MOT = r"[A-ZÀ-Ý][\w'-]+"
+NOM = re.compile(r"(?:je m'appelle|je suis|au nom de|de la part de)\s+(?:(?:M\.|Mme|Mlle|Monsieur|Madame)\s+)?"
+                 rf"({_MOT}(?:\s+{_MOT}){{0,2}})", re.IGNORECASE)
+
+_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="prefetch")
+
+
+def entites(message: str) -> dict:
+    """Entités repérées dans le message : {"reservations": [...], "clients": [...], "noms": [...]}"""
+    noms = []
+    for match in NOM.finditer(message):
+        # L'option IGNORECASE s'applique aussi au nom : on exige une majuscule initiale
+        nom = " ".join(mot for mot in match.group(1).split() if mot[0].isupper())
+        if nom:
+            noms.append(nom)
+    return {
+        "reservations": [int(n) for n in RESERVATION_ID.findall(message)],
+        "clients": [int(n) for n in CLIENT_ID.findall(message)],
+        "noms": noms,
+    }
+
+
+def lectures(message: str) -> list:
+    """Requêtes GET (chemin, paramètres) que l'agent fera probablement pour ce message"""
+    trouve = entites(message)
+    requetes = []
+    if not replica.active("reservations"):
+        requetes += [(f"/reservations/{id}/", None) for id in trouve["reservations"]]
+        requetes += [("/reservations/", {"client": id}) for id in trouve["clients"]]
+    if not replica.active("clients"):
+        requetes += [(f"/clients/{id}/", None) for id in trouve["clients"]]
+        requetes += [("/clients/", {"search": nom}) for nom in trouve["noms"]]
+    return requetes
+
+
+def _lire(cache, path, params):
+    response = hotel_api.get(path, params=params)
+    # Recherche par nom avec un seul résultat : ses réservations seront demandées ensuite
+    if path == "/clients/" and response.status_code == 200 and not replica.active("reservations"):
+        body = response.json()
+        resultats = body.get("results", []) if isinstance(body, dict) else body
+        if len(resultats) == 1:
+            _lancer(cache, "/reservations/", {"client": resultats[0]["id"]})
+    return response
+
+
+def _lancer(cache, path, params):
+    key = hotel_api._cle(path, params)
+    if key not in cache:
+        cache[key] = _pool.submit(_lire, cache, path, params)
+        metrics.incr("prefetch.issued")
+
+
+@contextmanager
+def tour(user_message: str):
+    """Active le cache du tour et lance les lectures anticipées du message"""
+    cache = {}
+    jeton = hotel_api.tour_cache.set(cache)
+    try:
+        if PREFETCH:
+            for path, params in lectures(user_message):
+                _lancer(cache, path, params)
+        yield cache
+    finally:
+        hotel_api.tour_cache.reset(jeton)
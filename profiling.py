@@ -0,0 +1,317 @@
+"""
+Profilage à la demande des tours de conversation (/chat).
+
+Deux modes, activés par les routes /profiling de api.py (protégées par
+KIMRAU_PROFILING_TOKEN ; sans jeton, les routes n'existent pas) :
+
+- capture des N prochaines requêtes /chat, avec cProfile (temps par fonction,
+  y compris dans les threads où s'exécutent les outils) ou tracemalloc
+  (mémoire allouée pendant la requête, par ligne) ; chaque capture est
+  téléchargeable (.prof lisible par pstats / snakeviz, ou texte) ;
+- échantillonnage permanent à faible coût : un thread relève la pile de
+  tous les threads à intervalle fixe et compte les piles (format « collapsed »
+  des flame graphs).
+
+Les captures sont gardées en mémoire ; en mode multi-processus, chaque
+worker profile ses propres requêtes.
+"""
+import contextvars
+import cProfile
+import functools
+import io
+import itertools
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, deque
+from contextlib import contextmanager
+
+PROFILING_TOKEN = os.getenv("KIMRAU_PROFILING_TOKEN", "")
+# Nombre de captures gardées par processus
+CAPTURES_GARDEES = int(os.getenv("KIMRAU_PROFILING_KEEP", "20"))
+# Échantillonnage permanent (KIMRAU_PROFILING_SAMPLING=1) et intervalle entre deux relevés
+SAMPLING = os.getenv("KIMRAU_PROFILING_SAMPLING", "0") == "1"
+INTERVALLE_MS = float(os.getenv("KIMRAU_PROFILING_SAMPLE_MS", "10"))
+# Profondeur maximale des piles échantillonnées
+PROFONDEUR = 40
+# Nombre maximal de piles distinctes comptées ; les nouvelles piles au-delà vont dans PILE_AUTRES
+MAX_PILES = int(os.getenv("KIMRAU_PROFILING_MAX_STACKS", "5000"))
+PILE_AUTRES = "[autres piles]"
+# Nombre de lignes des rapports texte
+LIGNES_RAPPORT = 40
+
+MODES = ("cprofile", "tracemalloc")
+
+# Profil cProfile de la requête en cours (propagé aux threads des outils avec le contexte)
+_profil = contextvars.ContextVar("profil", default=None)
+
+
+class _ProfilRequete:
+    """Profileurs cProfile d'une requête : celui du thread de la requête et ceux des threads d'outils"""
+
+    def __init__(self):
+        self.thread = threading.get_ident()
+        self.principal = cProfile.Profile()
+        self.autres = []
+        self._lock = threading.Lock()
+
+    def ajouter(self, profileur):
+        with self._lock:
+            self.autres.append(profileur)
+
+    def stats(self):
+        stats = pstats.Stats(self.principal)
+        with self._lock:
+            for profileur in self.autres:
+                stats.add(profileur)
+        return stats
+
+
+def _activer(profileur) -> bool:
+    """Active un profileur cProfile ; faux si un autre est déjà actif (Python ≥ 3.12 : un seul par processus)"""
+    try:
+        profileur.enable()
+        return True
+    except ValueError:
+        return False
+
+
+def dans_le_thread(fn):
+    """
+    Décorateur d'outil : pendant une requête profilée, l'appel exécuté dans un
+    autre thread (ToolNode, appels parallèles) est profilé et rattaché à la requête.
+    """
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        profil = _profil.get()
+        if profil is None or profil.thread == threading.get_ident():
+            return fn(*args, **kwargs)
+        profileur = cProfile.Profile()
+        actif = False
+        try:
+            # Python ≥ 3.12 : le profileur de la requête suit déjà tous les threads
+            actif = _activer(profileur)
+            return fn(*args, **kwargs)
+        finally:
+            if actif:
+                profileur.disable()
+                profil.ajouter(profileur)
+    return wrapper
+
+
+class Profilage:
+    """Captures des prochaines requêtes /chat (cProfile ou tracemalloc)"""
+
+    def __init__(self, gardees=CAPTURES_GARDEES):
+        self.mode = None
+        self.restantes = 0
+        self.captures = deque(maxlen=gardees)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        # Requêtes tracemalloc en cours : le suivi est global au processus
+        self._tracemalloc = 0
+        self._tracemalloc_demarre = False
+
+    def armer(self, mode, requetes):
+        if mode not in MODES:
+            raise ValueError(f"Mode de profilage inconnu : {mode} (attendu : {', '.join(MODES)})")
+        with self._lock:
+            self.mode, self.restantes = mode, max(0, int(requetes))
+
+    def _prendre(self):
+        with self._lock:
+            if self.restantes <= 0:
+                return None
+            self.restantes -= 1
+            return self.mode
+
+    def _rendre(self, mode):
+        """Requête finalement non capturée : la capture reste disponible pour la suivante"""
+        with self._lock:
+            if self.mode == mode:
+                self.restantes += 1
+
+    @contextmanager
+    def requete(self, session_id=None):
+        """Profile la requête si une capture est armée"""
+        mode = self._prendre()
+        if mode is None:
+            yield
+            return
+        debut = time.monotonic()
+        if mode == "cprofile":
+            profil = _ProfilRequete()
+            jeton = None
+            try:
+                if _activer(profil.principal):
+                    jeton = _profil.set(profil)
+                else:
+                    self._rendre(mode)
+                    print(f"Profilage : un autre profileur est actif, requête {session_id} non capturée")
+                yield
+            finally:
+                if jeton is not None:
+                    profil.principal.disable()
+                    _profil.reset(jeton)
+                    self._garder(mode, session_id, time.monotonic() - debut, profil.stats())
+        else:
+            self._demarrer_tracemalloc()
+            avant = tracemalloc.take_snapshot()
+            try:
+                yield
+            finally:
+                apres = tracemalloc.take_snapshot()
+                pic = tracemalloc.get_traced_memory()[1]
+                self._arreter_tracemalloc()
+                self._garder(mode, session_id, time.monotonic() - debut, (avant, apres, pic))
+
+    def _demarrer_tracemalloc(self):
+        with self._lock:
+            self._tracemalloc += 1
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(25)
+                self._tracemalloc_demarre = True
+            tracemalloc.reset_peak()
+
+    def _arreter_tracemalloc(self):
+        with self._lock:
+            self._tracemalloc -= 1
+            # Un suivi démarré ailleurs (PYTHONTRACEMALLOC...) n'est pas arrêté
+            if self._tracemalloc == 0 and self._tracemalloc_demarre:
+                tracemalloc.stop()
+                self._tracemalloc_demarre = False
+
+    def _garder(self, mode, session_id, duree, donnees):
+        capture = {"id": next(self._ids), "mode": mode, "session_id": session_id,
+                   "duration_s": round(duree, 4), "created": time.time(), "donnees": donnees}
+        with self._lock:
+            self.captures.append(capture)
+
+    def capture(self, id_capture):
+        with self._lock:
+            return next((c for c in self.captures if c["id"] == id_capture), None)
+
+    def etat(self):
+        with self._lock:
+            return {
+                "mode": self.mode,
+                "remaining": self.restantes,
+                "captures": [{k: v for k, v in c.items() if k != "donnees"} for c in self.captures],
+                "sampling": echantillonneur.actif(),
+            }
+
+
+def rapport(capture, format="text"):
+    """
+    Contenu téléchargeable d'une capture.
+
+    Returns:
+        Un tuple (octets, type MIME, nom de fichier)
+    """
+    if capture["mode"] == "cprofile":
+        stats = capture["donnees"]
+        if format == "prof":
+            # Même format que Stats.dump_stats : pstats.Stats("fichier.prof")
+            return marshal.dumps(stats.stats), "application/octet-stream", f"kimrau-{capture['id']}.prof"
+        texte = io.StringIO()
+        stats.stream = texte
+        stats.sort_stats("cumulative").print_stats(LIGNES_RAPPORT)
+        return texte.getvalue().encode(), "text/plain; charset=utf-8", f"kimrau-{capture['id']}.txt"
+
+    avant, apres, pic = capture["donnees"]
+    lignes = [f"Pic de mémoire suivie pendant la requête : {pic / 1024:.1f} Kio",
+              f"Allocations restantes en fin de requête, par ligne (top {LIGNES_RAPPORT}) :", ""]
+    filtres = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+    differences = apres.filter_traces(filtres).compare_to(avant.filter_traces(filtres), "lineno")
+    lignes += [str(difference) for difference in differences[:LIGNES_RAPPORT]]
+    return "\n".join(lignes).encode(), "text/plain; charset=utf-8", f"kimrau-{capture['id']}.txt"
+
+
+class Echantillonneur:
+    """
+    Échantillonnage des piles de tous les threads, sans instrumentation.
+
+    Le nombre de piles distinctes est borné (`max_piles`) : une fois la limite
+    atteinte, les piles déjà connues continuent d'être comptées et les
+    nouvelles sont regroupées sous PILE_AUTRES.
+
+    Args:
+        intervalle_ms: Intervalle entre deux relevés (millisecondes)
+        max_piles: Nombre maximal de piles distinctes gardées
+    """
+
+    def __init__(self, intervalle_ms=INTERVALLE_MS, max_piles=MAX_PILES):
+        self.intervalle = intervalle_ms / 1000
+        self.max_piles = max_piles
+        self.piles = Counter()
+        self.releves = 0
+        self.debut = None
+        self._lock = threading.Lock()
+        self._arret = threading.Event()
+        self._thread = None
+
+    def actif(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def demarrer(self):
+        if self.actif():
+            return
+        self._arret.clear()
+        self.debut = self.debut or time.time()
+        self._thread = threading.Thread(target=self._boucle, name="kimrau-sampler", daemon=True)
+        self._thread.start()
+
+    def arreter(self):
+        self._arret.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._thread = None
+
+    def reinitialiser(self):
+        with self._lock:
+            self.piles.clear()
+            self.releves = 0
+            self.debut = time.time()
+
+    def _boucle(self):
+        moi = threading.get_ident()
+        while not self._arret.wait(self.intervalle):
+            releve = []
+            for ident, frame in sys._current_frames().items():
+                if ident == moi:
+                    continue
+                pile = []
+                while frame is not None and len(pile) < PROFONDEUR:
+                    code = frame.f_code
+                    pile.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                releve.append(";".join(reversed(pile)))
+            self._compter(releve)
+
+    def _compter(self, releve):
+        with self._lock:
+            for pile in releve:
+                if pile not in self.piles and len(self.piles) >= self.max_piles:
+                    pile = PILE_AUTRES
+                self.piles[pile] += 1
+            self.releves += 1
+
+    def collapsed(self) -> str:
+        """Piles au format « collapsed » (flamegraph.pl, speedscope) : `a;b;c nombre` par ligne"""
+        with self._lock:
+            return "".join(f"{pile} {nombre}\n" for pile, nombre in self.piles.most_common())
+
+    def etat(self):
+        with self._lock:
+            return {"enabled": self.actif(), "interval_ms": self.intervalle * 1000, "samples": self.releves,
+                    "stacks": len(self.piles), "since": self.debut}
+
+
+profilage = Profilage()
+echantillonneur = Echantillonneur()
+if SAMPLING:
+    echantillonneur.demarrer()
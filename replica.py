@@ -0,0 +1,209 @@
+"""
+Réplique locale (SQLite) des clients, réservations et spas de l'hôtel.
+
+Optionnelle : activée quand HOTEL_REPLICA_DB désigne un fichier. Un thread de
+synchronisation récupère périodiquement les enregistrements modifiés depuis
+la dernière synchronisation (champ `updated_at`) ; les écritures faites par
+les outils passent par l'API puis mettent la réplique à jour. Les lectures
+par identifiant et la recherche de clients par nom (index FTS5) sont servies
+localement, sans aller-retour réseau.
+"""
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+import hotel_api
+
+REPLICA_DB = os.getenv("HOTEL_REPLICA_DB")
+SYNC_INTERVAL = float(os.getenv("HOTEL_REPLICA_SYNC_INTERVAL", "30"))
+# Tous les N cycles, synchronisation complète pour détecter les suppressions faites hors de l'agent
+FULL_SYNC_EVERY = 20
+# Filtre côté API pour ne récupérer que les modifications ; ignoré sans risque si l'API ne le gère pas
+UPDATED_FILTER = os.getenv("HOTEL_API_UPDATED_FILTER", "updated_at__gt")
+
+# Entité -> (chemin de l'API, colonnes indexées)
+ENTITES = {
+    "clients": ("/clients/", ("name",)),
+    "reservations": ("/reservations/", ("client",)),
+    "spas": ("/spas/", ()),
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS clients (id INTEGER PRIMARY KEY, name TEXT, updated_at TEXT, data TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS reservations (id INTEGER PRIMARY KEY, client INTEGER, updated_at TEXT, data TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS reservations_client ON reservations (client);
+CREATE TABLE IF NOT EXISTS spas (id INTEGER PRIMARY KEY, updated_at TEXT, data TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS sync_state (entity TEXT PRIMARY KEY, watermark TEXT, synced_at REAL);
+CREATE VIRTUAL TABLE IF NOT EXISTS clients_fts USING fts5(
+    name, content='clients', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS clients_ai AFTER INSERT ON clients BEGIN
+    INSERT INTO clients_fts (rowid, name) VALUES (new.id, new.name);
+END;
+CREATE TRIGGER IF NOT EXISTS clients_ad AFTER DELETE ON clients BEGIN
+    INSERT INTO clients_fts (clients_fts, rowid, name) VALUES ('delete', old.id, old.name);
+END;
+CREATE TRIGGER IF NOT EXISTS clients_au AFTER UPDATE ON clients BEGIN
+    INSERT INTO clients_fts (clients_fts, rowid, name) VALUES ('delete', old.id, old.name);
+    INSERT INTO clients_fts (rowid, name) VALUES (new.id, new.name);
+END;
+"""
+
+
+def _date(horodatage):
+    """Horodatage ISO 8601 de l'API -> datetime (comparaison correcte quel que soit le fuseau)"""
+    return datetime.fromisoformat(horodatage)
+
+
+class Replica:
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._thread = None
+        self._stop = threading.Event()
+        self._db().executescript(_SCHEMA)
+
+    def _db(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # --- Lecture ----------------------------------------------------------
+
+    def pret(self, entite) -> bool:
+        """Vrai quand l'entité a été synchronisée au moins une fois"""
+        row = self._db().execute("SELECT synced_at FROM sync_state WHERE entity = ?", (entite,)).fetchone()
+        return row is not None and row[0] is not None
+
+    def get(self, entite, id):
+        row = self._db().execute(f"SELECT data FROM {entite} WHERE id = ?", (id,)).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def tous(self, entite):
+        return [json.loads(row[0]) for row in self._db().execute(f"SELECT data FROM {entite}")]
+
+    def reservations_du_client(self, client_id):
+        rows = self._db().execute("SELECT data FROM reservations WHERE client = ? ORDER BY id", (client_id,))
+        return [json.loads(row[0]) for row in rows]
+
+    def chercher_clients(self, search, limit=20):
+        """Recherche approchée par nom : préfixes de mots, accents ignorés"""
+        mots = re.findall(r"\w+", search)
+        if not mots:
+            return []
+        for operateur in (" AND ", " OR "):
+            requete = operateur.join(f'"{mot}"*' for mot in mots)
+            rows = self._db().execute(
+                "SELECT c.data FROM clients_fts JOIN clients c ON c.id = clients_fts.rowid "
+                "WHERE clients_fts MATCH ? ORDER BY rank LIMIT ?", (requete, limit)).fetchall()
+            if rows:
+                return [json.loads(row[0]) for row in rows]
+        return []
+
+    # --- Écriture ---------------------------------------------------------
+
+    def upsert(self, entite, item):
+        """Enregistre (ou met à jour) un élément renvoyé par l'API ; renvoie l'élément"""
+        data = json.dumps(item, ensure_ascii=False)
+        colonnes = ENTITES[entite][1]
+        valeurs = [item.get(colonne) for colonne in colonnes]
+        self._db().execute(
+            f"INSERT INTO {entite} (id, {''.join(c + ', ' for c in colonnes)}updated_at, data) "
+            f"VALUES (?, {'?, ' * len(colonnes)}?, ?) "
+            f"ON CONFLICT(id) DO UPDATE SET {''.join(f'{c} = excluded.{c}, ' for c in colonnes)}"
+            f"updated_at = excluded.updated_at, data = excluded.data",
+            (item["id"], *valeurs, item.get("updated_at"), data))
+        return item
+
+    def delete(self, entite, id):
+        self._db().execute(f"DELETE FROM {entite} WHERE id = ?", (id,))
+
+    # --- Synchronisation --------------------------------------------------
+
+    def synchroniser(self, entite, complet=False):
+        """
+        Récupère les enregistrements modifiés depuis la dernière synchronisation.
+
+        Returns:
+            Le nombre d'enregistrements écrits dans la réplique
+        """
+        path = ENTITES[entite][0]
+        db = self._db()
+        row = db.execute("SELECT watermark FROM sync_state WHERE entity = ?", (entite,)).fetchone()
+        watermark = None if complet or row is None else row[0]
+        params = {UPDATED_FILTER: watermark} if watermark else None
+
+        # Lecture réseau hors transaction : la base n'est verrouillée que pendant l'écriture
+        items = list(hotel_api.iter_pages(path, params))
+        vus = set()
+        ecrits = 0
+        nouveau_watermark = watermark
+        db.execute("BEGIN")
+        try:
+            for item in items:
+                vus.add(item["id"])
+                updated_at = item.get("updated_at")
+                # Filtre local : l'API peut ignorer le paramètre de filtre
+                if watermark and updated_at and _date(updated_at) <= _date(watermark):
+                    continue
+                self.upsert(entite, item)
+                ecrits += 1
+                if updated_at and (nouveau_watermark is None or _date(updated_at) > _date(nouveau_watermark)):
+                    nouveau_watermark = updated_at
+            if watermark is None:
+                # Synchronisation complète : supprimer ce qui n'existe plus côté API
+                for (id,) in db.execute(f"SELECT id FROM {entite}").fetchall():
+                    if id not in vus:
+                        self.delete(entite, id)
+            db.execute("INSERT OR REPLACE INTO sync_state (entity, watermark, synced_at) VALUES (?, ?, ?)",
+                       (entite, nouveau_watermark, time.time()))
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        return ecrits
+
+    def _boucle(self):
+        cycle = 0
+        while not self._stop.is_set():
+            for entite in ENTITES:
+                try:
+                    self.synchroniser(entite, complet=cycle % FULL_SYNC_EVERY == 0)
+                except Exception as e:
+                    print(f"Synchronisation de la réplique ({entite}) échouée : {e!r}")
+            cycle += 1
+            self._stop.wait(SYNC_INTERVAL)
+
+    def demarrer(self):
+        """Lance le thread de synchronisation (une seule fois)"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._boucle, name="replica-sync", daemon=True)
+            self._thread.start()
+
+    def arreter(self):
+        self._stop.set()
+
+
+def page(results):
+    """Met une liste locale au format paginé de l'API"""
+    return {"count": len(results), "next": None, "previous": None, "results": results}
+
+
+replica = Replica(REPLICA_DB) if REPLICA_DB else None
+
+
+def active(entite=None) -> bool:
+    """Vrai si la réplique est activée (et, si `entite` est donnée, déjà synchronisée)"""
+    return replica is not None and (entite is None or replica.pret(entite))
+
+
+if replica is not None:
+    replica.demarrer()
@@ -0,0 +1,166 @@
+"""
+Couche de résilience autour des services distants (API de l'hôtel, Mistral).
+
+- `TokenBucket` : limiteur de débit partagé par toutes les sessions du processus
+- `CircuitBreaker` : coupe-circuit qui échoue immédiatement quand un service
+  est en panne au lieu de laisser les requêtes s'accumuler
+
+Les instances sont enregistrées par nom pour être exposées par `/status`.
+En mode multi-processus (voir shared_state.py), les seaux de jetons sont
+stockés dans la base partagée : la limite s'applique à tous les workers.
+"""
+import threading
+import time
+
+import shared_state
+
+_limiters = {}
+_breakers = {}
+
+
+class ServiceIndisponible(Exception):
+    """Levée quand un appel est refusé sans être tenté (circuit ouvert, débit dépassé)"""
+
+
+class TokenBucket:
+    """
+    Limiteur de débit à seau de jetons.
+
+    Args:
+        name: Nom du limiteur (affiché par /status)
+        rate: Jetons ajoutés par seconde
+        capacity: Taille maximale du seau (rafale autorisée)
+    """
+
+    def __init__(self, name: str, rate: float, capacity: float):
+        self.name = name
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+        _limiters[name] = self
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def try_acquire(self) -> float:
+        """Prend un jeton si possible ; sinon renvoie le temps d'attente nécessaire (secondes)"""
+        if shared_state.is_shared():
+            return shared_state.state.bucket_try_acquire(self.name, self.rate, self.capacity)
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self, timeout: float = None):
+        """
+        Attend un jeton au plus `timeout` secondes.
+
+        Raises:
+            ServiceIndisponible: si aucun jeton n'est disponible à temps
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            attente = self.try_acquire()
+            if attente == 0.0:
+                return
+            if deadline is not None and time.monotonic() + attente > deadline:
+                raise ServiceIndisponible(f"{self.name} : limite de débit atteinte")
+            time.sleep(attente)
+
+    def etat(self):
+        if shared_state.is_shared():
+            tokens = shared_state.state.bucket_tokens(self.name, self.rate, self.capacity)
+        else:
+            with self._lock:
+                self._refill(time.monotonic())
+                tokens = self._tokens
+        return {"rate": self.rate, "capacity": self.capacity, "tokens": round(tokens, 2)}
+
+
+class CircuitBreaker:
+    """
+    Coupe-circuit à trois états.
+
+    - fermé : les appels passent, les échecs consécutifs sont comptés
+    - ouvert : après `failure_threshold` échecs, les appels échouent
+      immédiatement pendant `reset_timeout` secondes
+    - semi-ouvert : un seul appel d'essai est autorisé ; son succès referme
+      le circuit, son échec le rouvre
+    """
+
+    FERME = "closed"
+    OUVERT = "open"
+    SEMI_OUVERT = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.FERME
+        self.failures = 0
+        self.opened_at = 0.0
+        self._essai_en_cours = False
+        self._lock = threading.Lock()
+        _breakers[name] = self
+
+    def before_call(self):
+        """Raises ServiceIndisponible si le circuit refuse l'appel"""
+        with self._lock:
+            if self.state == self.OUVERT:
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    raise ServiceIndisponible(f"{self.name} : service momentanément indisponible")
+                self.state = self.SEMI_OUVERT
+            if self.state == self.SEMI_OUVERT:
+                if self._essai_en_cours:
+                    raise ServiceIndisponible(f"{self.name} : service momentanément indisponible")
+                self._essai_en_cours = True
+
+    def abandon(self):
+        """L'appel autorisé par `before_call` n'a pas été tenté : libère l'essai sans rien compter"""
+        with self._lock:
+            self._essai_en_cours = False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.FERME
+            self.failures = 0
+            self._essai_en_cours = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._essai_en_cours = False
+            if self.state == self.SEMI_OUVERT or self.failures >= self.failure_threshold:
+                self.state = self.OUVERT
+                self.opened_at = time.monotonic()
+
+    def call(self, fn, *args, **kwargs):
+        """Exécute `fn` sous la protection du coupe-circuit"""
+        self.before_call()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception:
+            self.record_failure()
+            raise
+        self.record_success()
+        return result
+
+    def etat(self):
+        with self._lock:
+            etat = {"state": self.state, "failures": self.failures}
+            if self.state == self.OUVERT:
+                etat["retry_in"] = round(max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at)), 1)
+            return etat
+
+
+def etat():
+    """État de tous les limiteurs et coupe-circuits (pour /status)"""
+    return {
+        "breakers": {name: b.etat() for name, b in _breakers.items()},
+        "rate_limiters": {name: l.etat() for name, l in _limiters.items()},
+    }
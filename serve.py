@@ -0,0 +1,78 @@
+"""
+Mode production de l'API : plusieurs processus workers sur un même port.
+
+    python serve.py --workers 4 --port 52001
+
+Le processus principal ouvre le socket d'écoute puis crée les workers par
+fork ; chacun sert `api.app` avec un serveur multi-thread. Les conversations
+sont partagées par une base SQLite en mode WAL (KIMRAU_CONVERSATIONS_DB,
+voir conversations.py) : n'importe quel worker peut traiter n'importe quel
+tour de conversation. Le cache du catalogue et les limiteurs de débit sont
+partagés par une autre (KIMRAU_STATE_DB, voir shared_state.py).
+
+Sous Windows (pas de fork), un seul processus est lancé.
+"""
+import argparse
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+
+
+def _worker(fd, host, port):
+    # Import après le fork : chaque worker a ses propres connexions (HTTP, SQLite)
+    from werkzeug.serving import make_server
+
+    import api
+
+    server = make_server(host, port, api.app, threaded=True, fd=fd)
+    server.serve_forever()
+
+
+def serve(host="127.0.0.1", port=52001, workers=None, state_db="kimrau_state.db"):
+    workers = workers or os.cpu_count() or 1
+    os.environ.setdefault("KIMRAU_STATE_DB", os.path.abspath(state_db))
+
+    if not hasattr(os, "fork"):
+        print("fork indisponible : démarrage d'un seul processus")
+        from werkzeug.serving import run_simple
+
+        import api
+        run_simple(host, port, api.app, threaded=True)
+        return
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(1024)
+    sock.set_inheritable(True)
+
+    ctx = multiprocessing.get_context("fork")
+    processes = [ctx.Process(target=_worker, args=(sock.fileno(), host, port), daemon=True)
+                 for _ in range(workers)]
+    for process in processes:
+        process.start()
+    print(f"Kimrau : {workers} workers sur http://{host}:{port} (état partagé : {os.environ['KIMRAU_STATE_DB']})")
+
+    def arreter(*_):
+        for process in processes:
+            process.terminate()
+        sys.exit(0)
+
+    signal.signal(signal.SIGTERM, arreter)
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        arreter()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serveur multi-processus de l'agent Kimrau")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=52001)
+    parser.add_argument("--workers", type=int, default=None, help="Nombre de processus (défaut : nombre de cœurs)")
+    parser.add_argument("--state-db", default="kimrau_state.db", help="Base SQLite de l'état partagé")
+    args = parser.parse_args()
+    serve(args.host, args.port, args.workers, args.state_db)
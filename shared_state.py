@@ -0,0 +1,109 @@
+"""
+État partagé entre les processus workers de l'API (voir serve.py).
+
+Par défaut tout reste en mémoire dans le processus (mode développement,
+`python api.py`). Si la variable d'environnement KIMRAU_STATE_DB désigne un
+fichier SQLite, le cache du catalogue et les limiteurs de débit y sont
+stockés (mode WAL) et partagés par tous les workers. Les conversations ont
+leur propre base (KIMRAU_CONVERSATIONS_DB, voir conversations.py).
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+
+STATE_DB = os.getenv("KIMRAU_STATE_DB")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS buckets (
+    name TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    last REAL NOT NULL
+);
+"""
+
+
+class MemoryState:
+    """État local au processus (mode mono-processus) : cache et limiteurs restent dans leurs modules"""
+
+
+class SqliteState:
+    """
+    État partagé dans une base SQLite en mode WAL.
+
+    Une connexion par thread ; les écritures concurrentes de plusieurs
+    processus sont sérialisées par SQLite (busy_timeout).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._connect().executescript(_SCHEMA)
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=10000")
+            self._local.conn = conn
+        return conn
+
+    # --- Cache ------------------------------------------------------------
+
+    def cache_get(self, key):
+        row = self._connect().execute(
+            "SELECT value FROM cache WHERE key = ? AND expires_at > ?", (key, time.time())).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def cache_set(self, key, value, ttl):
+        self._connect().execute(
+            "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, json.dumps(value, ensure_ascii=False), time.time() + ttl))
+
+    def cache_invalidate(self, prefix=""):
+        self._connect().execute("DELETE FROM cache WHERE substr(key, 1, ?) = ?", (len(prefix), prefix))
+
+    # --- Limiteurs de débit -----------------------------------------------
+
+    def bucket_try_acquire(self, name, rate, capacity):
+        """Seau de jetons partagé ; même contrat que TokenBucket.try_acquire"""
+        conn = self._connect()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tokens, last FROM buckets WHERE name = ?", (name,)).fetchone()
+            tokens = capacity if row is None else min(capacity, row[0] + (now - row[1]) * rate)
+            attente = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                attente = (1 - tokens) / rate
+            conn.execute("INSERT OR REPLACE INTO buckets (name, tokens, last) VALUES (?, ?, ?)",
+                         (name, tokens, now))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return attente
+
+    def bucket_tokens(self, name, rate, capacity):
+        row = self._connect().execute("SELECT tokens, last FROM buckets WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            return capacity
+        return min(capacity, row[0] + (time.time() - row[1]) * rate)
+
+
+def is_shared():
+    """Vrai si l'état est partagé entre processus (KIMRAU_STATE_DB défini)"""
+    return isinstance(state, SqliteState)
+
+
+state = SqliteState(STATE_DB) if STATE_DB else MemoryState()
@@ -0,0 +1,139 @@
+"""
+Test d'endurance de l'API : des milliers de tours /chat sur le backend
+simulé et le modèle factice, en suivant la mémoire du processus.
+
+Après un préchauffage (caches, réservoirs des métriques, conversations
+arrivées à leur taille maximale), la mémoire résidente (RSS) et la mémoire
+suivie par tracemalloc sont relevées à intervalle régulier. La croissance
+est estimée par régression linéaire sur ces relevés : le script échoue
+(code de sortie 1) si elle dépasse les seuils sur la durée du test, et
+affiche les lignes qui ont le plus alloué depuis la fin du préchauffage.
+
+Les conversations sont limitées à KIMRAU_MAX_SESSION_MESSAGES messages
+(40 par défaut ici, pour que la limite soit atteinte pendant le test).
+
+    python soak_test.py --turns 4000 --sessions 50
+"""
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+_db = tempfile.NamedTemporaryFile(prefix="kimrau-soak-", suffix=".db", delete=False).name
+os.environ.setdefault("KIMRAU_MODEL", "fake")
+os.environ.setdefault("KIMRAU_TURN_LOG", "")
+os.environ.setdefault("MISTRAL_API_KEY", "soak")
+os.environ.setdefault("KIMRAU_CONVERSATIONS_DB", _db)
+os.environ.setdefault("KIMRAU_MAX_SESSION_MESSAGES", "40")
+
+import mock_backend  # noqa: E402
+
+_server, _url = mock_backend.run_mock_backend(port=0)
+os.environ["HOTEL_API_URL"] = _url
+
+import api  # noqa: E402
+
+# Tours en lecture seule : les créations feraient grossir le backend simulé, pas l'agent
+MESSAGES = [
+    "Je cherche la réservation n° {n}",
+    "Pouvez-vous retrouver le client n° {n} ?",
+    "Quels restaurants proposez-vous ?",
+    "Bonjour, je voudrais voir le client n° {n}",
+    "Quels sont vos spas ?",
+]
+# Tous les RESTART tours, la session du tour est recommencée (/restart)
+RESTART = 50
+
+
+def rss() -> int:
+    """Mémoire résidente du processus (octets)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        import resource
+        # Pic et non valeur courante hors Linux : la croissance reste détectée
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def pente(points):
+    """Pente (octets par tour) de la droite des moindres carrés"""
+    n = len(points)
+    mx = sum(x for x, _ in points) / n
+    my = sum(y for _, y in points) / n
+    variance = sum((x - mx) ** 2 for x, _ in points)
+    return sum((x - mx) * (y - my) for x, y in points) / variance if variance else 0.0
+
+
+def tour(client, numero, sessions):
+    session_id = f"soak-{numero % sessions}"
+    if numero % RESTART == RESTART - 1:
+        client.post("/restart", json={"session_id": session_id})
+    message = MESSAGES[numero % len(MESSAGES)].format(n=100 + numero % 60)
+    response = client.post("/chat", json={"message": message, "session_id": session_id})
+    if response.status_code != 200:
+        raise RuntimeError(f"Tour {numero} : statut {response.status_code} {response.get_data(as_text=True)}")
+
+
+def soak(turns, sessions, warmup, sample_every, max_growth_mb, max_rss_growth_mb, top):
+    client = api.app.test_client()
+    debut = time.monotonic()
+    for numero in range(warmup):
+        tour(client, numero, sessions)
+    print(f"Préchauffage : {warmup} tours en {time.monotonic() - debut:.1f} s")
+
+    gc.collect()
+    tracemalloc.start()
+    reference = tracemalloc.take_snapshot()
+    releves = []
+    print(f"{'tour':>8}{'RSS Mio':>12}{'tracemalloc Kio':>18}{'tours/s':>10}")
+    debut = time.monotonic()
+    for numero in range(warmup, warmup + turns):
+        tour(client, numero, sessions)
+        if (numero - warmup) % sample_every == sample_every - 1:
+            gc.collect()
+            releve = (numero - warmup + 1, rss(), tracemalloc.get_traced_memory()[0])
+            releves.append(releve)
+            print(f"{releve[0]:>8}{releve[1] / 2 ** 20:>12.1f}{releve[2] / 1024:>18.1f}"
+                  f"{releve[0] / (time.monotonic() - debut):>10.1f}")
+    final = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    print(f"\nLignes ayant le plus alloué depuis le préchauffage (top {top}) :")
+    filtres = [tracemalloc.Filter(False, tracemalloc.__file__)]
+    for difference in final.filter_traces(filtres).compare_to(reference.filter_traces(filtres), "lineno")[:top]:
+        print(f"  {difference}")
+
+    # Croissance soutenue : pente sur tous les relevés, rapportée à la durée du test
+    croissance = pente([(t, traced) for t, _, traced in releves]) * turns
+    croissance_rss = pente([(t, r) for t, r, _ in releves]) * turns
+    print(f"\nCroissance estimée sur {turns} tours : tracemalloc {croissance / 2 ** 20:.2f} Mio "
+          f"(seuil {max_growth_mb}), RSS {croissance_rss / 2 ** 20:.2f} Mio (seuil {max_rss_growth_mb})")
+    echec = croissance > max_growth_mb * 2 ** 20 or croissance_rss > max_rss_growth_mb * 2 ** 20
+    print("ÉCHEC : la mémoire croît pendant le test" if echec else "OK")
+    return not echec
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=4000, help="Tours mesurés après le préchauffage")
+    parser.add_argument("--sessions", type=int, default=50, help="Nombre de sessions simultanées")
+    parser.add_argument("--warmup", type=int, default=1200,
+                        help="Tours de préchauffage (au moins 1024 : réservoirs des métriques)")
+    parser.add_argument("--sample-every", type=int, default=200, help="Tours entre deux relevés")
+    parser.add_argument("--max-growth-mb", type=float, default=2.0, help="Croissance tracemalloc tolérée (Mio)")
+    parser.add_argument("--max-rss-growth-mb", type=float, default=16.0, help="Croissance RSS tolérée (Mio)")
+    parser.add_argument("--top", type=int, default=10, help="Nombre de lignes d'allocation affichées")
+    args = parser.parse_args()
+
+    try:
+        ok = soak(args.turns, args.sessions, args.warmup, args.sample_every, args.max_growth_mb,
+                  args.max_rss_growth_mb, args.top)
+    finally:
+        for suffixe in ("", "-wal", "-shm"):
+            if os.path.exists(_db + suffixe) and os.environ["KIMRAU_CONVERSATIONS_DB"] == _db:
+                os.remove(_db + suffixe)
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,17 @@
+"""
+Tests unitaires des modules sans réseau (validation, admission, résilience,
+conversations).
+
+    python -m pytest -q tests
+"""
+import os
+import sys
+import tempfile
+
+# Bases SQLite des modules importés hors du répertoire de travail
+_dossier = tempfile.mkdtemp(prefix="kimrau_tests_")
+os.environ.setdefault("KIMRAU_CONVERSATIONS_DB", os.path.join(_dossier, "conversations.db"))
+os.environ.setdefault("KIMRAU_LEDGER_DB", os.path.join(_dossier, "ledger.db"))
+os.environ.pop("KIMRAU_STATE_DB", None)
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
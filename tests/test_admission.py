@@ -0,0 +1,71 @@
+import threading
+import time
+
+import pytest
+
+from admission import PRIORITE_EN_COURS, PRIORITE_NOUVELLE, AdmissionController, Surcharge
+
+
+def _occuper(controleur, libere):
+    """Thread qui garde une place jusqu'à `libere`"""
+    entre = threading.Event()
+
+    def tour():
+        with controleur.admit():
+            entre.set()
+            libere.wait()
+
+    thread = threading.Thread(target=tour)
+    thread.start()
+    entre.wait()
+    return thread
+
+
+def test_file_pleine():
+    controleur = AdmissionController(max_concurrent=1, max_queue=0, max_wait=1)
+    libere = threading.Event()
+    thread = _occuper(controleur, libere)
+    with pytest.raises(Surcharge) as erreur:
+        with controleur.admit():
+            pass
+    assert erreur.value.retry_after >= 1
+    libere.set()
+    thread.join()
+    with controleur.admit():
+        assert controleur.actifs == 1
+
+
+def test_attente_maximale():
+    controleur = AdmissionController(max_concurrent=1, max_queue=4, max_wait=0.05)
+    libere = threading.Event()
+    thread = _occuper(controleur, libere)
+    with pytest.raises(Surcharge):
+        with controleur.admit():
+            pass
+    assert controleur._file == []
+    libere.set()
+    thread.join()
+
+
+def test_conversations_en_cours_prioritaires():
+    controleur = AdmissionController(max_concurrent=1, max_queue=4, max_wait=5)
+    libere = threading.Event()
+    thread = _occuper(controleur, libere)
+    ordre = []
+
+    def attendre(priorite, nom):
+        with controleur.admit(priorite):
+            ordre.append(nom)
+
+    attentes = [threading.Thread(target=attendre, args=(PRIORITE_NOUVELLE, "nouvelle"))]
+    attentes[0].start()
+    while len(controleur._file) < 1:
+        time.sleep(0.001)
+    attentes.append(threading.Thread(target=attendre, args=(PRIORITE_EN_COURS, "en cours")))
+    attentes[1].start()
+    while len(controleur._file) < 2:
+        time.sleep(0.001)
+    libere.set()
+    for t in [thread] + attentes:
+        t.join()
+    assert ordre == ["en cours", "nouvelle"]
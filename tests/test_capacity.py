@@ -0,0 +1,82 @@
+import threading
+from datetime import date, timedelta
+
+import pytest
+
+import capacity
+import catalogue
+import hotel_api
+import hotel_tools
+
+RESTAURANTS = [{"id": 1, "name": "Le Belvédère", "capacity": 10, "is_active": True}]
+REPAS = [{"id": 3, "name": "dinner"}]
+DEMAIN = (date.today() + timedelta(days=1)).isoformat()
+
+
+@pytest.fixture
+def index(monkeypatch):
+    monkeypatch.setattr(catalogue, "restaurants", lambda: RESTAURANTS)
+    monkeypatch.setattr(catalogue, "repas", lambda: REPAS)
+    reservations = [{"id": 1, "restaurant": 1, "date": DEMAIN, "meal": 3, "number_of_guests": 4}]
+    monkeypatch.setattr(hotel_api, "iter_pages", lambda path, params=None: iter(reservations))
+    index = capacity.CapacityIndex()
+    monkeypatch.setattr(capacity, "index", index)
+    return index
+
+
+def test_places_restantes(index):
+    disponibilite = index.disponibilite("belvedere", DEMAIN, "dîner", 6)
+    assert (disponibilite["remaining_seats"], disponibilite["available"]) == (6, True)
+    index.appliquer({"id": 2, "restaurant": 1, "date": DEMAIN, "meal": 3, "number_of_guests": 3})
+    assert index.disponibilite("belvedere", DEMAIN, "dîner", 6)["available"] is False
+    index.retirer(1)
+    assert index.disponibilite("belvedere", DEMAIN, "dîner", 6)["remaining_seats"] == 7
+
+
+def test_check_availability(index):
+    resultat = hotel_tools.check_availability.func("belvedere", "demain", "dîner", "2")
+    assert (resultat["date"], resultat["remaining_seats"], resultat["available"]) == (DEMAIN, 6, True)
+
+
+@pytest.mark.parametrize("jour, convives, champ", [
+    ("n'importe quand", 2, "date"),
+    ("31/02", 2, "date"),
+    ("2025-02-31", 2, "date"),
+    ("2020-01-01", 2, "date"),
+    ("demain", -2, "number_of_guests"),
+    ("demain", "beaucoup", "number_of_guests"),
+])
+def test_check_availability_refuse_les_creneaux_invalides(index, jour, convives, champ):
+    resultat = hotel_tools.check_availability.func("belvedere", jour, "dîner", convives)
+    assert resultat["retryable"] is False
+    assert list(resultat["field_errors"]) == [champ]
+
+
+def test_reconstruction_rejoue_les_reservations_recues_pendant_la_lecture(index, monkeypatch):
+    index.reconstruire()
+
+    def flux(path, params=None):
+        # Réservation créée par l'agent pendant la lecture du flux, qui ne la contient pas
+        index.appliquer({"id": 2, "restaurant": 1, "date": DEMAIN, "meal": 3, "number_of_guests": 5})
+        yield {"id": 1, "restaurant": 1, "date": DEMAIN, "meal": 3, "number_of_guests": 4}
+
+    monkeypatch.setattr(hotel_api, "iter_pages", flux)
+    index.reconstruire()
+    assert index.reserves(1, DEMAIN, 3) == 9
+
+
+def test_reconstruction_en_arriere_plan(index, monkeypatch):
+    index.reserves(1, DEMAIN, 3)
+    monkeypatch.setattr(capacity, "REBUILD_INTERVAL", 0)
+    lecture = threading.Event()
+
+    def flux(path, params=None):
+        lecture.wait(5)
+        return iter([])
+
+    monkeypatch.setattr(hotel_api, "iter_pages", flux)
+    # L'index courant est servi sans attendre la reconstruction, lancée dans un thread
+    assert index.reserves(1, DEMAIN, 3) == 4
+    lecture.set()
+    with index._rebuild_lock:
+        assert index.reserves(1, DEMAIN, 3) == 0
@@ -0,0 +1,64 @@
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage, message_to_dict
+
+from conversations import _Conversation
+
+
+def _conversation(messages):
+    conversation = _Conversation()
+    conversation.etendre(len(messages) - 1, [message_to_dict(m) for m in messages])
+    return conversation
+
+
+def _tour(numero, outil=False):
+    messages = [HumanMessage(f"question {numero}")]
+    if outil:
+        messages += [AIMessage("", tool_calls=[{"name": "get_spas", "args": {}, "id": f"appel-{numero}"}]),
+                     ToolMessage("[]", tool_call_id=f"appel-{numero}")]
+    return messages + [AIMessage(f"réponse {numero}")]
+
+
+def test_rien_a_tronquer():
+    conversation = _conversation([SystemMessage("système")] + _tour(1) + _tour(2))
+    assert conversation.tronquer(4) is None
+    assert conversation.tronquer(0) is None
+    assert len(conversation.enregistrements) == 5
+
+
+def test_tronque_au_debut_d_un_tour():
+    messages = [SystemMessage("système")] + _tour(1) + _tour(2, outil=True) + _tour(3)
+    conversation = _conversation(messages)
+    # 5 messages au plus : le tour 2 (4 messages) ne peut pas être coupé, seul le tour 3 reste
+    premier = conversation.tronquer(5)
+    assert premier == 7
+    gardes = conversation.messages()
+    assert [m.type for m in gardes] == ["system", "human", "ai"]
+    assert gardes[1].content == "question 3"
+
+
+def test_dernier_tour_plus_long_que_la_limite():
+    messages = [SystemMessage("système")] + _tour(1) + _tour(2, outil=True)
+    conversation = _conversation(messages)
+    premier = conversation.tronquer(2)
+    assert premier == 3
+    assert [m.type for m in conversation.messages()] == ["system", "human", "ai", "tool", "ai"]
+
+
+def test_sans_instruction_systeme():
+    conversation = _conversation(_tour(1) + _tour(2) + _tour(3))
+    assert conversation.tronquer(4) == 2
+    assert [m.content for m in conversation.messages()] == ["question 2", "réponse 2", "question 3", "réponse 3"]
+
+
+def test_conversation_recommencee_par_un_autre_processus(tmp_path):
+    from conversations import ConversationStore
+
+    chemin = str(tmp_path / "conversations.db")
+    a, b = ConversationStore(chemin), ConversationStore(chemin)
+    a.ajouter("t", [SystemMessage("sys"), HumanMessage("old1"), AIMessage("old-a1")])
+    a.charger("t")
+    a.ajouter("t", [HumanMessage("old2"), AIMessage("old-a2")])
+    # Un autre worker recommence la conversation (/restart) jusqu'à un seq plus grand
+    b.supprimer("t")
+    b.ajouter("t", [SystemMessage("sys")] + _tour(1) + _tour(2) + _tour(3))
+    assert [m.content for m in a.charger("t")] == [m.content for m in b.charger("t")]
+    assert a.charger("t")[1].content == "question 1"
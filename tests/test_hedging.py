@@ -0,0 +1,52 @@
+import threading
+import time
+
+import requests
+
+import hedging
+from hedging import Hedger
+
+
+def _reponse(status=200):
+    response = requests.Response()
+    response.status_code = status
+    return response
+
+
+def _prechauffer(hedger, duree=0.001):
+    for _ in range(hedging.MIN_MESURES):
+        hedger.executer("/clients/1/", lambda: time.sleep(duree) or _reponse(), _reponse)
+
+
+def test_sans_mesures_dans_le_thread_appelant():
+    hedger = Hedger()
+    threads = []
+    hedger.executer("/clients/1/", lambda: threads.append(threading.get_ident()) or _reponse(), _reponse)
+    assert threads == [threading.get_ident()]
+    assert hedger.relances == 0
+
+
+def test_relance_apres_le_p90():
+    hedger = Hedger(budget=0.05, delai_min=0.01)
+    _prechauffer(hedger)
+    assert hedger._delais["clients"] == 0.01
+    relance = _reponse()
+    response = hedger.executer("/clients/2/", lambda: time.sleep(0.5) or _reponse(), lambda: relance)
+    assert response is relance
+    assert hedger.relances == 1
+
+
+def test_budget_epuise_pas_de_relance():
+    hedger = Hedger(budget=0.0, delai_min=0.01)
+    _prechauffer(hedger)
+    principale = _reponse()
+    assert hedger.executer("/clients/2/", lambda: time.sleep(0.05) or principale, _reponse) is principale
+    assert hedger.relances == 0
+
+
+def test_relance_en_erreur_garde_la_principale():
+    hedger = Hedger(budget=0.05, delai_min=0.01)
+    _prechauffer(hedger)
+    principale = _reponse()
+    response = hedger.executer("/clients/2/", lambda: time.sleep(0.05) or principale, lambda: _reponse(503))
+    assert response is principale
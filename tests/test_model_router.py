@@ -0,0 +1,80 @@
+import time
+
+from langchain_core.messages import AIMessage, ToolMessage
+
+from model_router import REPONSE_PARTIELLE, ModelRouter
+
+
+class Processeur:
+    """StreamProcessor minimal : chaque mise à jour est une liste de messages"""
+
+    def __init__(self):
+        self.nb_etapes = 0
+        self.tier = None
+        self.escalades = []
+        self.arret = None
+        self.reponse = ""
+        self.messages = []
+
+    def feed(self, update):
+        self.nb_etapes += 1
+        for message in update:
+            if isinstance(message, AIMessage) and not message.tool_calls:
+                self.reponse = message.content
+        return update
+
+    def annuler(self, message):
+        pass
+
+
+class Graphe:
+    def __init__(self, etapes, pause=0.0):
+        self.etapes = etapes
+        self.pause = pause
+
+    def stream(self, entree, config, stream_mode=None):
+        for etape in self.etapes:
+            time.sleep(self.pause)
+            yield etape
+
+
+class Niveau:
+    def __init__(self, name, graph, budget_s=1.0):
+        self.name, self.graph, self.budget_s, self.model = name, graph, budget_s, None
+
+
+def _appel(numero):
+    return [AIMessage("", tool_calls=[{"name": "get_spas", "args": {}, "id": f"appel-{numero}"}])]
+
+
+def _resultat(numero):
+    return [ToolMessage('{"name": "Spa Azur"}', tool_call_id=f"appel-{numero}")]
+
+
+def test_escalade_quand_le_niveau_rapide_echoue():
+    class Panne:
+        def stream(self, *args, **kwargs):
+            raise RuntimeError("délai dépassé")
+
+    router = ModelRouter([Niveau("fast", Panne()), Niveau("strong", Graphe([[AIMessage("Bonjour")]]))], 10)
+    processeur = Processeur()
+    assert router.executer([("user", "spas ?")], processeur, "spas ?") == "Bonjour"
+    assert processeur.escalades == [{"from": "fast", "reason": "error"}]
+
+
+def test_echeance_commune_aux_tentatives():
+    etapes = [_appel(1), _resultat(1), _appel(2), _resultat(2), [AIMessage("fini")]]
+    router = ModelRouter([Niveau("strong", Graphe(etapes, pause=0.02))], 10, max_steps=20, deadline_s=60)
+    processeur = Processeur()
+    # Échéance déjà presque atteinte par une tentative précédente
+    reponse = router.executer([("user", "spas ?")], processeur, "spas ?", echeance=time.monotonic() + 0.03)
+    assert processeur.arret == "deadline"
+    assert reponse.startswith(REPONSE_PARTIELLE)
+
+
+def test_echeance_depassee_avant_le_debut():
+    router = ModelRouter([Niveau("strong", Graphe([[AIMessage("fini")]]))], 10)
+    processeur = Processeur()
+    router.executer([("user", "spas ?")], processeur, "spas ?", echeance=time.monotonic() - 1)
+    assert processeur.arret == "deadline"
+    assert processeur.nb_etapes == 0
@@ -0,0 +1,35 @@
+import requests
+
+import hotel_api
+import prefetch
+
+
+def test_entites():
+    trouve = prefetch.entites("Bonjour, je m'appelle Georges Dupont, ma réservation n° 12 et le client #7")
+    assert trouve == {"reservations": [12], "clients": [7], "noms": ["Georges Dupont"]}
+
+
+def test_pas_de_nom_sans_majuscule():
+    assert prefetch.entites("je suis fatigué")["noms"] == []
+
+
+def test_lectures_servies_par_le_cache_du_tour(monkeypatch):
+    lues = []
+
+    def request(method, path, params=None, **kwargs):
+        lues.append((path, params))
+        response = requests.Response()
+        response.status_code = 200
+        response._content = b'{"results": [{"id": 42}]}' if path == "/clients/" else b"{}"
+        return response
+
+    monkeypatch.setattr(hotel_api, "request", request)
+    monkeypatch.setattr(hotel_api, "hedger", None)
+    with prefetch.tour("Je suis Martin") as cache:
+        list(cache.values())[0].result(5)
+        # Un seul client trouvé : ses réservations sont lues aussi
+        assert len(cache) == 2
+        list(cache.values())[1].result(5)
+        assert hotel_api.get("/clients/", params={"search": "Martin"}).json() == {"results": [{"id": 42}]}
+        hotel_api.get("/reservations/", params={"client": 42})
+    assert lues == [("/clients/", {"search": "Martin"}), ("/reservations/", {"client": 42})]
@@ -0,0 +1,26 @@
+import profiling
+from profiling import Echantillonneur, Profilage
+
+
+def test_piles_distinctes_bornees():
+    echantillonneur = Echantillonneur(max_piles=2)
+    echantillonneur._compter(["a;b", "a;c"])
+    echantillonneur._compter(["a;b", "a;d", "a;e"])
+    assert echantillonneur.piles == {"a;b": 2, "a;c": 1, profiling.PILE_AUTRES: 2}
+    assert echantillonneur.releves == 2
+
+
+def test_requete_non_capturee_rend_la_capture(monkeypatch):
+    profilage = Profilage()
+    profilage.armer("cprofile", 1)
+    monkeypatch.setattr(profiling, "_activer", lambda profileur: False)
+    with profilage.requete("s1"):
+        pass
+    assert profilage.restantes == 1
+    assert not profilage.captures
+
+    monkeypatch.undo()
+    with profilage.requete("s2"):
+        pass
+    assert profilage.restantes == 0
+    assert [c["session_id"] for c in profilage.captures] == ["s2"]
@@ -0,0 +1,95 @@
+import json
+import time
+
+import pytest
+import requests
+
+import hotel_api
+from resilience import CircuitBreaker, ServiceIndisponible
+
+
+def test_circuit_ouvert_apres_les_echecs():
+    breaker = CircuitBreaker("test-ouverture", failure_threshold=3, reset_timeout=60)
+    for _ in range(2):
+        breaker.record_failure()
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OUVERT
+    with pytest.raises(ServiceIndisponible):
+        breaker.before_call()
+
+
+def test_succes_remet_les_echecs_a_zero():
+    breaker = CircuitBreaker("test-succes", failure_threshold=2, reset_timeout=60)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.FERME
+
+
+def test_semi_ouvert_un_seul_essai():
+    breaker = CircuitBreaker("test-semi-ouvert", failure_threshold=1, reset_timeout=0.01)
+    breaker.record_failure()
+    time.sleep(0.02)
+    breaker.before_call()
+    assert breaker.state == CircuitBreaker.SEMI_OUVERT
+    with pytest.raises(ServiceIndisponible):
+        breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.FERME
+
+
+def test_echec_de_l_essai_rouvre_le_circuit():
+    breaker = CircuitBreaker("test-reouverture", failure_threshold=5, reset_timeout=0.01)
+    for _ in range(5):
+        breaker.record_failure()
+    time.sleep(0.02)
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OUVERT
+    with pytest.raises(ServiceIndisponible):
+        breaker.before_call()
+
+
+def test_abandon_libere_l_essai():
+    breaker = CircuitBreaker("test-abandon", failure_threshold=1, reset_timeout=0.01)
+    breaker.record_failure()
+    time.sleep(0.02)
+    breaker.before_call()
+    breaker.abandon()
+    breaker.before_call()
+    assert breaker.state == CircuitBreaker.SEMI_OUVERT
+
+
+def _reponse(status, body):
+    response = requests.Response()
+    response.status_code = status
+    response._content = json.dumps(body).encode()
+    return response
+
+
+def test_pages_suivantes_par_le_coupe_circuit(monkeypatch):
+    pages = {
+        hotel_api.url("/clients/"): _reponse(200, {"results": [1], "next": "http://api/clients/?page=2"}),
+        "http://api/clients/?page=2": _reponse(503, {}),
+    }
+    appels = []
+    monkeypatch.setattr(hotel_api.session, "request",
+                        lambda method, url, **kwargs: appels.append(url) or pages[url])
+    breaker = CircuitBreaker("test-pages", failure_threshold=5, reset_timeout=60)
+    monkeypatch.setattr(hotel_api, "breaker", breaker)
+    with pytest.raises(requests.HTTPError):
+        list(hotel_api.iter_pages("/clients/"))
+    assert appels == list(pages)
+    assert breaker.failures == 1
+
+
+def test_circuit_ouvert_sans_jeton(monkeypatch):
+    breaker = CircuitBreaker("test-jeton", failure_threshold=1, reset_timeout=60)
+    breaker.record_failure()
+    monkeypatch.setattr(hotel_api, "breaker", breaker)
+    jetons = []
+    monkeypatch.setattr(hotel_api.limiter, "acquire", lambda timeout=None: jetons.append(timeout))
+    with pytest.raises(ServiceIndisponible):
+        hotel_api.request("GET", "/clients/")
+    assert jetons == []
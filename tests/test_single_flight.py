@@ -0,0 +1,92 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+import requests
+
+import hotel_api
+from hotel_api import SingleFlight
+
+
+def test_appels_simultanes_partages():
+    flight = SingleFlight()
+    demarre, libere = threading.Event(), threading.Event()
+    appels = []
+
+    def lent():
+        appels.append(1)
+        demarre.set()
+        libere.wait(5)
+        return "réponse"
+
+    resultats = []
+    meneur = threading.Thread(target=lambda: resultats.append(flight.do("cle", lent)))
+    meneur.start()
+    demarre.wait(5)
+    suiveurs = [threading.Thread(target=lambda: resultats.append(flight.do("cle", lent))) for _ in range(3)]
+    for thread in suiveurs:
+        thread.start()
+    while flight.partages < 3:
+        time.sleep(0.001)
+    libere.set()
+    for thread in [meneur] + suiveurs:
+        thread.join()
+    assert resultats == ["réponse"] * 4
+    assert len(appels) == 1
+
+
+def test_erreur_transmise_puis_cle_liberee():
+    flight = SingleFlight()
+
+    def panne():
+        raise ConnectionError("hors ligne")
+
+    with pytest.raises(ConnectionError):
+        flight.do("cle", panne)
+    # L'échec n'est pas gardé : l'appel suivant relance la fonction
+    assert flight.do("cle", lambda: 42) == 42
+
+
+def test_cles_distinctes_non_partagees():
+    flight = SingleFlight()
+    assert [flight.do(cle, lambda cle=cle: cle) for cle in ("a", "b")] == ["a", "b"]
+    assert flight.partages == 0
+
+
+def test_variante_asyncio():
+    flight = SingleFlight()
+    appels = []
+
+    def lent():
+        appels.append(1)
+        threading.Event().wait(0.05)
+        return "réponse"
+
+    async def scenario():
+        return await asyncio.gather(*(flight.do_async("cle", lent) for _ in range(5)))
+
+    assert asyncio.run(scenario()) == ["réponse"] * 5
+    assert len(appels) == 1
+
+
+def test_ecriture_invalide_le_cache_de_la_ressource(monkeypatch):
+    lectures = []
+
+    def request(method, path, **kwargs):
+        response = requests.Response()
+        response.status_code = 200
+        response._content = json.dumps([{"name": f"lecture {len(lectures)}"}]).encode()
+        if method == "GET":
+            lectures.append(path)
+        return response
+
+    monkeypatch.setattr(hotel_api, "request", request)
+    monkeypatch.setattr(hotel_api, "_cache", {})
+    hotel_api.get_cached("/restaurants/")
+    hotel_api.get_cached("/meals/")
+    hotel_api.put("/restaurants/3/", json={"capacity": 40})
+    hotel_api.get_cached("/restaurants/")
+    hotel_api.get_cached("/meals/")
+    assert lectures == ["/restaurants/", "/meals/", "/restaurants/"]
@@ -0,0 +1,83 @@
+from datetime import date
+
+import pytest
+
+import catalogue
+import validation
+
+# Vendredi
+AUJOURDHUI = date(2025, 6, 13)
+
+RESTAURANTS = [
+    {"id": 1, "name": "Le Belvédère", "capacity": 40, "is_active": True},
+    {"id": 2, "name": "La Terrasse", "capacity": 4, "is_active": True},
+    {"id": 3, "name": "Le Jardin", "is_active": False},
+]
+REPAS = [{"id": 1, "name": "breakfast"}, {"id": 2, "name": "lunch"}, {"id": 3, "name": "dinner"}]
+
+
+@pytest.fixture
+def catalogue_local(monkeypatch):
+    monkeypatch.setattr(catalogue, "restaurants", lambda: RESTAURANTS)
+    monkeypatch.setattr(catalogue, "repas", lambda: REPAS)
+
+
+@pytest.mark.parametrize("texte, attendu", [
+    ("vendredi prochain", date(2025, 6, 20)),
+    ("vendredi", date(2025, 6, 20)),
+    ("samedi", date(2025, 6, 14)),
+    ("demain", date(2025, 6, 14)),
+    ("après-demain", date(2025, 6, 15)),
+    ("dans 3 jours", date(2025, 6, 16)),
+    ("2025-07-01", date(2025, 7, 1)),
+    ("14/07", date(2025, 7, 14)),
+    ("1er juin", date(2026, 6, 1)),
+    ("12/06", date(2026, 6, 12)),
+])
+def test_parser_date(texte, attendu):
+    assert validation.parser_date(texte, AUJOURDHUI) == attendu
+
+
+@pytest.mark.parametrize("texte", ["31/02", "30/02/2025", "2025-13-01", "un jour"])
+def test_parser_date_invalide(texte):
+    assert validation.parser_date(texte, AUJOURDHUI) is None
+
+
+def test_reservation_resout_les_noms(catalogue_local, monkeypatch):
+    monkeypatch.setattr(validation, "date", _date_fixe(AUJOURDHUI))
+    corps = validation.reservation("42", "belvedere", "vendredi prochain", "dîner", "2", None)
+    assert corps == {"client": 42, "restaurant": 1, "date": "2025-06-20", "meal": 3,
+                     "number_of_guests": 2, "special_requests": ""}
+
+
+def test_reservation_refuse_les_champs_invalides(catalogue_local, monkeypatch):
+    monkeypatch.setattr(validation, "date", _date_fixe(AUJOURDHUI))
+    with pytest.raises(validation.ErreurValidation) as erreur:
+        validation.reservation(42, "Le Ritz", "2025-06-01", "brunch", 2)
+    assert set(erreur.value.field_errors) == {"restaurant", "meal", "date"}
+
+
+def test_reservation_capacite_et_restaurant_ferme(catalogue_local, monkeypatch):
+    monkeypatch.setattr(validation, "date", _date_fixe(AUJOURDHUI))
+    with pytest.raises(validation.ErreurValidation) as erreur:
+        validation.reservation(42, "La Terrasse", "demain", "lunch", 6)
+    assert set(erreur.value.field_errors) == {"number_of_guests"}
+    with pytest.raises(validation.ErreurValidation) as erreur:
+        validation.reservation(42, 3, "demain", "lunch", 2)
+    assert set(erreur.value.field_errors) == {"restaurant"}
+
+
+def test_reservation_catalogue_indisponible(monkeypatch):
+    monkeypatch.setattr(catalogue, "restaurants", lambda: [])
+    monkeypatch.setattr(catalogue, "repas", lambda: REPAS)
+    with pytest.raises(validation.CatalogueIndisponible):
+        validation.reservation(42, "belvedere", "demain", "lunch", 2)
+
+
+def _date_fixe(aujourdhui):
+    """Classe date dont today() renvoie `aujourdhui`"""
+    class DateFixe(date):
+        @classmethod
+        def today(cls):
+            return aujourdhui
+    return DateFixe
@@ -0,0 +1,130 @@
+"""
+Protocole commun des résultats d'outils.
+
+En cas de succès, un outil renvoie les données de l'API telles quelles. En
+cas d'échec, il renvoie toujours un dictionnaire de la forme :
+
+    {
+        "error": "Données invalides pour créer la réservation",
+        "status": 400,
+        "retryable": false,
+        "validation": "date : Le format de la date est invalide",
+        "field_errors": {"date": ["Le format de la date est invalide"]},
+        "hint": "Ne rappelle pas l'outil avec les mêmes arguments : ..."
+    }
+
+Le modèle sait ainsi s'il peut réessayer, quel champ corriger, ou s'il doit
+revenir vers le client, au lieu de rappeler le même outil en boucle.
+"""
+import functools
+
+import requests
+
+from resilience import ServiceIndisponible
+
+# Codes de succès par méthode (l'API renvoie 201 à la création, 204 à la suppression)
+SUCCES = {
+    "GET": (200,),
+    "POST": (201, 200),
+    "PUT": (200,),
+    "DELETE": (204, 200),
+}
+
+# Statuts pour lesquels un nouvel essai a des chances de réussir
+RETRYABLE = {408, 425, 429, 500, 502, 503, 504}
+
+CONSEIL_CORRIGER = ("Ne rappelle pas l'outil avec les mêmes arguments : corrige les champs indiqués "
+                    "ou demande les informations manquantes au client.")
+CONSEIL_INTROUVABLE = ("Ne rappelle pas l'outil avec le même identifiant : vérifie-le auprès du client "
+                       "ou recherche-le autrement (par exemple par nom).")
+CONSEIL_REESSAYER = ("Erreur temporaire : tu peux réessayer une seule fois, sinon excuse-toi auprès du "
+                     "client et propose-lui de réessayer plus tard.")
+
+
+def succes(response, methode="GET") -> bool:
+    return response.status_code in SUCCES[methode]
+
+
+def _erreurs_champs(body):
+    """Erreurs par champ d'une réponse d'erreur DRF ({"date": ["..."]}), hors "detail" """
+    if not isinstance(body, dict):
+        return {}
+    erreurs = {}
+    for champ, messages in body.items():
+        if champ == "detail":
+            continue
+        erreurs[champ] = [str(m) for m in messages] if isinstance(messages, list) else [str(messages)]
+    return erreurs
+
+
+def erreur(response, action: str) -> dict:
+    """
+    Résultat d'erreur typé pour une réponse HTTP en échec.
+
+    Args:
+        response: Réponse de l'API
+        action: Ce que l'outil tentait de faire ("créer la réservation")
+    """
+    status = response.status_code
+    try:
+        body = response.json()
+    except ValueError:
+        body = response.text[:500] or None
+    field_errors = _erreurs_champs(body)
+    detail = body.get("detail") if isinstance(body, dict) else body
+
+    if status == 404:
+        message, conseil = f"Introuvable : impossible de {action}", CONSEIL_INTROUVABLE
+    elif status in RETRYABLE:
+        message, conseil = f"Service momentanément indisponible : impossible de {action}", CONSEIL_REESSAYER
+    elif field_errors:
+        message, conseil = f"Données invalides pour {action}", CONSEIL_CORRIGER
+    else:
+        message, conseil = f"Impossible de {action} (statut {status})", CONSEIL_CORRIGER
+
+    validation = "; ".join(f"{champ} : {' '.join(msgs)}" for champ, msgs in field_errors.items())
+    return {
+        "error": message,
+        "status": status,
+        "retryable": status in RETRYABLE,
+        "validation": validation or (str(detail) if detail else None),
+        "field_errors": field_errors,
+        "hint": conseil,
+    }
+
+
+def erreur_service(exc, action: str) -> dict:
+    """Résultat d'erreur typé quand l'API n'a pas pu être jointe (réseau, coupe-circuit, débit)"""
+    return {
+        "error": f"Service momentanément indisponible : impossible de {action}",
+        "status": None,
+        "retryable": not isinstance(exc, ServiceIndisponible),
+        "validation": None,
+        "field_errors": {},
+        "hint": CONSEIL_REESSAYER,
+    }
+
+
+def erreur_validation(exc, action: str) -> dict:
+    """Résultat d'erreur typé pour des arguments refusés localement (voir validation.py), sans appel réseau"""
+    return {
+        "error": f"Données invalides pour {action}",
+        "status": 400,
+        "retryable": False,
+        "validation": str(exc),
+        "field_errors": exc.field_errors,
+        "hint": CONSEIL_CORRIGER,
+    }
+
+
+def protege(action: str):
+    """Décorateur d'outil : les erreurs réseau deviennent des résultats d'erreur typés"""
+    def decorateur(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            try:
+                return fn(*args, **kwargs)
+            except (ServiceIndisponible, requests.RequestException) as e:
+                return erreur_service(e, action)
+        return wrapper
+    return decorateur
@@ -0,0 +1,112 @@
+"""
+Journal structuré des tours de conversation (JSONL, ajout seul).
+
+Chaque tour produit une ligne JSON : session, horodatages, message, réponse,
+appels d'outils, durées des étapes et tokens consommés. Les lignes sont
+mises en file et écrites par un thread dédié : le chemin de la requête ne
+fait jamais d'entrée/sortie disque. Le fichier tourne quand il dépasse
+`max_bytes` (turns.jsonl -> turns.jsonl.1 -> ...).
+
+Le format est directement relisible avec `lire()` pour le rejeu et l'analyse
+hors ligne (voir batch.py).
+"""
+import json
+import os
+import queue
+import threading
+import time
+
+import metrics
+import shared_state
+
+TURN_LOG = os.getenv("KIMRAU_TURN_LOG", "turns.jsonl")
+MAX_BYTES = int(os.getenv("KIMRAU_TURN_LOG_MAX_BYTES", str(50 * 1024 * 1024)))
+BACKUPS = 5
+
+
+class TurnLogger:
+    """
+    Args:
+        path: Fichier JSONL de destination
+        max_bytes: Taille au-delà de laquelle le fichier tourne
+        backups: Nombre d'anciens fichiers conservés
+        max_queue: Lignes en attente au-delà desquelles les nouveaux tours sont ignorés
+    """
+
+    def __init__(self, path, max_bytes=MAX_BYTES, backups=BACKUPS, max_queue=10000):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self._ecrire, name="turn-log", daemon=True)
+        self._thread.start()
+
+    def log(self, record: dict):
+        """Met un tour en file d'écriture ; ne bloque jamais"""
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            metrics.incr("turn_log.dropped")
+
+    def flush(self, timeout=5.0):
+        """Attend que les tours en file soient écrits (tests, arrêt du processus)"""
+        fin = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < fin:
+            time.sleep(0.01)
+
+    def _rotation(self):
+        for i in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{i}"):
+                os.replace(f"{self.path}.{i}", f"{self.path}.{i + 1}")
+        os.replace(self.path, f"{self.path}.1")
+
+    def _ecrire(self):
+        while True:
+            lot = [self._queue.get()]
+            # Regrouper les tours déjà en file : une écriture pour plusieurs lignes
+            while len(lot) < 256:
+                try:
+                    lot.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                lignes = "".join(json.dumps(r, ensure_ascii=False, default=str) + "\n" for r in lot)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(lignes)
+                    taille = f.tell()
+                if taille > self.max_bytes:
+                    self._rotation()
+            except Exception as e:
+                metrics.incr("turn_log.errors")
+                print(f"Écriture du journal des tours impossible : {e!r}")
+            finally:
+                for _ in lot:
+                    self._queue.task_done()
+
+
+def lire(path=TURN_LOG):
+    """Relit les tours journalisés, des plus anciens (fichiers tournés) aux plus récents"""
+    fichiers = [f"{path}.{i}" for i in range(BACKUPS, 0, -1)] + [path]
+    for fichier in fichiers:
+        if not os.path.exists(fichier):
+            continue
+        with open(fichier, encoding="utf-8") as f:
+            for ligne in f:
+                if ligne.strip():
+                    yield json.loads(ligne)
+
+
+def _chemin():
+    # Un fichier par worker en mode multi-processus : pas de rotation concurrente
+    if shared_state.is_shared():
+        racine, extension = os.path.splitext(TURN_LOG)
+        return f"{racine}.{os.getpid()}{extension}"
+    return TURN_LOG
+
+
+logger = TurnLogger(_chemin()) if TURN_LOG else None
+
+
+def log(record: dict):
+    if logger is not None:
+        logger.log(record)
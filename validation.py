@@ -0,0 +1,205 @@
+"""
+Validation et normalisation locales des arguments des outils d'écriture.
+
+Le modèle produit des dates libres ("vendredi prochain", "12/06"), des noms
+de repas ou de restaurants à la place des identifiants, des nombres en
+texte... Ces arguments sont normalisés avant l'appel HTTP ; ce qui ne peut
+pas l'être est refusé localement avec un message exploitable, sans
+aller-retour réseau.
+"""
+import re
+from datetime import date, timedelta
+
+import catalogue
+
+JOURS = ["lundi", "mardi", "mercredi", "jeudi", "vendredi", "samedi", "dimanche"]
+MOIS = ["janvier", "fevrier", "mars", "avril", "mai", "juin", "juillet", "aout",
+        "septembre", "octobre", "novembre", "decembre"]
+
+# Réservations acceptées jusqu'à un an à l'avance
+MAX_JOURS_AVANCE = 365
+MAX_CONVIVES = 50
+
+
+class ErreurValidation(Exception):
+    """Arguments invalides : `field_errors` associe chaque champ à ses messages"""
+
+    def __init__(self, field_errors):
+        super().__init__("; ".join(f"{champ} : {' '.join(msgs)}" for champ, msgs in field_errors.items()))
+        self.field_errors = field_errors
+
+
+class CatalogueIndisponible(Exception):
+    """Le catalogue n'a pas pu être lu : les noms ne peuvent pas être résolus (erreur temporaire)"""
+
+
+def _annee_probable(jour, mois, aujourdhui):
+    """Date sans année : cette année, ou la suivante si elle est déjà passée"""
+    candidate = date(aujourdhui.year, mois, jour)
+    return candidate if candidate >= aujourdhui else date(aujourdhui.year + 1, mois, jour)
+
+
+def parser_date(texte, aujourdhui=None):
+    """
+    Date en français ou numérique -> date.
+
+    Formats reconnus : 2025-06-13, 13/06/2025, 13/06, "13 juin", "1er juin 2025",
+    "aujourd'hui", "ce soir", "demain", "après-demain", "dans 3 jours",
+    "la semaine prochaine", "vendredi", "vendredi prochain" (le prochain
+    vendredi à venir).
+
+    Returns:
+        Un objet date, ou None si le texte n'est pas reconnu
+    """
+    aujourdhui = aujourdhui or date.today()
+    t = catalogue.normaliser(texte)
+    try:
+        if m := re.search(r"\b(\d{4})-(\d{1,2})-(\d{1,2})\b", t):
+            return date(int(m[1]), int(m[2]), int(m[3]))
+        if m := re.search(r"\b(\d{1,2})[/.](\d{1,2})(?:[/.](\d{2,4}))?\b", t):
+            if m[3]:
+                annee = int(m[3]) + (2000 if len(m[3]) == 2 else 0)
+                return date(annee, int(m[2]), int(m[1]))
+            return _annee_probable(int(m[1]), int(m[2]), aujourdhui)
+        if m := re.search(rf"\b(\d{{1,2}})(?:er)?\s+({'|'.join(MOIS)})(?:\s+(\d{{4}}))?\b", t):
+            mois = MOIS.index(m[2]) + 1
+            if m[3]:
+                return date(int(m[3]), mois, int(m[1]))
+            return _annee_probable(int(m[1]), mois, aujourdhui)
+    except ValueError:
+        # 31/02 et autres dates impossibles
+        return None
+    if re.search(r"apres[- ]demain", t):
+        return aujourdhui + timedelta(days=2)
+    if "demain" in t:
+        return aujourdhui + timedelta(days=1)
+    if re.search(r"aujourd'?hui|ce soir|ce midi|ce matin", t):
+        return aujourdhui
+    if m := re.search(r"dans (\d+) jours?", t):
+        return aujourdhui + timedelta(days=int(m[1]))
+    if re.search(r"semaine prochaine|dans une semaine", t):
+        return aujourdhui + timedelta(days=7)
+    if m := re.search(rf"\b({'|'.join(JOURS)})\b", t):
+        ecart = (JOURS.index(m[1]) - aujourdhui.weekday()) % 7
+        return aujourdhui + timedelta(days=ecart or 7)
+    return None
+
+
+def _entier(valeur, champ, erreurs, minimum=None, maximum=None):
+    try:
+        nombre = int(str(valeur).strip())
+    except (TypeError, ValueError):
+        erreurs[champ] = [f"Nombre entier attendu, reçu : {valeur!r}."]
+        return None
+    if minimum is not None and nombre < minimum:
+        erreurs[champ] = [f"Doit être supérieur ou égal à {minimum}."]
+    elif maximum is not None and nombre > maximum:
+        erreurs[champ] = [f"Doit être inférieur ou égal à {maximum}."]
+    return nombre
+
+
+def _date_reservation(valeur, erreurs, aujourdhui=None):
+    aujourdhui = aujourdhui or date.today()
+    jour = parser_date(valeur, aujourdhui)
+    if jour is None:
+        erreurs["date"] = [f"Date non reconnue : {valeur!r}. Demande la date au client ou utilise le format YYYY-MM-DD."]
+        return None
+    if jour < aujourdhui:
+        erreurs["date"] = [f"La date {jour.isoformat()} est déjà passée."]
+    elif jour > aujourdhui + timedelta(days=MAX_JOURS_AVANCE):
+        erreurs["date"] = [f"Les réservations ne sont possibles que jusqu'à {MAX_JOURS_AVANCE} jours à l'avance."]
+    return jour.isoformat()
+
+
+def creneau(date, number_of_guests):
+    """
+    Date et nombre de convives d'une vérification de disponibilité, normalisés
+    comme pour une réservation.
+
+    Returns:
+        Un tuple ("YYYY-MM-DD", convives)
+
+    Raises:
+        ErreurValidation: date non reconnue, impossible ou passée, nombre de convives invalide
+    """
+    erreurs = {}
+    jour = _date_reservation(date, erreurs)
+    convives = _entier(number_of_guests, "number_of_guests", erreurs, minimum=1, maximum=MAX_CONVIVES)
+    if erreurs:
+        raise ErreurValidation(erreurs)
+    return jour, convives
+
+
+def reservation(id_client, id_restaurant, date, id_meal, number_of_guests, special_requests=""):
+    """
+    Corps de requête d'une réservation, normalisé.
+
+    Le restaurant et le repas peuvent être donnés par identifiant ou par nom
+    ("Le Belvédère", "dîner") ; la date en toutes lettres.
+
+    Raises:
+        ErreurValidation: un ou plusieurs champs sont invalides
+        CatalogueIndisponible: les restaurants ou les repas n'ont pas pu être lus
+    """
+    erreurs = {}
+    client = _entier(id_client, "client", erreurs, minimum=1)
+
+    resto = catalogue.trouver_restaurant(id_restaurant)
+    if resto is None:
+        restaurants = catalogue.restaurants()
+        if not restaurants:
+            raise CatalogueIndisponible("Liste des restaurants indisponible")
+        noms = ", ".join(f"{r['name']} (id {r['id']})" for r in restaurants)
+        erreurs["restaurant"] = [f"Restaurant inconnu : {id_restaurant!r}. Restaurants : {noms}."]
+    elif not resto.get("is_active", True):
+        erreurs["restaurant"] = [f"Le restaurant {resto['name']} est fermé."]
+
+    repas = catalogue.trouver_repas(id_meal)
+    if repas is None:
+        liste_repas = catalogue.repas()
+        if not liste_repas:
+            raise CatalogueIndisponible("Liste des repas indisponible")
+        noms = ", ".join(f"{m['name']} (id {m['id']})" for m in liste_repas)
+        erreurs["meal"] = [f"Repas inconnu : {id_meal!r}. Repas : {noms}."]
+
+    maximum = min(MAX_CONVIVES, resto["capacity"]) if resto and resto.get("capacity") else MAX_CONVIVES
+    convives = _entier(number_of_guests, "number_of_guests", erreurs, minimum=1, maximum=maximum)
+    jour = _date_reservation(date, erreurs)
+
+    if erreurs:
+        raise ErreurValidation(erreurs)
+    return {
+        "client": client,
+        "restaurant": resto["id"],
+        "date": jour,
+        "meal": repas["id"],
+        "number_of_guests": convives,
+        "special_requests": special_requests or "",
+    }
+
+
+def client(name_client, phone_number, room_number, special_requests=""):
+    """
+    Corps de requête d'un client, normalisé (espaces superflus, téléphone).
+
+    Raises:
+        ErreurValidation: un ou plusieurs champs sont invalides
+    """
+    erreurs = {}
+    nom = " ".join(str(name_client or "").split())
+    if not nom:
+        erreurs["name"] = ["Le nom du client est obligatoire."]
+    telephone = re.sub(r"[\s.()-]", "", str(phone_number or ""))
+    if not re.fullmatch(r"\+?\d{6,15}", telephone):
+        erreurs["phone_number"] = [f"Numéro de téléphone invalide : {phone_number!r}."]
+    chambre = str(room_number or "").strip()
+    if not chambre:
+        erreurs["room_number"] = ["Le numéro de chambre est obligatoire."]
+    if erreurs:
+        raise ErreurValidation(erreurs)
+    return {
+        "name": nom,
+        "phone_number": telephone,
+        "room_number": chambre,
+        "special_requests": special_requests or "",
+    }
@@ -0,0 +1,152 @@
+"""
+Recherche web (API DuckDuckGo) non bloquante avec cache disque.
+
+- Chaque appel a une échéance stricte (SEARCH_DEADLINE secondes) : la requête
+  s'exécute dans un thread du pool et l'appelant ne l'attend pas au-delà ;
+  une requête qui finit après l'échéance met quand même son résultat en cache.
+- Quand DuckDuckGo répond 202 (traitement différé), le suivi se fait dans un
+  thread en arrière-plan et l'outil renvoie immédiatement un résultat
+  « en attente » ; le résultat final est mis en cache pour l'appel suivant.
+- Les résultats sont gardés dans un cache SQLite à durée de vie limitée ; les
+  réponses sans AbstractText sont aussi mises en cache (cache négatif, durée
+  plus courte) pour ne pas relancer une recherche qui ne donne rien.
+"""
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+
+import requests
+
+API_URL = "http://api.duckduckgo.com/"
+SEARCH_DEADLINE = float(os.getenv("SEARCH_DEADLINE", "4"))
+CACHE_PATH = os.getenv("SEARCH_CACHE_DB", "web_search_cache.db")
+CACHE_TTL = 24 * 3600
+NEGATIVE_TTL = 3600
+
+# Suivi des réponses 202 en arrière-plan
+POLL_INTERVAL = 10
+POLL_ATTEMPTS = 5
+
+AUCUN_RESULTAT = "Aucune information trouvée."
+EN_ATTENTE = "Recherche en cours, le résultat sera disponible dans quelques instants. Réessaie plus tard."
+ERREUR = "Erreur lors de la recherche."
+
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="web-search")
+# Suivis des 202 (qui dorment entre deux relevés) : pool séparé pour ne pas bloquer les recherches
+_poll_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="web-search-poll")
+# Recherches en cours (requête ou suivi d'un 202) : un seul appel par recherche
+_pending = set()
+_pending_lock = threading.Lock()
+_local = threading.local()
+
+
+def _db():
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(CACHE_PATH, timeout=5, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("CREATE TABLE IF NOT EXISTS search_cache "
+                     "(query TEXT PRIMARY KEY, result TEXT NOT NULL, expires_at REAL NOT NULL)")
+        _local.conn = conn
+    return conn
+
+
+def _cle(search):
+    return " ".join(search.lower().split())
+
+
+def cache_get(search):
+    row = _db().execute("SELECT result FROM search_cache WHERE query = ? AND expires_at > ?",
+                        (_cle(search), time.time())).fetchone()
+    return None if row is None else row[0]
+
+
+def cache_set(search, result):
+    """Met en cache un AbstractText ; une chaîne vide est un résultat négatif"""
+    ttl = CACHE_TTL if result else NEGATIVE_TTL
+    _db().execute("INSERT OR REPLACE INTO search_cache (query, result, expires_at) VALUES (?, ?, ?)",
+                  (_cle(search), result, time.time() + ttl))
+
+
+def _poll(search, status_url):
+    """Suit une recherche différée (202) et met son résultat en cache"""
+    try:
+        for _ in range(POLL_ATTEMPTS):
+            time.sleep(POLL_INTERVAL)
+            try:
+                response = requests.get(status_url, timeout=SEARCH_DEADLINE)
+            except requests.RequestException:
+                continue
+            if response.status_code == 200:
+                cache_set(search, response.json().get("AbstractText", ""))
+                return
+        print(f"recherche abandonnée après {POLL_ATTEMPTS} tentatives : {search}")
+    finally:
+        with _pending_lock:
+            _pending.discard(_cle(search))
+
+
+def rechercher(search: str) -> str:
+    """
+    Recherche `search` sur le web sans jamais bloquer plus de SEARCH_DEADLINE secondes.
+
+    Returns:
+        Le résumé trouvé, AUCUN_RESULTAT, EN_ATTENTE si la recherche se
+        poursuit en arrière-plan, ou ERREUR.
+    """
+    cached = cache_get(search)
+    if cached is not None:
+        return cached or AUCUN_RESULTAT
+
+    with _pending_lock:
+        if _cle(search) in _pending:
+            return EN_ATTENTE
+        _pending.add(_cle(search))
+        futur = _executor.submit(_recuperer, search)
+    try:
+        return futur.result(timeout=SEARCH_DEADLINE)
+    except FutureTimeout:
+        # La requête continue en arrière-plan et mettra son résultat en cache
+        print(f"échéance dépassée pour la recherche : {search}")
+        return EN_ATTENTE
+
+
+def _recuperer(search):
+    """Requête DuckDuckGo ; le résultat est mis en cache même si l'appelant n'attend plus"""
+    suivie = False
+    try:
+        resultat, suivie = _interroger(search)
+        return resultat
+    finally:
+        if not suivie:
+            with _pending_lock:
+                _pending.discard(_cle(search))
+
+
+def _interroger(search):
+    """
+    Returns:
+        Un tuple (résultat, suivie) : `suivie` est vrai si la recherche continue dans un suivi de 202
+    """
+    try:
+        response = requests.get(API_URL, params={"q": search, "format": "json"}, timeout=SEARCH_DEADLINE)
+    except requests.RequestException as e:
+        print(f"erreur {e!r} pour la recherche : {search}")
+        return ERREUR, False
+
+    if response.status_code == 200:
+        result = response.json().get("AbstractText", "")
+        cache_set(search, result)
+        return result or AUCUN_RESULTAT, False
+
+    if response.status_code == 202:
+        # La recherche reste dans _pending jusqu'à la fin du suivi
+        status_url = response.headers.get("Location", response.url)
+        _poll_executor.submit(_poll, search, status_url)
+        return EN_ATTENTE, True
+
+    print(f"erreur {response.status_code} pour la recherche : {search}")
+    return ERREUR, False